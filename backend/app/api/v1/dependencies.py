@@ -1,13 +1,13 @@
 # app/api/v1/dependencies.py
 
 from fastapi import Depends, HTTPException, Header, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth.token_parser import parse_token
-from app.config.connection import get_db
-from app.rag.embedder import get_embedder
-from app.rag.llm_client import get_llm_client
+from app.config.connection import get_async_db, get_db
 from app.orc.controller import ORCController
+from app.orc.pipeline import RequestContext, get_orc_pipeline
 
 
 # ============================================================
@@ -94,15 +94,12 @@ def require_permission(required_perm: str):
 
 def get_orc_controller(
     db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Builds the ORC Controller with DB + embedder + LLM client.
+    ORC Controller for one request: the pipeline compiled at startup
+    (embedder + LLM client + semantic answer cache, all process-wide)
+    plus a RequestContext with the DB sessions (sync + async) and deadline.
+    Sessions are lazy: only the one used by the selected path connects.
     """
-    embedder = get_embedder()
-    llm = get_llm_client()
-
-    return ORCController(
-        embedder=embedder,
-        llm_client=llm,
-        db=db,
-    )
+    return ORCController(get_orc_pipeline(), RequestContext.start(db, async_db))
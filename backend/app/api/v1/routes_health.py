@@ -1,4 +1,9 @@
+# app/api/v1/routes_health.py
+
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.rag.warmup import get_warmup_state
 
 router = APIRouter()
 
@@ -8,4 +13,11 @@ def health():
 
 @router.get("/ready")
 def ready():
-    return {"ready": True}
+    """
+    503 until the startup warmup (model load, first inference, pipeline
+    compile) has finished, so traffic only reaches warm instances.
+    """
+    state = get_warmup_state()
+    if not state.ready:
+        return JSONResponse(status_code=503, content=state.status())
+    return state.status()
@@ -1,26 +1,131 @@
 # app/api/v1/routes_ingestion.py
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import uuid
+from pathlib import Path
+from typing import Optional
 
-from app.api.v1.dependencies import get_db, require_permission
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.api.v1.dependencies import require_permission
+from app.config.settings import get_settings
 from app.ingestion.embed_and_index import run_ingestion
+from app.ingestion.jobs import IngestInProgressError, IngestJob, IngestRun, get_ingest_job_manager
+from app.ingestion.upload import UploadFeed, multipart_file_chunks
+from app.models.ingest_job import IngestJobStatus
 
 router = APIRouter()
+settings = get_settings()
+
+# Raw upload bodies: one JSON array, or one JSON object per line
+JSON_MEDIA_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/x-jsonlines",
+)
+
+
+def _get_job(job_id: str) -> IngestJob:
+    job = get_ingest_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown ingestion job '{job_id}'")
+    return job
+
 
+def _submit(source: str, run: IngestRun) -> IngestJob:
+    try:
+        return get_ingest_job_manager().submit(source, run)
+    except IngestInProgressError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "job_id": e.job_id},
+        )
+
+
+@router.post(
+    "/ingest",
+    summary="Start an ingestion job",
+    response_model=IngestJobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def ingest_data(_ = Depends(require_permission("ingest:write"))):
+    """
+    Load tickets -> chunk -> embed -> store in pgvector, as a background job.
+    Returns the job id at once; poll GET /v1/ingest/{job_id} for progress.
+    409 if an ingestion of the same source is already queued or running.
+    Requires 'ingest:write' permission.
+    """
+    source = f"file:{Path(settings.data_path).resolve()}"
+    job = _submit(source, lambda progress: run_ingestion(progress=progress))
+    return job.status()
 
-@router.post("/ingest", summary="Trigger ingestion pipeline")
-def ingest_data(
-    db: Session = Depends(get_db),
+
+@router.post(
+    "/ingest/upload",
+    summary="Stream tickets into an ingestion job",
+    response_model=IngestJobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def ingest_upload(
+    request: Request,
+    source: Optional[str] = None,
     _ = Depends(require_permission("ingest:write")),
 ):
     """
-    Load tickets -> chunk -> embed -> store in pgvector.
+    Ingest an uploaded export while it is being received: a JSON array or
+    JSONL / NDJSON, either as the raw body or as the first file of a
+    multipart/form-data body.
+
+    The body is parsed and fed to the ingestion job as it arrives, and
+    read only as fast as the job ingests it, so any size ingests in
+    constant memory. Responds once the body is consumed, with the job
+    (by then usually ingesting its last batches); poll GET
+    /v1/ingest/{job_id} for the outcome. Pass `source` to guard against
+    overlapping uploads of the same export.
     Requires 'ingest:write' permission.
     """
-    inserted = run_ingestion(db=db)
-    return {
-        "status": "ok",
-        "message": "Ingestion completed successfully.",
-        "inserted_chunks": inserted,
-    }
+    content_type = request.headers.get("content-type", "")
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "multipart/form-data":
+        body = multipart_file_chunks(request.stream(), content_type)
+    elif media_type in JSON_MEDIA_TYPES:
+        body = request.stream()
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected multipart/form-data or one of {', '.join(JSON_MEDIA_TYPES)}",
+        )
+
+    feed = UploadFeed(settings.ingest_upload_queue_chunks)
+    job = _submit(
+        f"upload:{source or uuid.uuid4().hex}",
+        lambda progress: run_ingestion(external_records=feed.records(), progress=progress),
+    )
+    try:
+        await feed.pump(body, job)
+    except ValueError as e:
+        # Malformed multipart framing (JSON errors fail the job instead)
+        get_ingest_job_manager().cancel(job.job_id)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Malformed upload: {e}")
+    except BaseException:
+        get_ingest_job_manager().cancel(job.job_id)
+        raise
+    return job.status()
+
+
+@router.get("/ingest/{job_id}", summary="Ingestion job status", response_model=IngestJobStatus)
+def ingest_status(job_id: str, _ = Depends(require_permission("ingest:write"))):
+    """State and progress (tickets, chunks, embeddings/sec, ETA) of an ingestion job."""
+    return _get_job(job_id).status()
+
+
+@router.delete("/ingest/{job_id}", summary="Cancel an ingestion job", response_model=IngestJobStatus)
+def cancel_ingest(job_id: str, _ = Depends(require_permission("ingest:write"))):
+    """
+    Cancel a queued job, or stop a running one after its current batch.
+    Batches already committed stay; re-running the ingestion continues
+    from there, since unchanged tickets are skipped.
+    """
+    _get_job(job_id)
+    return get_ingest_job_manager().cancel(job_id).status()
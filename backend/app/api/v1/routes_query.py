@@ -1,6 +1,11 @@
 # app/api/v1/routes_query.py
 
-from fastapi import APIRouter, Depends
+import json
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.v1.dependencies import (
@@ -8,13 +13,16 @@ from app.api.v1.dependencies import (
     get_orc_controller,
     get_db,
 )
-from app.models.query import QueryRequest, QueryResponse
+from app.config.settings import get_settings
+from app.models.query import BatchQueryRequest, QueryRequest, QueryResponse
 
 router = APIRouter()
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/query", response_model=QueryResponse)
-def query_endpoint(
+async def query_endpoint(
     payload: QueryRequest,
     rbac_ctx=Depends(get_rbac_context),
     orc=Depends(get_orc_controller),
@@ -28,11 +36,105 @@ def query_endpoint(
     - Rank & summarize
     - Generate final answer via LLM
     - Return answer + citations
+
+    `payload.profile` selects which of these steps run (fast / full /
+    retrieval_only); metadata.operator_sequence lists what actually ran.
+
+    With ORC_ASYNC_MODE the whole pipeline runs on the event loop (only the
+    embedding forward pass uses a worker thread); otherwise the sync
+    pipeline runs in the threadpool as before.
+    """
+
+    if settings.orc_async_mode:
+        return await orc.arun(
+            question=payload.question,
+            rbac_ctx=rbac_ctx,
+            profile=payload.profile,
+        )
+
+    return await run_in_threadpool(
+        orc.run,
+        question=payload.question,
+        rbac_ctx=rbac_ctx,
+        profile=payload.profile,
+    )
+
+
+@router.post("/query/batch")
+async def query_batch_endpoint(
+    payload: BatchQueryRequest,
+    rbac_ctx=Depends(get_rbac_context),
+    orc=Depends(get_orc_controller),
+):
+    """
+    Many questions in one request, answered with the same RBAC context:
+    - Embed all questions in one encode call
+    - Retrieve for all of them in one DB round trip (LATERAL query)
+    - Run the per-question LLM stages, QUERY_BATCH_CONCURRENCY at a time
+
+    The response is NDJSON, one BatchQueryResult per line, written as each
+    answer completes (completion order; `index` maps back to the request).
+    A question that fails gets an `error` line instead of ending the stream.
+    Always served by the async ORC path, whatever ORC_ASYNC_MODE says.
+    """
+    if len(payload.questions) > settings.query_batch_max_questions:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.query_batch_max_questions} questions per batch",
+        )
+
+    results = await orc.arun_batch(
+        questions=payload.questions,
+        rbac_ctx=rbac_ctx,
+        profile=payload.profile,
+    )
+
+    async def lines():
+        async for result in results:
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/query/stream")
+async def query_stream_endpoint(
+    payload: QueryRequest,
+    rbac_ctx=Depends(get_rbac_context),
+    orc=Depends(get_orc_controller),
+):
     """
+    /v1/query as Server-Sent Events, for the lowest time-to-first-byte:
 
-    result = orc.run(
+        event: retrieval   source tickets + used chunks, as soon as ranking is done
+        event: token       {"text": delta} per answer fragment from the LLM
+        event: done        the full QueryResponse, incl. metadata.verified
+        event: error       {"detail": ...} if generation fails mid-stream
+
+    Always served by the async ORC path. Browsers consume it with fetch()
+    and a stream reader (EventSource cannot POST).
+    """
+    events = await orc.astream(
         question=payload.question,
         rbac_ctx=rbac_ctx,
+        profile=payload.profile,
     )
 
-    return result
+    async def body():
+        try:
+            async for event, data in events:
+                yield _sse(event, data)
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.warning(f"/query/stream failed: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        # Disable proxy buffering (nginx) so tokens are flushed as they arrive
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,17 @@
-from sqlalchemy import create_engine
+import logging
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.models.base import Base   # ✅ FIXED
+from app.models.vector_type import BINARY_VECTOR_DRIVERS
 
 from app.config.settings import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 def parse_echo(value):
@@ -27,6 +34,25 @@ engine = create_engine(
     pool_pre_ping=True,
 )
 
+
+def _register_pgvector(dbapi_connection, connection_record):
+    """
+    Teach each new psycopg 3 connection the pgvector types so numpy
+    vectors are sent/received in binary instead of text literals.
+    """
+    from pgvector.psycopg import register_vector
+
+    try:
+        register_vector(getattr(dbapi_connection, "driver_connection", dbapi_connection))
+    except Exception as e:
+        # e.g. extension not created yet: fall back to text transfer
+        logger.warning(f"pgvector binary adapters not registered: {e}")
+
+
+if engine.dialect.driver in BINARY_VECTOR_DRIVERS:
+    event.listen(engine, "connect", _register_pgvector)
+
+
 SessionLocal = sessionmaker(
     bind=engine,
     autoflush=False,
@@ -40,3 +66,49 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---------------------------------------------------------------------
+# Async engine (query path)
+# ---------------------------------------------------------------------
+
+def _register_pgvector_async(dbapi_connection, connection_record):
+    """Async counterpart of _register_pgvector for psycopg's AsyncConnection."""
+    from pgvector.psycopg import register_vector_async
+
+    try:
+        dbapi_connection.run_async(register_vector_async)
+    except Exception as e:
+        logger.warning(f"pgvector binary adapters not registered (async): {e}")
+
+
+@lru_cache()
+def get_async_engine() -> AsyncEngine:
+    """
+    Lazily built AsyncEngine on the same database, always via psycopg 3
+    (its async driver). Processes that never serve queries never create it.
+    """
+    url = make_url(settings.database_url).set(drivername="postgresql+psycopg")
+    async_engine = create_async_engine(
+        url,
+        echo=parse_echo(settings.db_echo),
+        pool_pre_ping=True,
+        pool_size=settings.db_async_pool_size,
+        max_overflow=settings.db_async_max_overflow,
+    )
+    event.listen(async_engine.sync_engine, "connect", _register_pgvector_async)
+    return async_engine
+
+
+@lru_cache()
+def get_async_sessionmaker() -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=get_async_engine(),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
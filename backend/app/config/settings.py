@@ -8,15 +8,68 @@ class Settings(BaseSettings):
 
     database_url: str = Field(..., alias="DATABASE_URL")
     db_echo: bool = Field(False, alias="DB_ECHO")
+    # Async engine pool used by the async query path
+    db_async_pool_size: int = Field(20, alias="DB_ASYNC_POOL_SIZE")
+    db_async_max_overflow: int = Field(20, alias="DB_ASYNC_MAX_OVERFLOW")
 
     embedding_model_name: str = Field(..., alias="EMBEDDING_MODEL_NAME")
     embedding_dim: int = Field(..., alias="EMBEDDING_DIM")
     embedding_batch_size: int = Field(..., alias="EMBEDDING_BATCH_SIZE")
+    # torch | onnx (ONNX Runtime, optional dynamic int8: arm64 | avx2 | avx512 | avx512_vnni)
+    embedding_backend: str = Field("torch", alias="EMBEDDING_BACKEND")
+    embedding_onnx_quantization: str = Field("", alias="EMBEDDING_ONNX_QUANTIZATION")
+    # ONNX Runtime intra-op threads per process (0 = one per physical core)
+    embedding_onnx_threads: int = Field(0, alias="EMBEDDING_ONNX_THREADS")
+    embedding_onnx_dir: str = Field("./.cache/onnx", alias="EMBEDDING_ONNX_DIR")
     vector_index_type: str = Field(..., alias="VECTOR_INDEX_TYPE")
+    # In-process index (VECTOR_INDEX_TYPE=local_ivf | local_flat)
+    vector_index_dir: str = Field("./.cache/vector_index", alias="VECTOR_INDEX_DIR")
+    local_ivf_nlist: int = Field(0, alias="LOCAL_IVF_NLIST")
+    local_ivf_nprobe: int = Field(8, alias="LOCAL_IVF_NPROBE")
+    # Quantized search + float32 rescoring: none | halfvec | int8 (local only) | binary
+    vector_quantization: str = Field("none", alias="VECTOR_QUANTIZATION")
+    vector_rescore_factor: int = Field(4, alias="VECTOR_RESCORE_FACTOR")
+    # Two-stage retrieval on projected vectors: none | pca | truncate
+    coarse_projection: str = Field("none", alias="COARSE_PROJECTION")
+    coarse_dim: int = Field(64, alias="COARSE_DIM")
+    coarse_overfetch: int = Field(8, alias="COARSE_OVERFETCH")
+    coarse_sample_rows: int = Field(20000, alias="COARSE_SAMPLE_ROWS")
+    # Selectivity-aware planning of RBAC-filtered pgvector searches
+    retrieval_planner_enabled: bool = Field(True, alias="RETRIEVAL_PLANNER_ENABLED")
+    retrieval_exact_max_rows: int = Field(20000, alias="RETRIEVAL_EXACT_MAX_ROWS")
+    retrieval_ef_search_max: int = Field(1000, alias="RETRIEVAL_EF_SEARCH_MAX")
+    retrieval_stats_ttl_seconds: int = Field(300, alias="RETRIEVAL_STATS_TTL_SECONDS")
+    retrieval_partial_index_min_rows: int = Field(0, alias="RETRIEVAL_PARTIAL_INDEX_MIN_ROWS")
+    # vector | hybrid (vector + lexical, reciprocal-rank fused)
+    retrieval_mode: str = Field("hybrid", alias="RETRIEVAL_MODE")
+    hybrid_candidates: int = Field(30, alias="HYBRID_CANDIDATES")
+    hybrid_rrf_k: int = Field(60, alias="HYBRID_RRF_K")
+
+    # Two-tier embedding cache keyed by (model name, text hash).
+    # The disk tier is shared by all worker processes; empty dir disables it.
+    embedding_cache_enabled: bool = Field(True, alias="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_max_bytes: int = Field(64 * 1024 * 1024, alias="EMBEDDING_CACHE_MAX_BYTES")
+    embedding_cache_dir: str = Field("", alias="EMBEDDING_CACHE_DIR")
+    embedding_cache_disk_slots: int = Field(262144, alias="EMBEDDING_CACHE_DISK_SLOTS")
 
     llm_endpoint: str = Field(..., alias="LLM_ENDPOINT")
     openai_api_key: str = Field(..., alias="OPENAI_API_KEY")
     llm_timeout_seconds: int = Field(..., alias="LLM_TIMEOUT_SECONDS")
+    # Keep-alive connection pool size per LLM endpoint
+    llm_max_connections: int = Field(256, alias="LLM_MAX_CONNECTIONS")
+    # Max LLM calls in flight per endpoint; further calls wait for a slot
+    llm_max_concurrency: int = Field(64, alias="LLM_MAX_CONCURRENCY")
+    # Retries of connection errors / 429 / 502-504, full-jitter exponential backoff
+    llm_retries: int = Field(2, alias="LLM_RETRIES")
+    llm_retry_backoff_seconds: float = Field(0.25, alias="LLM_RETRY_BACKOFF_SECONDS")
+    llm_retry_backoff_max_seconds: float = Field(4.0, alias="LLM_RETRY_BACKOFF_MAX_SECONDS")
+    # Circuit breaker: open after N consecutive failed calls, probe again after the reset time
+    llm_breaker_failures: int = Field(5, alias="LLM_BREAKER_FAILURES")
+    llm_breaker_reset_seconds: float = Field(30, alias="LLM_BREAKER_RESET_SECONDS")
+    # Prompt -> completion cache in front of the LLM (identical prompts within the TTL)
+    llm_prompt_cache_enabled: bool = Field(True, alias="LLM_PROMPT_CACHE_ENABLED")
+    llm_prompt_cache_ttl_seconds: float = Field(300, alias="LLM_PROMPT_CACHE_TTL_SECONDS")
+    llm_prompt_cache_max_entries: int = Field(2048, alias="LLM_PROMPT_CACHE_MAX_ENTRIES")
 
     mock_auth: bool = Field(True, alias="MOCK_AUTH")
     jwt_secret: str = Field(None, alias="JWT_SECRET")
@@ -31,8 +84,46 @@ class Settings(BaseSettings):
     chunk_size: int = Field(..., alias="CHUNK_SIZE")
     chunk_overlap: int = Field(..., alias="CHUNK_OVERLAP")
 
+    # Streaming ingestion: tickets per batch and how many embedded batches
+    # may be waiting on the DB writer at once (0 = write inline).
+    ingest_batch_size: int = Field(256, alias="INGEST_BATCH_SIZE")
+    ingest_max_in_flight: int = Field(2, alias="INGEST_MAX_IN_FLIGHT")
+    # Rows per multi-VALUES INSERT ... ON CONFLICT statement
+    ingest_upsert_batch_size: int = Field(1000, alias="INGEST_UPSERT_BATCH_SIZE")
+    # Embed ingestion batches in N worker processes (shared-memory text/vector buffers); 0 = in-process
+    ingest_embed_workers: int = Field(0, alias="INGEST_EMBED_WORKERS")
+    # POST /v1/ingest runs as a background job: jobs running at once, finished jobs kept for GET
+    ingest_job_concurrency: int = Field(1, alias="INGEST_JOB_CONCURRENCY")
+    ingest_job_history: int = Field(100, alias="INGEST_JOB_HISTORY")
+    # Body chunks of a streamed upload buffered ahead of its ingestion job
+    ingest_upload_queue_chunks: int = Field(16, alias="INGEST_UPLOAD_QUEUE_CHUNKS")
+
     orc_max_iterations: int = Field(..., alias="ORC_MAX_ITERATIONS")
+    # Token budgets of the packed chunk context in the answer / summary prompts
+    answer_context_tokens: int = Field(2000, alias="ANSWER_CONTEXT_TOKENS")
+    summary_context_tokens: int = Field(1500, alias="SUMMARY_CONTEXT_TOKENS")
     operator_timeout_seconds: int = Field(..., alias="OPERATOR_TIMEOUT_SECONDS")
+    # Serve /v1/query with the async ORC path (async DB + async LLM client)
+    orc_async_mode: bool = Field(True, alias="ORC_ASYNC_MODE")
+    # Shared pool running independent operators concurrently (sync path)
+    orc_operator_threads: int = Field(64, alias="ORC_OPERATOR_THREADS")
+    # Default pipeline profile when the request doesn't pick one (fast | full | retrieval_only)
+    orc_pipeline_profile: str = Field("fast", alias="ORC_PIPELINE_PROFILE")
+    # Deadline for the operators of one request, in seconds (0 = none)
+    orc_request_timeout_seconds: float = Field(0, alias="ORC_REQUEST_TIMEOUT_SECONDS")
+    # Load + warm the embedder and compile the pipeline in the background at startup;
+    # /v1/ready stays false until done. Optionally probe the LLM endpoint as well
+    startup_warmup: bool = Field(True, alias="STARTUP_WARMUP")
+    startup_probe_llm: bool = Field(False, alias="STARTUP_PROBE_LLM")
+    # /v1/query/batch: questions per request, pipelines (LLM calls) in flight per batch
+    query_batch_max_questions: int = Field(64, alias="QUERY_BATCH_MAX_QUESTIONS")
+    query_batch_concurrency: int = Field(8, alias="QUERY_BATCH_CONCURRENCY")
+
+    # Semantic answer cache in front of the ORC pipeline
+    answer_cache_enabled: bool = Field(True, alias="ANSWER_CACHE_ENABLED")
+    answer_cache_similarity: float = Field(0.95, alias="ANSWER_CACHE_SIMILARITY")
+    answer_cache_ttl_seconds: int = Field(900, alias="ANSWER_CACHE_TTL_SECONDS")
+    answer_cache_max_entries: int = Field(4096, alias="ANSWER_CACHE_MAX_ENTRIES")
 
     # 🔥 THIS LINE IS THE FIX 🔥
     model_config = SettingsConfigDict(
@@ -1,19 +1,24 @@
 # app/ingestion/embed_and_index.py
 
-from typing import List, Callable, Sequence, Optional
+from collections.abc import Sized
+from typing import Any, Iterable, Iterator, Mapping, Sequence, Optional
 
+import numpy as np
 from sqlalchemy.orm import Session
 
 from app.config.settings import get_settings
 from app.config.connection import SessionLocal
 
-from app.ingestion.loader import load_tickets_from_file, upsert_tickets
-from app.ingestion.chunker import make_chunks_for_ticket
+from app.ingestion.embed_pool import EmbeddingPool
+from app.ingestion.loader import iter_tickets_from_file
+from app.ingestion.pipeline import EmbedFn, IngestStats, ProgressFn, run_pipeline
+from app.ingestion.projection import load_projection, update_projection
 
 from app.models.ticket import Ticket
-from app.models.chunk import ChunkORM
 
+from app.rag.answer_cache import get_answer_cache
 from app.rag.embedder import get_embedder
+from app.rag.vector_backends import get_vector_backend
 
 settings = get_settings()
 
@@ -24,16 +29,21 @@ settings = get_settings()
 
 def run_ingestion(
     db: Optional[Session] = None,
-    embedder: Optional[Callable[[Sequence[str]], List[List[float]]]] = None,
-    external_records: Optional[list] = None,
+    embedder: Optional[EmbedFn] = None,
+    external_records: Optional[Iterable[Mapping[str, Any]]] = None,
     data_path: Optional[str] = None,
+    progress: Optional[ProgressFn] = None,
 ) -> int:
     """
     Flexible ingestion entry point:
-    - If external_records provided → ingest uploaded JSON
+    - If external_records provided → ingest uploaded JSON (any iterable of
+      records, e.g. a generator parsing an upload as it arrives)
     - Else if data_path provided → ingest from a specific file path
     - Else → ingest from default (settings.data_path)
 
+    `progress` is called with the running IngestStats after every batch
+    and may stop the run by raising IngestCancelled (see ingestion/jobs.py).
+
     Returns:
         int: number of inserted chunks.
     """
@@ -45,26 +55,32 @@ def run_ingestion(
         db = SessionLocal()
         close_db_at_end = True
 
-    # Load embedder instance
-    if embedder is None:
+    # Load embedder instance: a process pool for large runs, else in-process
+    pool = None
+    if embedder is None and settings.ingest_embed_workers > 0:
+        pool = EmbeddingPool(settings.ingest_embed_workers)
+        embedder = pool.embed
+    elif embedder is None:
         embed_instance = get_embedder()
 
-        def embedder(texts: Sequence[str]) -> List[List[float]]:
-            return embed_instance.embed(texts)
+        def embedder(texts: Sequence[str]) -> np.ndarray:
+            return embed_instance.embed_array(texts)
 
     try:
         # MODE 1 — Uploaded JSON
         if external_records is not None:
-            return ingest_uploaded_records(db, embedder, external_records)
+            return ingest_uploaded_records(db, embedder, external_records, progress)
 
         # MODE 2 — Custom ingestion path
         if data_path is not None:
-            return ingest_file_path(db, embedder, data_path)
+            return ingest_file_path(db, embedder, data_path, progress)
 
         # MODE 3 — Default ingestion path
-        return ingest_file_path(db, embedder, settings.data_path)
+        return ingest_file_path(db, embedder, settings.data_path, progress)
 
     finally:
+        if pool is not None:
+            pool.close()
         if close_db_at_end:
             db.close()
 
@@ -75,15 +91,23 @@ def run_ingestion(
 
 def ingest_uploaded_records(
     db: Session,
-    embedder: Callable[[Sequence[str]], List[List[float]]],
-    records: list,
+    embedder: EmbedFn,
+    records: Iterable[Mapping[str, Any]],
+    progress: Optional[ProgressFn] = None,
 ) -> int:
     """
-    Ingest from uploaded JSON (list of ticket-like objects).
+    Ingest from uploaded JSON (iterable of ticket-like objects).
     Automatically maps common fields to Ticket ORM attributes.
+    Records are mapped lazily, so a streamed upload is never held in full.
     """
+    return _ingest_ticket_list(
+        db, embedder, iter_uploaded_tickets(records), mode="uploaded-json", progress=progress
+    )
 
-    tickets: List[Ticket] = []
+
+def iter_uploaded_tickets(records: Iterable[Mapping[str, Any]]) -> Iterator[Ticket]:
+    """Map uploaded records to Tickets one at a time, skipping invalid ones."""
+    skipped = 0
 
     for idx, r in enumerate(records):
         try:
@@ -118,29 +142,27 @@ def ingest_uploaded_records(
                 ),
             )
 
-            tickets.append(ticket)
-
         except Exception as e:
+            skipped += 1
             print(f"[WARN] Skipping invalid record index={idx}: {e}")
+            continue
 
-    print(f"[INGEST] Loaded {len(tickets)} tickets from uploaded JSON")
+        yield ticket
 
-    if not tickets:
-        print("[INGEST] No usable tickets found in uploaded file.")
-        return 0
-
-    return _ingest_ticket_list(db, embedder, tickets, mode="uploaded-json")
+    if skipped:
+        print(f"[INGEST] Skipped {skipped} invalid records in uploaded JSON")
 
 
 def ingest_file_path(
     db: Session,
-    embedder: Callable[[Sequence[str]], List[List[float]]],
-    data_path: str
+    embedder: EmbedFn,
+    data_path: str,
+    progress: Optional[ProgressFn] = None,
 ) -> int:
-    """Ingest from a file path (default or specified)."""
-    tickets = load_tickets_from_file(path=data_path)
-    print(f"[INGEST] Loaded {len(tickets)} tickets from disk: {data_path}")
-    return _ingest_ticket_list(db, embedder, tickets, mode=f"file:{data_path}")
+    """Ingest from a file path (default or specified), streaming JSON or JSONL."""
+    print(f"[INGEST] Streaming tickets from disk: {data_path}")
+    tickets = iter_tickets_from_file(path=data_path)
+    return _ingest_ticket_list(db, embedder, tickets, mode=f"file:{data_path}", progress=progress)
 
 
 # --------------------------------------------------------------------------------------
@@ -149,66 +171,94 @@ def ingest_file_path(
 
 def _ingest_ticket_list(
     db: Session,
-    embedder: Callable[[Sequence[str]], List[List[float]]],
-    tickets: List[Ticket],
+    embedder: EmbedFn,
+    tickets: Iterable[Ticket],
     mode: str,
+    progress: Optional[ProgressFn] = None,
 ) -> int:
     """
     Shared ingestion routine for:
         - uploaded JSON
         - file-based ingestion
-    Includes:
-        1) Upsert tickets
-        2) Chunk summary/resolution
-        3) Embed chunks
-        4) Insert chunks into pgvector
+    Tickets are streamed through the batch pipeline:
+        1) Diff against stored content hashes (skip unchanged tickets/chunks)
+        2) Embed new/changed chunks (batch N)
+        3) Upsert tickets + chunks, drop stale chunks (batch N-1, overlapped)
+        4) Commit per batch
+        5) Fit / refresh the coarse-retrieval projection (COARSE_PROJECTION)
+        6) Flush the vector backend (persist local index / refresh
+           retrieval planner stats) and drop cached
+           answers scoped to any product tag that changed
+    Steps 5-6 also run when the pipeline fails part-way, for the batches
+    committed before the failure.
+    Memory stays bounded by INGEST_BATCH_SIZE * INGEST_MAX_IN_FLIGHT and
+    re-ingesting unchanged data costs no embeddings.
+
+    Returns:
+        int: number of chunks (re-)embedded and written.
     """
 
     print(f"[INGEST] Starting ingestion mode: {mode}")
-    print(f"[INGEST] Tickets received: {len(tickets)}")
-
-    # 1. UPSERT TICKETS into DB
-    upsert_tickets(db, tickets)
-
-    # 2. CHUNKING
-    all_chunks = []
-    for t in tickets:
-        # make_chunks_for_ticket uses summary/resolution internally
-        chunks = make_chunks_for_ticket(t)
-        all_chunks.extend(chunks)
-
-    print(f"[INGEST] Total chunks produced: {len(all_chunks)}")
-
-    if not all_chunks:
-        print("[INGEST] WARNING: No chunks generated — check ticket content mapping.")
-        return 0
 
-    # 3. EMBEDDING
-    texts = [c["text"] for c in all_chunks]
-    embeddings = embedder(texts)
-
-    if len(embeddings) != len(all_chunks):
-        raise ValueError(
-            f"Embedding mismatch: {len(embeddings)} embeddings vs {len(all_chunks)} chunks"
-        )
-
-    # 4. INSERT CHUNKS
-    for payload, emb_vector in zip(all_chunks, embeddings):
-        chunk_row = ChunkORM(
-            ticket_id=payload["ticket_id"],
-            product_tag=payload["product_tag"],
-            chunk_index=payload["chunk_index"],
-            text=payload["text"],
-            embedding=emb_vector,
-            metadata=payload["metadata"],
+    stats = IngestStats(total_tickets=len(tickets) if isinstance(tickets, Sized) else None)
+    try:
+        run_pipeline(
+            db,
+            embedder,
+            tickets,
+            batch_size=settings.ingest_batch_size,
+            max_in_flight=settings.ingest_max_in_flight,
+            projection=load_projection(db),
+            progress=progress,
+            stats=stats,
         )
-        db.add(chunk_row)
+    except BaseException:
+        # Every batch commits on its own, so the ones before the failure are
+        # live: the backend and the answer cache must still catch up on them
+        if stats.changed_tickets:
+            print(f"[INGEST] Failed after {stats.batches} batches; publishing the committed ones.")
+            db.rollback()
+            try:
+                _publish_changes(db, stats)
+            except Exception as e:
+                print(f"[INGEST] Publishing after the failure failed too: {e}")
+        raise
+
+    if stats.cancelled:
+        # Committed batches still need the flush / cache invalidation below
+        print(f"[INGEST] Cancelled after {stats.tickets} tickets ({stats.batches} batches).")
+
+    if not stats.changed_tickets:
+        print(f"[INGEST] {stats.tickets} tickets received, none changed — nothing to do.")
+        return 0
 
-    db.commit()
+    _publish_changes(db, stats)
 
     print(
         f"[INGEST] Completed mode={mode}: "
-        f"{len(tickets)} tickets → {len(all_chunks)} chunks inserted."
+        f"{stats.tickets} tickets ({stats.changed_tickets} changed) → "
+        f"{stats.chunks} chunks embedded, {stats.reused_chunks} reused, "
+        f"{stats.deleted_chunks} stale deleted in {stats.batches} batches."
     )
 
-    return len(all_chunks)
+    return stats.chunks
+
+
+def _publish_changes(db: Session, stats: IngestStats) -> None:
+    """
+    Make committed batches visible to queries: refresh the coarse-retrieval
+    projection, flush the vector backend, and drop cached answers scoped
+    to a changed product tag (even if the flush fails).
+    """
+    try:
+        backend = get_vector_backend()
+        backend.set_projection(update_projection(db))
+        backend.flush(db)
+    finally:
+        answer_cache = get_answer_cache()
+        if answer_cache is not None:
+            dropped = answer_cache.invalidate_tags(stats.changed_product_tags)
+            print(
+                f"[INGEST] Answer cache: dropped {dropped} entries for "
+                f"{len(stats.changed_product_tags)} changed product tags."
+            )
@@ -0,0 +1,245 @@
+# app/ingestion/embed_pool.py
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+# Seconds between worker liveness checks while waiting for results
+_POLL_SECONDS = 1.0
+
+
+# --------------------------------------------------------------------------------------
+# SHARED BUFFERS
+# --------------------------------------------------------------------------------------
+# Text block:   int64 n, int64 offsets[n + 1], then the UTF-8 bytes of all texts
+#               back to back; text i is data[offsets[i]:offsets[i + 1]].
+# Vector block: float32[n, dim]; row i is the embedding of text i.
+# The parent writes the text block, workers write their rows of the vector
+# block, so results land in input order without being sent through a pipe.
+
+
+def _grow(block: Optional[shared_memory.SharedMemory], size: int) -> shared_memory.SharedMemory:
+    """`block` if it holds `size` bytes, else a new block with headroom (the old one is unlinked)."""
+    if block is not None and block.size >= size:
+        return block
+    if block is not None:
+        block.close()
+        block.unlink()
+    return shared_memory.SharedMemory(create=True, size=max(2 * size, 1 << 16))
+
+
+def write_texts(buf, texts: Sequence[str]) -> None:
+    encoded = [t.encode("utf-8") for t in texts]
+    n = len(encoded)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    header = (n + 2) * 8
+    np.ndarray((1,), dtype=np.int64, buffer=buf)[0] = n
+    np.ndarray((n + 1,), dtype=np.int64, buffer=buf, offset=8)[:] = offsets
+    buf[header : header + int(offsets[-1])] = b"".join(encoded)
+
+
+def text_block_size(texts: Sequence[str]) -> int:
+    return (len(texts) + 2) * 8 + sum(len(t.encode("utf-8")) for t in texts)
+
+
+def read_texts(buf, start: int, end: int) -> List[str]:
+    n = int(np.ndarray((1,), dtype=np.int64, buffer=buf)[0])
+    offsets = np.ndarray((n + 1,), dtype=np.int64, buffer=buf, offset=8)
+    data = (n + 2) * 8
+    return [
+        bytes(buf[data + offsets[i] : data + offsets[i + 1]]).decode("utf-8")
+        for i in range(start, end)
+    ]
+
+
+# --------------------------------------------------------------------------------------
+# WORKER PROCESS
+# --------------------------------------------------------------------------------------
+
+def _worker(factory: Callable[[], object], threads: int, tasks, results) -> None:
+    """
+    Load the model once, then embed (text block, vector block, start, end)
+    shards until a None task arrives.
+    """
+    # Parallelism comes from the processes; keep each one to its share of cores
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    settings.embedding_onnx_threads = threads
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    try:
+        embedder = factory()
+    except BaseException as e:
+        results.put(("error", None, f"model load failed: {e}"))
+        return
+    results.put(("ready", None, None))
+
+    blocks: Dict[str, shared_memory.SharedMemory] = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            texts_name, vectors_name, start, end, dim = task
+            try:
+                _embed_shard(embedder, _attach(blocks, texts_name, vectors_name), start, end, dim)
+                results.put(("done", start, None))
+            except BaseException as e:
+                results.put(("error", start, str(e)))
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+def _attach(blocks: Dict[str, shared_memory.SharedMemory], texts_name: str, vectors_name: str):
+    # The parent replaces a block when it has to grow; let go of old ones
+    for name in [n for n in blocks if n not in (texts_name, vectors_name)]:
+        blocks.pop(name).close()
+    for name in (texts_name, vectors_name):
+        if name not in blocks:
+            blocks[name] = shared_memory.SharedMemory(name=name)
+    return blocks[texts_name], blocks[vectors_name]
+
+
+def _embed_shard(embedder, blocks, start: int, end: int, dim: int) -> None:
+    texts_block, vectors_block = blocks
+    vectors = embedder.embed_array(read_texts(texts_block.buf, start, end))
+    if vectors.shape != (end - start, dim):
+        raise ValueError(f"Expected embeddings of shape {(end - start, dim)}, got {vectors.shape}")
+    out = np.ndarray((end, dim), dtype=np.float32, buffer=vectors_block.buf)
+    out[start:end] = vectors
+
+
+# --------------------------------------------------------------------------------------
+# POOL
+# --------------------------------------------------------------------------------------
+
+class EmbeddingPool:
+    """
+    `workers` processes, each with its own copy of the embedding model,
+    sharing the texts of every embed() call.
+
+    embed(texts) writes the texts into a shared-memory block and queues
+    shards of `shard_size` texts; idle workers pull the next shard (so
+    long texts do not leave the other workers waiting), embed it and
+    write the vectors into their rows of a shared float32 block. The call
+    returns a copy of those rows, in input order, once every shard is done.
+
+    Each worker gets cores / workers threads for torch / ONNX Runtime.
+    Workers are spawned (not forked: torch and tokenizer thread pools do
+    not survive fork) and load the model once, in parallel, before the
+    constructor returns. `factory` builds a worker's embedder (default:
+    get_embedder, i.e. the configured backend and embedding cache).
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        factory: Optional[Callable[[], object]] = None,
+        shard_size: Optional[int] = None,
+        dim: Optional[int] = None,
+    ):
+        if factory is None:
+            from app.rag.embedder import get_embedder as factory
+
+        self.workers = max(1, workers)
+        self.shard_size = shard_size or max(64, settings.embedding_batch_size)
+        self.dim = dim or settings.embedding_dim
+        self._lock = threading.Lock()
+        self._texts: Optional[shared_memory.SharedMemory] = None
+        self._vectors: Optional[shared_memory.SharedMemory] = None
+
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._processes = [
+            ctx.Process(
+                target=_worker,
+                args=(factory, threads, self._tasks, self._results),
+                name=f"embed-worker-{i}",
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        try:
+            self._collect("ready", self.workers)
+        except BaseException:
+            self.close()
+            raise
+        print(f"[INGEST] Embedding pool ready: {self.workers} workers x {threads} threads")
+
+    def __enter__(self) -> "EmbeddingPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        n = len(texts)
+        if n == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        with self._lock:
+            self._texts = _grow(self._texts, text_block_size(texts))
+            self._vectors = _grow(self._vectors, n * self.dim * 4)
+            write_texts(self._texts.buf, texts)
+
+            starts = range(0, n, self.shard_size)
+            for start in starts:
+                end = min(start + self.shard_size, n)
+                self._tasks.put((self._texts.name, self._vectors.name, start, end, self.dim))
+            self._collect("done", len(starts))
+
+            # Copy out: the block is reused by the next call while the
+            # caller's batch may still be waiting to be written
+            return np.ndarray((n, self.dim), dtype=np.float32, buffer=self._vectors.buf).copy()
+
+    def _collect(self, kind: str, count: int) -> None:
+        """Wait for `count` results of `kind`; raise the first error once all are in."""
+        error = None
+        while count:
+            try:
+                status, _, message = self._results.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                dead = [p.name for p in self._processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Embedding worker(s) exited unexpectedly: {dead}")
+                continue
+            count -= 1
+            if status == "error" and error is None:
+                error = message
+        if error is not None:
+            raise RuntimeError(f"Embedding worker failed: {error}")
+
+    def close(self) -> None:
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        for block in (self._texts, self._vectors):
+            if block is not None:
+                block.close()
+                block.unlink()
+        self._texts = self._vectors = None
+        self._processes = []
@@ -0,0 +1,243 @@
+# app/ingestion/incremental.py
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Integer, String, bindparam, column, delete, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.ingestion.chunker import make_chunks_for_ticket
+from app.ingestion.loader import iter_row_batches
+from app.models.chunk import ChunkORM
+from app.models.ticket import Ticket, TicketORM
+from app.rag.onnx_embedding import TORCH, embedding_variant
+from app.rag.projection import Projection
+
+settings = get_settings()
+
+
+# --------------------------------------------------------------------------------------
+# CONTENT HASHES
+# --------------------------------------------------------------------------------------
+
+def embedding_fingerprint() -> str:
+    """
+    Everything besides the text itself that changes the stored vectors.
+    Changing any of these invalidates every chunk hash.
+
+    ONNX / int8 vectors are close to, not equal to, the torch ones, so a
+    change of backend re-embeds everything. Torch keeps the fingerprint it
+    always had, so existing hashes stay valid.
+    """
+    fingerprint = f"{settings.embedding_model_name}|{settings.chunk_size}|{settings.chunk_overlap}"
+    variant = embedding_variant()
+    return fingerprint if variant == TORCH else f"{fingerprint}|{variant}"
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def ticket_content_hash(ticket: Ticket, fingerprint: str) -> str:
+    """Hash of every stored ticket field plus the embedding fingerprint."""
+    return _digest(ticket.model_dump_json(), fingerprint)
+
+
+def chunk_content_hash(text: str, fingerprint: str) -> str:
+    """Hash of exactly what determines a chunk's embedding."""
+    return _digest(text, fingerprint)
+
+
+# --------------------------------------------------------------------------------------
+# PLANNING (read side, runs before embedding)
+# --------------------------------------------------------------------------------------
+
+@dataclass
+class BatchPlan:
+    """
+    What a batch of tickets actually requires after diffing against the DB.
+
+    - changed_tickets: new tickets or tickets whose content hash differs
+    - to_embed:        chunk payloads that are new or whose text changed
+    - reused:          chunk payloads whose embedding is still valid
+                       (only metadata is refreshed)
+    - chunk_counts:    ticket_id -> new number of chunks, used to drop
+                       stale trailing chunks of tickets that shrank
+    - product_tags:    old and new product tags of changed tickets
+    """
+    seen_tickets: int = 0
+    changed_tickets: List[Ticket] = field(default_factory=list)
+    ticket_hashes: Dict[str, str] = field(default_factory=dict)
+    to_embed: List[Dict[str, Any]] = field(default_factory=list)
+    reused: List[Dict[str, Any]] = field(default_factory=list)
+    chunk_counts: Dict[str, int] = field(default_factory=dict)
+    product_tags: Set[str] = field(default_factory=set)
+
+
+def plan_batch(db: Session, tickets: Sequence[Ticket]) -> BatchPlan:
+    """
+    Compare a batch of tickets against stored content hashes.
+    Costs two indexed SELECTs per batch; unchanged tickets are dropped
+    before chunking, unchanged chunks before embedding.
+    """
+    fingerprint = embedding_fingerprint()
+    plan = BatchPlan(seen_tickets=len(tickets))
+
+    # Last occurrence wins, matching bulk_upsert_tickets()
+    by_id: Dict[str, Ticket] = {t.ticket_id: t for t in tickets}
+    hashes = {tid: ticket_content_hash(t, fingerprint) for tid, t in by_id.items()}
+
+    stored: Dict[str, Tuple[str, str]] = {
+        tid: (h, tag)
+        for tid, h, tag in db.execute(
+            select(TicketORM.ticket_id, TicketORM.content_hash, TicketORM.product_tag)
+            .where(TicketORM.ticket_id.in_(list(by_id)))
+        ).all()
+    }
+
+    changed_ids = [tid for tid, h in hashes.items() if stored.get(tid, (None,))[0] != h]
+    if not changed_ids:
+        return plan
+
+    existing_chunks: Dict[Tuple[str, int], str] = {
+        (tid, idx): h
+        for tid, idx, h in db.execute(
+            select(ChunkORM.ticket_id, ChunkORM.chunk_index, ChunkORM.content_hash)
+            .where(ChunkORM.ticket_id.in_(changed_ids))
+        ).all()
+    }
+
+    for tid in changed_ids:
+        ticket = by_id[tid]
+        plan.changed_tickets.append(ticket)
+        plan.ticket_hashes[tid] = hashes[tid]
+        plan.product_tags.add(ticket.product_tag)
+        if tid in stored:
+            plan.product_tags.add(stored[tid][1])
+
+        chunks = make_chunks_for_ticket(ticket)
+        plan.chunk_counts[tid] = len(chunks)
+
+        for payload in chunks:
+            payload["content_hash"] = chunk_content_hash(payload["text"], fingerprint)
+            key = (tid, payload["chunk_index"])
+            if existing_chunks.get(key) == payload["content_hash"]:
+                plan.reused.append(payload)
+            else:
+                plan.to_embed.append(payload)
+
+    return plan
+
+
+# --------------------------------------------------------------------------------------
+# APPLY (write side, runs on the writer thread)
+# --------------------------------------------------------------------------------------
+
+def upsert_chunks(
+    db: Session,
+    chunks: Sequence[Dict[str, Any]],
+    embeddings: Sequence[Any],
+    batch_size: int | None = None,
+    projection: Optional[Projection] = None,
+) -> int:
+    """
+    INSERT ... ON CONFLICT (ticket_id, chunk_index) DO UPDATE for chunks
+    that were (re-)embedded. Row ids are stable across re-ingests.
+    With a coarse-retrieval projection the projected vector is written in
+    the same statement; otherwise it is left NULL until the end of the run.
+    """
+    if batch_size is None:
+        batch_size = settings.ingest_upsert_batch_size
+
+    coarse = [None] * len(chunks)
+    if projection is not None and len(chunks):
+        coarse = projection.project(embeddings)
+
+    rows = [
+        {
+            "ticket_id": payload["ticket_id"],
+            "product_tag": payload["product_tag"],
+            "chunk_index": payload["chunk_index"],
+            "text": payload["text"],
+            "embedding": emb_vector,
+            "meta": payload["metadata"],
+            "content_hash": payload["content_hash"],
+            "embedding_coarse": coarse_vector,
+            "projection_version": projection.version if projection is not None else None,
+        }
+        for payload, emb_vector, coarse_vector in zip(chunks, embeddings, coarse)
+    ]
+
+    for batch in iter_row_batches(rows, batch_size):
+        stmt = pg_insert(ChunkORM).values(list(batch))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChunkORM.ticket_id, ChunkORM.chunk_index],
+            set_={
+                "product_tag": stmt.excluded.product_tag,
+                "text": stmt.excluded.text,
+                "embedding": stmt.excluded.embedding,
+                "metadata": stmt.excluded.metadata,
+                "content_hash": stmt.excluded.content_hash,
+                "embedding_coarse": stmt.excluded.embedding_coarse,
+                "projection_version": stmt.excluded.projection_version,
+            },
+        )
+        db.execute(stmt)
+
+    return len(rows)
+
+
+def refresh_chunk_metadata(db: Session, chunks: Sequence[Dict[str, Any]]) -> int:
+    """Update product_tag/metadata of chunks whose embedding is reused."""
+    if not chunks:
+        return 0
+
+    table = ChunkORM.__table__
+    stmt = (
+        update(table)
+        .where(table.c.ticket_id == bindparam("b_ticket_id"))
+        .where(table.c.chunk_index == bindparam("b_chunk_index"))
+        .values(product_tag=bindparam("b_product_tag"), metadata=bindparam("b_metadata"))
+    )
+    db.execute(
+        stmt,
+        [
+            {
+                "b_ticket_id": c["ticket_id"],
+                "b_chunk_index": c["chunk_index"],
+                "b_product_tag": c["product_tag"],
+                "b_metadata": c["metadata"],
+            }
+            for c in chunks
+        ],
+    )
+    return len(chunks)
+
+
+def delete_stale_chunks(db: Session, chunk_counts: Dict[str, int]) -> int:
+    """
+    Garbage-collect trailing chunks of tickets that now produce fewer
+    chunks than before (chunk_index >= new count).
+    """
+    if not chunk_counts:
+        return 0
+
+    counts = values(
+        column("ticket_id", String),
+        column("n_chunks", Integer),
+        name="new_counts",
+    ).data(list(chunk_counts.items()))
+
+    result = db.execute(
+        delete(ChunkORM)
+        .where(ChunkORM.ticket_id == counts.c.ticket_id)
+        .where(ChunkORM.chunk_index >= counts.c.n_chunks)
+    )
+    return result.rowcount or 0
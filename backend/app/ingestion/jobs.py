@@ -0,0 +1,205 @@
+# app/ingestion/jobs.py
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+from app.config.settings import get_settings
+from app.ingestion.pipeline import IngestCancelled, IngestStats, ProgressFn
+from app.models.ingest_job import IngestJobStatus
+from app.observability.metrics import INGEST_JOBS, INGEST_JOBS_RUNNING
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# run(progress) -> chunks written, e.g. lambda progress: run_ingestion(progress=progress)
+IngestRun = Callable[[ProgressFn], int]
+
+
+class IngestInProgressError(RuntimeError):
+    """A job for the same source is already queued or running."""
+
+    def __init__(self, source: str, job_id: str):
+        super().__init__(f"Ingestion of '{source}' is already in progress (job {job_id})")
+        self.source = source
+        self.job_id = job_id
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class IngestJob:
+    """
+    One submitted ingestion run. Progress is copied from the pipeline's
+    IngestStats after every batch (update(), on the job's thread) and read
+    by the status endpoint.
+
+    Cancellation is cooperative: update() raises IngestCancelled at the
+    next batch boundary, so the batches already embedded are committed
+    and a later run over the same source picks up where this one stopped.
+    """
+
+    def __init__(self, source: str):
+        self.job_id = uuid.uuid4().hex
+        self.source = source
+        self.state = QUEUED
+        self.created_at = _now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.stats = IngestStats()
+        self.inserted_chunks: Optional[int] = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+        self._started = 0.0
+        self._elapsed: Optional[float] = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def request_cancel(self) -> None:
+        self._cancel.set()
+
+    def update(self, stats: IngestStats) -> None:
+        self.stats = stats
+        if self._cancel.is_set():
+            raise IngestCancelled()
+
+    def start(self) -> None:
+        self.state = RUNNING
+        self.started_at = _now()
+        self._started = time.monotonic()
+
+    def finish(self, state: str, inserted_chunks: Optional[int] = None, error: Optional[str] = None) -> None:
+        if self.started_at is not None:
+            self._elapsed = time.monotonic() - self._started
+        self.state = state
+        self.inserted_chunks = inserted_chunks
+        self.error = error
+        self.finished_at = _now()
+
+    def status(self) -> IngestJobStatus:
+        stats = self.stats
+        elapsed = self._elapsed
+        if elapsed is None and self.state == RUNNING:
+            elapsed = time.monotonic() - self._started
+
+        rate = eta = None
+        if elapsed:
+            rate = stats.embedded_chunks / elapsed
+            if self.state == RUNNING and stats.total_tickets and stats.tickets:
+                eta = (stats.total_tickets - stats.tickets) * elapsed / stats.tickets
+
+        return IngestJobStatus(
+            job_id=self.job_id,
+            source=self.source,
+            state=self.state,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            tickets_total=stats.total_tickets,
+            tickets_processed=stats.tickets,
+            tickets_changed=stats.changed_tickets,
+            chunks_embedded=stats.embedded_chunks,
+            chunks_reused=stats.reused_chunks,
+            batches=stats.batches,
+            embeddings_per_second=round(rate, 2) if rate is not None else None,
+            eta_seconds=round(eta, 1) if eta is not None else None,
+            inserted_chunks=self.inserted_chunks,
+            error=self.error,
+        )
+
+
+class IngestJobManager:
+    """
+    Runs ingestion jobs on a dedicated pool of `max_workers` threads
+    (INGEST_JOB_CONCURRENCY); further jobs queue. At most one job per
+    source may be queued or running at a time. The last `history`
+    finished jobs stay queryable.
+    """
+
+    def __init__(self, max_workers: int, history: int):
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ingest-job")
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._active: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, source: str, run: IngestRun) -> IngestJob:
+        with self._lock:
+            if source in self._active:
+                raise IngestInProgressError(source, self._active[source])
+            job = IngestJob(source)
+            self._jobs[job.job_id] = job
+            self._active[source] = job.job_id
+            self._trim()
+        job.future = self._executor.submit(self._run, job, run)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """Cancel a queued job at once, a running one at its next batch; finished jobs are left as they are."""
+        job = self._jobs.get(job_id)
+        if job is None or job.state in FINISHED:
+            return job
+        job.request_cancel()
+        if job.future is not None and job.future.cancel():
+            # Never started: _run() will not run, so finish it here
+            self._finish(job, CANCELLED)
+        return job
+
+    def _run(self, job: IngestJob, run: IngestRun) -> None:
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+            return
+
+        job.start()
+        INGEST_JOBS_RUNNING.inc()
+        print(f"[INGEST] Job {job.job_id} started: {job.source}")
+        try:
+            inserted = run(job.update)
+        except IngestCancelled:
+            # Raised past a run that does not go through run_pipeline
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            logger.exception(f"Ingestion job {job.job_id} failed")
+            self._finish(job, FAILED, error=str(e))
+        else:
+            self._finish(job, CANCELLED if job.stats.cancelled else SUCCEEDED, inserted)
+        finally:
+            INGEST_JOBS_RUNNING.dec()
+
+    def _finish(self, job: IngestJob, state: str, inserted: Optional[int] = None, error: Optional[str] = None) -> None:
+        job.finish(state, inserted, error)
+        INGEST_JOBS.labels(state=state).inc()
+        with self._lock:
+            if self._active.get(job.source) == job.job_id:
+                del self._active[job.source]
+        print(f"[INGEST] Job {job.job_id} {state}: {job.source}")
+
+    def _trim(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINISHED]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+
+@lru_cache()
+def get_ingest_job_manager() -> IngestJobManager:
+    return IngestJobManager(settings.ingest_job_concurrency, settings.ingest_job_history)
@@ -1,9 +1,11 @@
 # app/ingestion/loader.py
 
+import codecs
 import json
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
 
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.config.settings import get_settings
@@ -12,9 +14,131 @@ from app.models.ticket import Ticket, TicketORM
 settings = get_settings()
 
 
+# Characters read from a ticket file per step of the streaming parser
+_READ_CHARS = 1 << 16
+
+# A single record larger than this is treated as malformed input rather
+# than buffered until the end of the stream
+_MAX_RECORD_CHARS = 64 << 20
+
+_WHITESPACE = " \t\n\r"
+
+
+# ---------------------------------------------------------------------
+# Streaming JSON / JSONL parsing
+# ---------------------------------------------------------------------
+
+def iter_text(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode UTF-8 byte chunks (split anywhere, optional BOM) into text chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_json_records(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    Yield JSON values one at a time from text arriving in chunks.
+
+    Accepts either a single top-level array (its elements are yielded) or
+    a sequence of values separated by whitespace, i.e. JSONL / NDJSON.
+    Commas between array elements are skipped rather than checked.
+    Only the record being parsed and the unread rest of the current chunk
+    are held in memory, never the whole document.
+    """
+    decoder = json.JSONDecoder()
+    source = iter(chunks)
+    buf, pos = "", 0
+    array: Optional[bool] = None  # decided by the first non-blank character
+    closed = False
+
+    def more(at_least: int = 1) -> bool:
+        """Append at least `at_least` more characters (fewer at the end); False if none are left."""
+        nonlocal buf, pos
+        pieces, pending, added = [buf[pos:]], len(buf) - pos, 0
+        while added < at_least:
+            chunk = next(source, None)
+            if chunk is None:
+                break
+            pieces.append(chunk)
+            added += len(chunk)
+            if pending + added > _MAX_RECORD_CHARS:
+                raise ValueError(f"JSON record larger than {_MAX_RECORD_CHARS} characters")
+        if not added:
+            return False
+        buf, pos = "".join(pieces), 0
+        return True
+
+    while True:
+        while pos < len(buf) and (buf[pos] in _WHITESPACE or (array and buf[pos] == ",")):
+            pos += 1
+        if pos == len(buf):
+            if more():
+                continue
+            break
+
+        if closed:
+            raise ValueError(f"Unexpected data after the top-level JSON array: {buf[pos:pos + 20]!r}")
+        if array is None:
+            array = buf[pos] == "["
+            pos += array
+            continue
+        if array and buf[pos] == "]":
+            closed = True
+            pos += 1
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            # Most likely a record cut by the chunk boundary. Read until the
+            # pending text has at least doubled before parsing it again, so
+            # a record spanning many chunks is re-scanned only log(n) times
+            if more(len(buf) - pos):
+                continue
+            raise ValueError(f"Invalid JSON record: {e}") from None
+        if end == len(buf) and not isinstance(value, (dict, list, str)) and more():
+            # A number or literal ending at the chunk boundary may continue
+            continue
+
+        yield value
+        pos = end
+
+    if array and not closed:
+        raise ValueError("Unterminated top-level JSON array")
+
+
+# ---------------------------------------------------------------------
+# Ticket files
+# ---------------------------------------------------------------------
+
+def iter_tickets_from_file(path: str | Path | None = None) -> Iterator[Ticket]:
+    """
+    Stream tickets from a JSON array or JSONL file and yield them as
+    validated Pydantic Ticket models, one at a time.
+
+    Memory does not grow with the file size, so the ingestion pipeline
+    can start chunking before the file has been read.
+    """
+    if path is None:
+        path = settings.data_path
+
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Ticket data file not found: {path}")
+
+    with path.open("r", encoding="utf-8-sig") as f:
+        for item in iter_json_records(iter(lambda: f.read(_READ_CHARS), "")):
+            yield Ticket(**item)
+
+
 def load_tickets_from_file(path: str | Path | None = None) -> List[Ticket]:
     """
-    Load mock tickets from a JSON file and return them as Pydantic Ticket models.
+    Load mock tickets from a JSON (or JSONL) file and return them as Pydantic Ticket models.
 
     Expected JSON format:
     [
@@ -31,27 +155,18 @@ def load_tickets_from_file(path: str | Path | None = None) -> List[Ticket]:
       },
       ...
     ]
+    or one such object per line (JSONL). Prefer iter_tickets_from_file()
+    for anything that does not need the whole list at once.
     """
-    if path is None:
-        path = settings.data_path
-
-    path = Path(path)
-    if not path.exists():
-        raise FileNotFoundError(f"Ticket data file not found: {path}")
-
-    with path.open("r", encoding="utf-8") as f:
-        raw = json.load(f)
-
-    tickets: List[Ticket] = []
-    for item in raw:
-        tickets.append(Ticket(**item))
-
-    return tickets
+    return list(iter_tickets_from_file(path))
 
 
 def upsert_tickets(db: Session, tickets: List[Ticket]) -> None:
     """
     Insert or update Ticket rows in the 'tickets' table.
+
+    Row-by-row SELECT-then-UPDATE (one round-trip per ticket). Kept as the
+    reference path for small loads; ingestion uses bulk_upsert_tickets().
     """
     for t in tickets:
         # Check if ticket already exists
@@ -81,3 +196,74 @@ def upsert_tickets(db: Session, tickets: List[Ticket]) -> None:
                 )
             )
     db.commit()
+
+
+# ---------------------------------------------------------------------
+# Set-based bulk upsert
+# ---------------------------------------------------------------------
+
+_TICKET_COLUMNS = (
+    "product_tag",
+    "customer_id",
+    "customer_segment",
+    "created_at",
+    "resolved_at",
+    "resolution_summary",
+    "tags",
+    "language",
+)
+
+
+def iter_row_batches(
+    rows: Sequence[Dict[str, Any]],
+    batch_size: int,
+) -> Iterator[Sequence[Dict[str, Any]]]:
+    """Split rows into statement-sized slices."""
+    batch_size = max(1, batch_size)
+    for start in range(0, len(rows), batch_size):
+        yield rows[start : start + batch_size]
+
+
+def bulk_upsert_tickets(
+    db: Session,
+    tickets: Sequence[Ticket],
+    batch_size: int | None = None,
+    content_hashes: Mapping[str, str] | None = None,
+) -> int:
+    """
+    Insert or update tickets with one
+        INSERT ... VALUES (...), (...) ON CONFLICT (ticket_id) DO UPDATE
+    statement per `batch_size` rows instead of one SELECT per ticket.
+
+    Does NOT commit — the caller owns the transaction so tickets and their
+    chunks land atomically. Returns the number of distinct tickets written.
+
+    content_hashes (ticket_id -> hash) is stored alongside each ticket by
+    incremental ingestion so unchanged tickets can be skipped next time.
+    """
+    if batch_size is None:
+        batch_size = settings.ingest_upsert_batch_size
+
+    columns = _TICKET_COLUMNS + (("content_hash",) if content_hashes is not None else ())
+
+    # ON CONFLICT cannot touch the same row twice in one statement:
+    # keep the last occurrence of each ticket_id.
+    rows_by_id: Dict[str, Dict[str, Any]] = {}
+    for t in tickets:
+        rows_by_id[t.ticket_id] = {
+            "ticket_id": t.ticket_id,
+            **{col: getattr(t, col) for col in _TICKET_COLUMNS},
+        }
+        if content_hashes is not None:
+            rows_by_id[t.ticket_id]["content_hash"] = content_hashes.get(t.ticket_id)
+    rows = list(rows_by_id.values())
+
+    for batch in iter_row_batches(rows, batch_size):
+        stmt = pg_insert(TicketORM).values(list(batch))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TicketORM.ticket_id],
+            set_={col: stmt.excluded[col] for col in columns},
+        )
+        db.execute(stmt)
+
+    return len(rows)
@@ -0,0 +1,262 @@
+# app/ingestion/pipeline.py
+
+import threading
+import queue
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.ingestion.incremental import (
+    BatchPlan,
+    delete_stale_chunks,
+    plan_batch,
+    refresh_chunk_metadata,
+    upsert_chunks,
+)
+from app.ingestion.loader import bulk_upsert_tickets
+from app.models.ticket import Ticket
+from app.rag.projection import Projection
+from app.rag.vector_backends import get_vector_backend
+
+EmbedFn = Callable[[Sequence[str]], Sequence[Any]]
+
+
+class IngestCancelled(Exception):
+    """Raised from a progress hook to stop a run after the current batch."""
+
+
+@dataclass
+class IngestStats:
+    tickets: int = 0
+    changed_tickets: int = 0
+    chunks: int = 0
+    reused_chunks: int = 0
+    deleted_chunks: int = 0
+    batches: int = 0
+    # Chunks embedded so far (`chunks` counts them once written)
+    embedded_chunks: int = 0
+    # Tickets in the source, when known up front (progress / ETA)
+    total_tickets: Optional[int] = None
+    # The progress hook stopped the run before the source was exhausted
+    cancelled: bool = False
+    # Product tags whose chunks may have changed (for cache invalidation)
+    changed_product_tags: Set[str] = field(default_factory=set)
+
+
+ProgressFn = Callable[[IngestStats], None]
+
+
+# --------------------------------------------------------------------------------------
+# STAGE 1 — BATCHING (lazy)
+# --------------------------------------------------------------------------------------
+
+def iter_ticket_batches(
+    tickets: Iterable[Ticket],
+    batch_size: int,
+) -> Iterator[List[Ticket]]:
+    """Pull tickets lazily and yield lists of at most `batch_size` tickets."""
+    batch: List[Ticket] = []
+
+    for ticket in tickets:
+        batch.append(ticket)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+# --------------------------------------------------------------------------------------
+# STAGE 3 — DB WRITE
+# --------------------------------------------------------------------------------------
+
+def write_batch(
+    db: Session,
+    plan: BatchPlan,
+    embeddings: Sequence[Any],
+    projection: Optional[Projection] = None,
+) -> Tuple[int, int]:
+    """
+    Apply one planned batch in a single transaction:
+    tickets first, then re-embedded chunks, metadata of reused chunks,
+    and finally stale trailing chunks. Once committed, the same changes
+    are mirrored into the vector backend (no-op for pgvector).
+    Returns (chunks written, stale chunks deleted).
+    """
+    bulk_upsert_tickets(db, plan.changed_tickets, content_hashes=plan.ticket_hashes)
+    written = upsert_chunks(db, plan.to_embed, embeddings, projection=projection)
+    refresh_chunk_metadata(db, plan.reused)
+    deleted = delete_stale_chunks(db, plan.chunk_counts)
+    db.commit()
+
+    backend = get_vector_backend()
+    backend.upsert(plan.to_embed, embeddings)
+    backend.refresh(plan.reused)
+    backend.truncate(plan.chunk_counts)
+    return written, deleted
+
+
+class BatchWriter:
+    """
+    Background writer thread for the ingestion pipeline.
+
+    The caller embeds batch N while this thread writes batch N-1.
+    `max_in_flight` bounds how many embedded batches may exist without
+    having been committed yet, which caps pipeline memory regardless of
+    corpus size. The DB session is only ever touched by this thread.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db: Session, max_in_flight: int, projection: Optional[Projection] = None):
+        self.db = db
+        self.projection = projection
+        self.written = 0
+        self.deleted = 0
+
+        self._slots = threading.Semaphore(max(1, max_in_flight))
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(
+            target=self._run, name="ingest-writer", daemon=True
+        )
+
+    def __enter__(self) -> "BatchWriter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._queue.put(self._STOP)
+        self._thread.join()
+        if exc_type is None:
+            self._raise_if_failed()
+
+    def submit(self, plan: BatchPlan, embeddings: Sequence[Any]) -> None:
+        """Hand a batch to the writer; blocks while the in-flight window is full."""
+        self._raise_if_failed()
+        self._slots.acquire()
+        self._queue.put((plan, embeddings))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+
+            try:
+                # After a failure keep draining so submit() never deadlocks
+                if self._error is None:
+                    written, deleted = write_batch(self.db, *item, projection=self.projection)
+                    self.written += written
+                    self.deleted += deleted
+            except BaseException as e:
+                self.db.rollback()
+                self._error = e
+            finally:
+                self._slots.release()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Ingestion writer failed") from self._error
+
+
+# --------------------------------------------------------------------------------------
+# PIPELINE DRIVER
+# --------------------------------------------------------------------------------------
+
+def _report(progress: Optional[ProgressFn], stats: IngestStats) -> bool:
+    """Call the progress hook; False once it asks the run to stop."""
+    if progress is None:
+        return True
+    try:
+        progress(stats)
+    except IngestCancelled:
+        stats.cancelled = True
+        return False
+    return True
+
+
+def run_pipeline(
+    db: Session,
+    embedder: EmbedFn,
+    tickets: Iterable[Ticket],
+    batch_size: int,
+    max_in_flight: int,
+    projection: Optional[Projection] = None,
+    progress: Optional[ProgressFn] = None,
+    total_tickets: Optional[int] = None,
+    stats: Optional[IngestStats] = None,
+) -> IngestStats:
+    """
+    Stream tickets through plan -> embed -> write in fixed-size batches.
+
+    Each batch is first diffed against stored content hashes so only new or
+    changed chunks are embedded; re-running ingestion over unchanged data
+    embeds nothing and inserts nothing.
+
+    With max_in_flight > 0 the DB write of each batch runs on a background
+    thread, overlapping with planning/embedding of the next batch; planning
+    then uses its own read session so the writer's session stays
+    single-threaded. With max_in_flight == 0 every batch is written inline.
+
+    `projection` (coarse retrieval) projects new embeddings as they are
+    written, so only a refit has to touch existing rows.
+
+    `progress(stats)` is called after each batch is embedded; it may raise
+    IngestCancelled to end the run there (stats.cancelled). Batches
+    embedded up to that point are still written and committed.
+
+    `stats` is filled in as the run goes; pass one in to keep the counts
+    (and changed product tags) of the batches committed before a failure.
+    """
+    if stats is None:
+        stats = IngestStats()
+    if total_tickets is not None:
+        stats.total_tickets = total_tickets
+
+    def embed_batch(plan: BatchPlan) -> Sequence[Any]:
+        embeddings = embedder([c["text"] for c in plan.to_embed]) if plan.to_embed else []
+        if len(embeddings) != len(plan.to_embed):
+            raise ValueError(
+                f"Embedding mismatch: {len(embeddings)} embeddings vs "
+                f"{len(plan.to_embed)} chunks"
+            )
+        stats.tickets += plan.seen_tickets
+        stats.changed_tickets += len(plan.changed_tickets)
+        stats.reused_chunks += len(plan.reused)
+        stats.changed_product_tags |= plan.product_tags
+        stats.embedded_chunks += len(embeddings)
+        stats.batches += 1
+        return embeddings
+
+    batches = iter_ticket_batches(tickets, batch_size)
+
+    if max_in_flight <= 0:
+        for batch in batches:
+            plan = plan_batch(db, batch)
+            written, deleted = write_batch(db, plan, embed_batch(plan), projection)
+            stats.chunks += written
+            stats.deleted_chunks += deleted
+            if not _report(progress, stats):
+                break
+        return stats
+
+    read_db = Session(bind=db.get_bind())
+    writer = BatchWriter(db, max_in_flight, projection)
+    try:
+        with writer:
+            for batch in batches:
+                plan = plan_batch(read_db, batch)
+                # End the read transaction so the next batch sees fresh commits
+                read_db.rollback()
+                writer.submit(plan, embed_batch(plan))
+                if not _report(progress, stats):
+                    break
+    finally:
+        read_db.close()
+        stats.chunks = writer.written
+        stats.deleted_chunks = writer.deleted
+
+    return stats
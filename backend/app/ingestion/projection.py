@@ -0,0 +1,105 @@
+# app/ingestion/projection.py
+
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.models.chunk import ChunkORM
+from app.models.projection import VectorProjectionORM
+from app.rag.projection import (
+    LATEST_PROJECTION_STMT,
+    Projection,
+    fit_projection,
+    needs_refit,
+    projection_from_row,
+)
+from app.rag.vector_backends.coarse import drop_coarse_index
+
+settings = get_settings()
+
+
+def coarse_projection_enabled() -> bool:
+    return settings.coarse_projection.lower() != "none"
+
+
+def load_projection(db: Session) -> Optional[Projection]:
+    """Current (latest) projection, used to project chunks as they are written."""
+    if not coarse_projection_enabled():
+        return None
+    return projection_from_row(db.execute(LATEST_PROJECTION_STMT).scalar_one_or_none())
+
+
+def _sample_embeddings(db: Session, n: int) -> np.ndarray:
+    rows = db.execute(select(ChunkORM.embedding).order_by(func.random()).limit(n)).scalars().all()
+    return np.stack(rows)
+
+
+def reproject_stale(db: Session, projection: Projection, batch_size: int = 2000) -> int:
+    """
+    Write coarse vectors for every chunk not projected with `projection`
+    (new rows from before the first fit, or all rows after a refit).
+    Runs in the caller's transaction.
+    """
+    table = ChunkORM.__table__
+    stale = or_(table.c.projection_version.is_(None), table.c.projection_version != projection.version)
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(embedding_coarse=bindparam("b_coarse"), projection_version=projection.version)
+    )
+
+    total = 0
+    while True:
+        rows = db.execute(select(table.c.id, table.c.embedding).where(stale).limit(batch_size)).all()
+        if not rows:
+            return total
+        coarse = projection.project(np.stack([r.embedding for r in rows]))
+        db.execute(stmt, [{"b_id": r.id, "b_coarse": vec} for r, vec in zip(rows, coarse)])
+        total += len(rows)
+
+
+def update_projection(db: Session) -> Optional[Projection]:
+    """
+    End-of-run projection maintenance, in one transaction:
+      1) fit a new version if there is none yet, COARSE_PROJECTION/COARSE_DIM
+         changed, or (PCA) the corpus has doubled since the last fit
+      2) re-project every chunk whose coarse vector is missing or stale
+    Readers keep using the previous version and vectors until commit.
+    Returns the current projection.
+    """
+    if not coarse_projection_enabled():
+        return None
+
+    method = settings.coarse_projection.lower()
+    current = projection_from_row(db.execute(LATEST_PROJECTION_STMT).scalar_one_or_none())
+    total = db.execute(select(func.count()).select_from(ChunkORM)).scalar_one()
+
+    if needs_refit(current, method, settings.coarse_dim, total):
+        sample = _sample_embeddings(db, settings.coarse_sample_rows)
+        fitted = fit_projection(method, sample, settings.coarse_dim, fitted_rows=total)
+        if current is not None and current.dim != fitted.dim:
+            drop_coarse_index(db, current.dim)
+
+        row = VectorProjectionORM(
+            method=fitted.method,
+            dim=fitted.dim,
+            params=fitted.params_bytes(),
+            fitted_rows=fitted.fitted_rows,
+        )
+        db.add(row)
+        db.flush()
+        current = projection_from_row(row)
+        print(
+            f"[INGEST] Fitted {method} projection v{current.version}: "
+            f"{current.source_dim} -> {current.dim} dims from {len(sample)} of {total} chunks."
+        )
+
+    if current is not None:
+        reprojected = reproject_stale(db, current)
+        if reprojected:
+            print(f"[INGEST] Projected {reprojected} chunks with projection v{current.version}.")
+    db.commit()
+    return current
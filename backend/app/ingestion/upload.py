@@ -0,0 +1,149 @@
+# app/ingestion/upload.py
+
+import asyncio
+import queue
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.ingestion.jobs import FINISHED, IngestJob
+from app.ingestion.loader import iter_json_records, iter_text
+
+# Seconds between checks of the other side while the queue is full / empty
+_POLL_SECONDS = 1.0
+
+
+class UploadAborted(RuntimeError):
+    """The upload ended before its body was complete (client gone, bad multipart)."""
+
+
+# --------------------------------------------------------------------------------------
+# REQUEST BODY -> INGESTION JOB
+# --------------------------------------------------------------------------------------
+
+class UploadFeed:
+    """
+    Hands an upload body from the request handler to the ingestion job
+    thread through a queue of at most `max_chunks` body chunks.
+
+    pump() runs on the event loop and waits whenever the queue is full,
+    so the client is only read as fast as the pipeline ingests;
+    records() is the job's side and parses the chunks as they come in.
+    Memory stays at the queue plus the pipeline's in-flight batches,
+    whatever the size of the upload.
+    """
+
+    def __init__(self, max_chunks: int):
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max(1, max_chunks))
+        self._error: Optional[BaseException] = None
+
+    def records(self) -> Iterator[Any]:
+        return iter_json_records(iter_text(self._chunks()))
+
+    def _chunks(self) -> Iterator[bytes]:
+        while True:
+            try:
+                chunk = self._queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                chunk = b""
+            if self._error is not None:
+                raise UploadAborted(f"Upload aborted: {self._error!r}")
+            if chunk is None:
+                return
+            if chunk:
+                yield chunk
+
+    async def pump(self, body: AsyncIterator[bytes], job: IngestJob) -> bool:
+        """
+        Feed `body` to the job. True once the whole body is queued; False
+        if the job finished first (failed or cancelled) and stopped reading.
+        """
+        try:
+            async for chunk in body:
+                if chunk and not await self._put(chunk, job):
+                    return False
+        except BaseException as e:
+            self._error = e
+            raise
+        return await self._put(None, job)
+
+    async def _put(self, item: Optional[bytes], job: IngestJob) -> bool:
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        while job.state not in FINISHED:
+            try:
+                await asyncio.to_thread(self._queue.put, item, True, _POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+# --------------------------------------------------------------------------------------
+# MULTIPART
+# --------------------------------------------------------------------------------------
+
+async def multipart_file_chunks(body: AsyncIterator[bytes], content_type: str) -> AsyncIterator[bytes]:
+    """
+    Yield the content of the first file part of a multipart/form-data
+    body as it is parsed, without spooling it to memory or disk the way
+    Request.form() does. Other parts are ignored.
+    """
+    _, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise ValueError("multipart/form-data body without a boundary")
+
+    pending: List[bytes] = []
+    part: Dict[str, Any] = {"headers": {}, "field": b"", "value": b"", "file": False, "done": False}
+
+    def on_part_begin() -> None:
+        part.update(headers={}, field=b"", value=b"", file=False)
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        part["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        part["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        part["headers"][part["field"].lower()] = part["value"]
+        part.update(field=b"", value=b"")
+
+    def on_headers_finished() -> None:
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["file"] = not part["done"] and b"filename" in disposition
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if part["file"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end() -> None:
+        if part["file"]:
+            part.update(file=False, done=True)
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+
+    async for chunk in body:
+        parser.write(chunk)
+        for piece in pending:
+            yield piece
+        pending.clear()
+    parser.finalize()
+
+    if not part["done"]:
+        raise ValueError("multipart/form-data body has no complete file part")
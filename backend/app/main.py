@@ -1,17 +1,24 @@
 # app/main.py
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 
 from app.config.settings import get_settings
 from app.config.connection import SessionLocal
 from app.observability.metrics import metrics_middleware
+from app.orc.scheduler import DeadlineExceeded
+from app.rag.llm_transport import CircuitOpenError, LLMUnavailableError
+from app.rag.vector_backends import uses_database
+from app.rag.warmup import get_warmup_state, start_warmup
 from app.observability.tracing import init_tracing
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
+    # Startup timing (rag_startup_seconds) counts from here
+    get_warmup_state()
 
     # Optional tracing
     if settings.enable_tracing:
@@ -45,9 +52,35 @@ def create_app() -> FastAPI:
         except Exception as e:
             print(" DATABASE CONNECTION FAILED")
             print(e)
-            raise e
+            if uses_database():
+                raise e
+            # Local vector index: queries can still be served without PostgreSQL
+            print(" Continuing with the in-process vector index (ingestion unavailable)")
     # ----------------------------------------------------
 
+    # ----------------------------------------------------
+    # STARTUP — WARM UP MODELS IN THE BACKGROUND
+    # ----------------------------------------------------
+    @app.on_event("startup")
+    async def startup_warmup():
+        # Embedder load + first inference + ORC pipeline compile; the server
+        # accepts connections meanwhile and /v1/ready reports 503 until done
+        app.state.warmup_task = start_warmup()
+
+    # ----------------------------------------------------
+    # LLM FAILURES → 503 (instead of an error string as the answer)
+    # ----------------------------------------------------
+    @app.exception_handler(LLMUnavailableError)
+    async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+        headers = {}
+        if isinstance(exc, CircuitOpenError):
+            headers["Retry-After"] = str(max(1, round(exc.retry_after)))
+        return JSONResponse(status_code=503, content={"detail": str(exc)}, headers=headers)
+
+    @app.exception_handler(DeadlineExceeded)
+    async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
     # Routers
     from app.api.v1.routes_query import router as query_router
     from app.api.v1.routes_health import router as health_router
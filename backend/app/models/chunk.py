@@ -5,16 +5,26 @@ from uuid import UUID
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 
-from sqlalchemy import Column, String, Integer, Text, TIMESTAMP
-from sqlalchemy.dialects.postgresql import JSONB, UUID as SA_UUID
+from sqlalchemy import Column, Computed, String, Integer, Text, TIMESTAMP, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID as SA_UUID
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
 
 from app.models.base import Base
+from app.models.vector_type import NumpyVector
+
+SEARCH_TSV_EXPR = (
+    "setweight(to_tsvector('simple', "
+    "coalesce(ticket_id, '') || ' ' || product_tag || ' ' || coalesce(metadata->>'tags', '')), 'A') "
+    "|| setweight(to_tsvector('english', text), 'B')"
+)
 
 
 class ChunkORM(Base):
     __tablename__ = "chunks"
+    __table_args__ = (
+        UniqueConstraint("ticket_id", "chunk_index", name="uq_chunks_ticket_chunk"),
+    )
 
     id = Column(SA_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     ticket_id = Column(String, nullable=False)
@@ -22,9 +32,16 @@ class ChunkORM(Base):
     chunk_index = Column(Integer, nullable=False)
     text = Column(Text, nullable=False)
 
-    embedding = Column(Vector(384))
+    embedding = Column(NumpyVector(384))
     meta = Column("metadata", JSONB)
+    # Hash of chunk text + chunking/embedding params; unchanged => reuse embedding
+    content_hash = Column(String, nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
+    # Generated by PostgreSQL (see db/init.sql); only used in WHERE/ORDER BY
+    search_tsv = deferred(Column(TSVECTOR, Computed(SEARCH_TSV_EXPR, persisted=True)))
+    # Low-dimensional projection for the coarse retrieval stage (app/rag/projection.py)
+    embedding_coarse = deferred(Column(NumpyVector()))
+    projection_version = deferred(Column(Integer, nullable=True))
 
 
 class Chunk(BaseModel):
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+
+# ======================================================
+# Ingestion job status (/v1/ingest/{job_id})
+# ======================================================
+
+class IngestJobStatus(BaseModel):
+    job_id: str
+    source: str
+    state: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    # Progress, updated after every batch
+    tickets_total: Optional[int] = None
+    tickets_processed: int = 0
+    tickets_changed: int = 0
+    chunks_embedded: int = 0
+    chunks_reused: int = 0
+    batches: int = 0
+    embeddings_per_second: Optional[float] = None
+    # Estimated seconds left; only while running with a known ticket total
+    eta_seconds: Optional[float] = None
+
+    # Chunks written, once succeeded (or cancelled)
+    inserted_chunks: Optional[int] = None
+    error: Optional[str] = None
@@ -0,0 +1,20 @@
+# app/models/projection.py
+
+from sqlalchemy import Column, Integer, LargeBinary, String, TIMESTAMP
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+
+class VectorProjectionORM(Base):
+    """One fitted coarse-retrieval projection; the highest version is current."""
+
+    __tablename__ = "vector_projections"
+
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    method = Column(String, nullable=False)
+    dim = Column(Integer, nullable=False)
+    # np.savez of mean + components (see app/rag/projection.py)
+    params = Column(LargeBinary, nullable=False)
+    fitted_rows = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
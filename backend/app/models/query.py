@@ -1,5 +1,5 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from typing import List, Optional, Dict, Any, Literal
+from pydantic import BaseModel, Field
 
 
 # ======================================================
@@ -9,6 +9,14 @@ from pydantic import BaseModel
 class QueryRequest(BaseModel):
     question: str
     max_context_chunks: int = 5
+    # Pipeline profile (see app/orc/profiles.py); None => ORC_PIPELINE_PROFILE
+    profile: Optional[Literal["fast", "full", "retrieval_only"]] = None
+
+
+class BatchQueryRequest(BaseModel):
+    # Upper bound enforced by the endpoint (QUERY_BATCH_MAX_QUESTIONS)
+    questions: List[str] = Field(..., min_length=1)
+    profile: Optional[Literal["fast", "full", "retrieval_only"]] = None
 
 
 # ======================================================
@@ -31,3 +39,10 @@ class QueryResponse(BaseModel):
     source_ticket_ids: List[str]
     used_chunks: List[UsedChunk]
     metadata: Dict[str, Any]
+
+
+class BatchQueryResult(BaseModel):
+    """One NDJSON line of /v1/query/batch; `index` is the question's position in the request."""
+    index: int
+    response: Optional[QueryResponse] = None
+    error: Optional[str] = None
@@ -34,6 +34,9 @@ class TicketORM(Base):
 
     language = Column(String, nullable=True, default="en")
 
+    # Hash of ticket content + chunking/embedding params (incremental ingestion)
+    content_hash = Column(String, nullable=True)
+
 
 # ======================================================
 # Pydantic Model (Pydantic v2)
@@ -0,0 +1,45 @@
+# app/models/vector_type.py
+
+import numpy as np
+from pgvector import Vector
+from pgvector.sqlalchemy import VECTOR
+
+# SQLAlchemy drivers for which config/connection.py registers pgvector's
+# psycopg 3 adapters (binary dumper for numpy.ndarray).
+BINARY_VECTOR_DRIVERS = ("psycopg", "psycopg_async")
+
+
+class NumpyVector(VECTOR):
+    """
+    pgvector column type that keeps vectors as float32 ndarrays end to end.
+
+    Bind: on psycopg 3 ndarrays are handed to the driver untouched and sent
+    in pgvector's binary wire format (one buffer, no per-float objects).
+    Other drivers fall back to pgvector's text literal.
+
+    Result: values come back as float32 ndarrays instead of lists.
+    """
+
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        to_text = super().bind_processor(dialect)
+        if dialect.driver not in BINARY_VECTOR_DRIVERS:
+            return to_text
+
+        def process(value):
+            if isinstance(value, np.ndarray):
+                return value
+            return to_text(value)
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or isinstance(value, np.ndarray):
+                return value
+            if isinstance(value, Vector):
+                return value.to_numpy()
+            return np.fromstring(value[1:-1], dtype=np.float32, sep=",")
+
+        return process
@@ -3,7 +3,7 @@
 import time
 from typing import Callable
 from fastapi import Request, Response
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
 
 # ---------------------------------------------------------
@@ -34,6 +34,162 @@ OPERATOR_ERRORS = Counter(
     ["operator"],
 )
 
+EMBEDDING_CACHE_REQUESTS = Counter(
+    "rag_embedding_cache_requests_total",
+    "Embedding cache lookups by tier and result (hit/miss).",
+    ["tier", "result"],
+)
+
+EMBEDDING_CACHE_BYTES = Gauge(
+    "rag_embedding_cache_memory_bytes",
+    "Bytes of vectors held by the in-process embedding cache.",
+)
+
+RETRIEVAL_PLANS = Counter(
+    "rag_retrieval_plans_total",
+    "pgvector retrieval plans chosen by strategy (exact/partial_index/hnsw).",
+    ["strategy"],
+)
+
+COARSE_RETRIEVAL = Counter(
+    "rag_coarse_retrieval_total",
+    "Two-stage searches re-ranked from projected candidates (reranked) or run single-stage (fallback).",
+    ["result"],
+)
+
+LEXICAL_FAST_PATH = Counter(
+    "rag_lexical_fast_path_total",
+    "Identifier-only questions served from the lexical index (hit) or falling back to hybrid (miss).",
+    ["result"],
+)
+
+ANSWER_CACHE_REQUESTS = Counter(
+    "rag_answer_cache_requests_total",
+    "Semantic answer cache lookups by result (hit/miss).",
+    ["result"],
+)
+
+ANSWER_CACHE_SAVED_SECONDS = Counter(
+    "rag_answer_cache_saved_seconds_total",
+    "Pipeline seconds avoided by answer cache hits (original latency minus lookup).",
+)
+
+ANSWER_CACHE_ENTRIES = Gauge(
+    "rag_answer_cache_entries",
+    "Responses held by the semantic answer cache.",
+)
+
+ANSWER_CACHE_INVALIDATIONS = Counter(
+    "rag_answer_cache_invalidated_total",
+    "Answer cache entries dropped because ingestion changed their product tags.",
+)
+
+STREAM_FIRST_TOKEN = Histogram(
+    "rag_stream_first_token_seconds",
+    "Time from a /v1/query/stream request to its first answer token.",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16),
+)
+
+STREAM_RETRIEVAL_EVENT = Histogram(
+    "rag_stream_retrieval_event_seconds",
+    "Time from a /v1/query/stream request to its retrieval event.",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2),
+)
+
+LLM_CALLS = Counter(
+    "rag_llm_calls_total",
+    "LLM calls by endpoint and outcome (success / error after retries / circuit_open).",
+    ["endpoint", "outcome"],
+)
+
+LLM_RETRIES = Counter(
+    "rag_llm_retries_total",
+    "LLM call attempts retried after a retryable failure.",
+    ["endpoint"],
+)
+
+LLM_IN_FLIGHT = Gauge(
+    "rag_llm_in_flight",
+    "LLM calls currently holding a concurrency slot.",
+    ["endpoint"],
+)
+
+LLM_WAITING = Gauge(
+    "rag_llm_waiting",
+    "LLM calls waiting for a concurrency slot.",
+    ["endpoint"],
+)
+
+LLM_CONCURRENCY_LIMIT = Gauge(
+    "rag_llm_concurrency_limit",
+    "Configured max in-flight LLM calls per endpoint (LLM_MAX_CONCURRENCY).",
+    ["endpoint"],
+)
+
+LLM_POOL_CONNECTIONS = Gauge(
+    "rag_llm_pool_max_connections",
+    "Keep-alive connection pool size per LLM endpoint (LLM_MAX_CONNECTIONS).",
+    ["endpoint"],
+)
+
+LLM_CIRCUIT_STATE = Gauge(
+    "rag_llm_circuit_state",
+    "LLM circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ["endpoint"],
+)
+
+LLM_DEDUP = Counter(
+    "rag_llm_prompt_requests_total",
+    "LLM prompts by how they were served: called (new LLM call), coalesced "
+    "(shared an identical in-flight call) or cached (prompt cache hit).",
+    ["result"],
+)
+
+LLM_PROMPT_CACHE_ENTRIES = Gauge(
+    "rag_llm_prompt_cache_entries",
+    "Completions held by the LLM prompt cache.",
+)
+
+CONTEXT_TOKENS = Histogram(
+    "rag_context_tokens",
+    "Tokens of packed LLM context per prompt.",
+    ["operator"],
+    buckets=(128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192),
+)
+
+CONTEXT_TOKENS_SAVED = Counter(
+    "rag_context_tokens_saved_total",
+    "Prompt tokens avoided by context packing (overlap removal + budget) vs. joining all chunks.",
+    ["operator"],
+)
+
+STARTUP_PHASE_SECONDS = Gauge(
+    "rag_startup_phase_seconds",
+    "Duration of each startup warmup phase (import, embedder_load, embedder_warmup, pipeline_compile, llm_probe).",
+    ["phase"],
+)
+
+STARTUP_SECONDS = Gauge(
+    "rag_startup_seconds",
+    "Seconds from app creation until warmup finished and /v1/ready turned true.",
+)
+
+STARTUP_READY = Gauge(
+    "rag_ready",
+    "1 once startup warmup has finished and the instance accepts traffic, else 0.",
+)
+
+INGEST_JOBS = Counter(
+    "rag_ingest_jobs_total",
+    "Finished ingestion jobs by final state (succeeded, failed, cancelled).",
+    ["state"],
+)
+
+INGEST_JOBS_RUNNING = Gauge(
+    "rag_ingest_jobs_running",
+    "Ingestion jobs currently running on the job pool.",
+)
+
 
 # ---------------------------------------------------------
 #   FastAPI Middleware
@@ -1,177 +1,516 @@
 # app/orc/controller.py
 
-from typing import List, Dict, Any
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional, Sequence, Tuple
 
-from app.orc.reasoning_buffer import ReasoningBuffer
-from app.orc.operator_registry import OperatorRegistry
-from app.models.query import QueryResponse
+from app.orc.pipeline import CompiledPipeline, RequestContext
+from app.orc.scheduler import StopPipeline
+from app.orc.profiles import PipelineProfile, get_profile
+from app.models.query import BatchQueryResult, QueryResponse
+from app.observability.metrics import OPERATOR_LATENCY, STREAM_FIRST_TOKEN, STREAM_RETRIEVAL_EVENT
+from app.rag.lexical import chunk_key, is_identifier_query
 from app.rag.retriever import chunks_to_used_chunks
 from app.config.settings import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+NO_ACCESS_ANSWER = "You do not have access to any products, so no tickets can be used to answer this question."
+NO_DATA_ANSWER = "I couldn't find any relevant resolved tickets to answer this question."
+NO_PERMISSION_ANSWER = "Relevant tickets exist but are not accessible under your current permissions."
 
 
 class ORCController:
     """
     ORC = Operator – Reasoning – Controller
 
-    Coordinates the ReAct-style flow:
-    - Retrieve chunks
-    - Apply RBAC filtering
-    - Rank chunks
-    - (Optionally) summarize
-    - Generate final answer
-    - Verify answer vs. retrieved evidence
-    """
-
-    def __init__(self, embedder, llm_client, db):
-        self.embedder = embedder
-        self.llm = llm_client
-        self.db = db
+    Coordinates the ReAct-style flow as an operator DAG:
 
-        self.buffer = ReasoningBuffer()
-        self.registry = OperatorRegistry()
+        retrieval → rbac_filter → ranking ─┬→ answer → verify
+                                           └→ summarization
 
-        # How many chunks we allow into final context
-        self.max_context_chunks = settings.orc_max_iterations
+    Operators run as soon as their dependencies are done, so the two LLM
+    calls (answer, summarization) overlap. A pipeline profile picks the
+    target operators; only those and their dependencies are run.
+    """
 
-        self._load_operators()
+    # State entries each operator consumes, in call order
+    OPERATOR_INPUTS = {
+        "retrieval": ("question", "allowed_tags", "ctx"),
+        "rbac_filter": ("retrieval", "allowed_tags"),
+        "ranking": ("rbac_filter",),
+        "summarization": ("question", "context_chunks"),
+        "answer": ("question", "context_chunks"),
+        "verify": ("answer", "top_chunks"),
+    }
 
-    # ------------------------------------------------------------------
-    # Operator registration
-    # ------------------------------------------------------------------
-    def _load_operators(self) -> None:
+    def __init__(self, compiled: CompiledPipeline, ctx: RequestContext):
         """
-        Register all operators once.
+        Cheap per-request wrapper: the operators, their plans and the
+        scheduler live in `compiled` (built once at startup); `ctx` holds
+        this request's sessions, reasoning buffer and deadline.
         """
-        from app.orc.operators.retrieval_operator import RetrievalOperator
-        from app.orc.operators.rbac_filter_operator import RBACFilterOperator
-        from app.orc.operators.ranking_operator import RankingOperator
-        from app.orc.operators.summarization_operator import SummarizationOperator
-        from app.orc.operators.verification_operator import VerificationOperator
-        from app.orc.operators.answer_operator import AnswerOperator
-
-        self.registry.register("retrieval", RetrievalOperator(self.embedder, self.db))
-        self.registry.register("rbac_filter", RBACFilterOperator())
-        self.registry.register("ranking", RankingOperator())
-        self.registry.register("summarization", SummarizationOperator(self.llm))
-        self.registry.register("answer", AnswerOperator(self.llm))
-        self.registry.register("verify", VerificationOperator())
+        self.compiled = compiled
+        self.ctx = ctx
+        self.registry = compiled.registry
+        self.scheduler = compiled.scheduler
+        self.embedder = compiled.embedder
+        # Optional SemanticAnswerCache consulted before running the pipeline
+        self.answer_cache = compiled.answer_cache
+        self.buffer = ctx.buffer
 
-    # ------------------------------------------------------------------
-    # Internal helper to run operators
-    # ------------------------------------------------------------------
-    def _run_operator(self, name: str, *args, **kwargs):
-        op = self.registry.get(name)
-        if op is None:
-            raise ValueError(f"Operator '{name}' is not registered")
-        return op(*args, **kwargs)
+        # How many chunks we allow into final context
+        self.max_context_chunks = compiled.max_context_chunks
 
     # ------------------------------------------------------------------
-    # Public entrypoint
+    # Internal helpers to run operators against the run state
     # ------------------------------------------------------------------
-    def run(self, question: str, rbac_ctx: Dict[str, Any]) -> QueryResponse:
+    def _operator(self, name: str):
+        return self.compiled.operator(name)
+
+    def _args(self, name: str, state: Dict[str, Any]) -> tuple:
+        return tuple(state[key] for key in self.OPERATOR_INPUTS[name])
+
+    def _on_done(self, name: str, result: Any, state: Dict[str, Any]) -> None:
         """
-        Full ReAct-style RAG flow for a single question.
+        Record an operator's result and reason about it.
+        Raises StopPipeline when the run can end early.
         """
+        state[name] = result
+        state["ran"].append(name)
 
-        allowed_tags: List[str] = rbac_ctx.get("allowed_product_tags", []) or []
+        if name == "retrieval":
+            state["retrieved_k"] = len(result)
+            # Retrieval order is relevance order; ranking reorders for display
+            state["relevance"] = {chunk_key(c): rank for rank, c in enumerate(result)}
+            self.buffer.add(f"Observation: retrieved {len(result)} chunks from vector store.")
+            if not result:
+                self.buffer.add("Thought: no chunks found; answer with 'no data' style response.")
+                raise StopPipeline(self._early_response(NO_DATA_ANSWER, 0, 0, state["ran"]))
 
-        # --- Step 0: RBAC sanity check --------------------------------
-        if not allowed_tags:
-            self.buffer.add("Thought: user has no allowed_product_tags; returning empty answer.")
-            return QueryResponse(
-                answer="You do not have access to any products, so no tickets can be used to answer this question.",
-                source_ticket_ids=[],
-                used_chunks=[],
-                metadata={
-                    "verified": True,
-                    "retrieved_k": 0,
-                    "filtered_k": 0,
-                    "operator_sequence": [],
-                },
-            )
+        elif name == "rbac_filter":
+            state["filtered_k"] = len(result)
+            self.buffer.add(f"Observation: {len(result)} chunks remain after RBAC filtering.")
+            if not result:
+                self.buffer.add("Thought: RBAC filtering removed all chunks; user lacks access to retrieved tickets.")
+                raise StopPipeline(
+                    self._early_response(
+                        NO_PERMISSION_ANSWER, state["retrieved_k"], 0, state["ran"]
+                    )
+                )
 
-        # --- Step 1: Retrieval ----------------------------------------
-        self.buffer.add("Thought: retrieve relevant chunks based on question and allowed product tags.")
-        retrieved = self._run_operator("retrieval", question, allowed_tags)
-        retrieved_count = len(retrieved)
-        self.buffer.add(f"Observation: retrieved {retrieved_count} chunks from vector store.")
-
-        if not retrieved:
-            self.buffer.add("Thought: no chunks found; answer with 'no data' style response.")
-            return QueryResponse(
-                answer="I couldn't find any relevant resolved tickets to answer this question.",
-                source_ticket_ids=[],
-                used_chunks=[],
-                metadata={
-                    "verified": True,
-                    "retrieved_k": 0,
-                    "filtered_k": 0,
-                    "operator_sequence": ["retrieval"],
-                },
-            )
+        elif name == "ranking":
+            self.buffer.add("Thought: ranked chunks by heuristic priority.")
+            state["top_chunks"] = self._top_chunks(result, state["relevance"])
+            # LLM context is packed most relevant first
+            state["context_chunks"] = sorted(state["top_chunks"], key=lambda c: state["relevance"][chunk_key(c)])
 
-        # --- Step 2: RBAC filter (defense-in-depth) -------------------
-        filtered = self._run_operator("rbac_filter", retrieved, allowed_tags)
-        filtered_count = len(filtered)
-        self.buffer.add(f"Observation: {filtered_count} chunks remain after RBAC filtering.")
-
-        if not filtered:
-            self.buffer.add("Thought: RBAC filtering removed all chunks; user lacks access to retrieved tickets.")
-            return QueryResponse(
-                answer="Relevant tickets exist but are not accessible under your current permissions.",
-                source_ticket_ids=[],
-                used_chunks=[],
-                metadata={
-                    "verified": True,
-                    "retrieved_k": retrieved_count,
-                    "filtered_k": 0,
-                    "operator_sequence": ["retrieval", "rbac_filter"],
-                },
-            )
+        elif name == "summarization":
+            self.buffer.add("Observation: generated internal summary of retrieved context.")
 
-        # --- Step 3: Ranking ------------------------------------------
-        ranked = self._run_operator("ranking", filtered)
-        self.buffer.add("Thought: ranked chunks by heuristic priority.")
+        elif name == "answer":
+            self.buffer.add("Thought: produced final answer using LLM based on top chunks.")
 
-        # Limit to configured max context size
-        top_n = min(self.max_context_chunks, len(ranked))
-        top_chunks = ranked[top_n * -1 :] if top_n > 0 else ranked  # or ranked[:top_n]
-        # using [:top_n] is also fine — choose whichever better fits your retrieval style
-        top_chunks = ranked[:top_n]
+        elif name == "verify":
+            self.buffer.add(f"Observation: verification result = {result}.")
 
-        # --- Step 4: Optional summarization ---------------------------
-        # We can generate a quick internal summary for debugging/analysis
-        # (not required for the final answer, but useful context).
-        summary = self._run_operator("summarization", question, top_chunks)
-        self.buffer.add("Observation: generated internal summary of retrieved context.")
-        # Not returned to user; used only as part of reasoning buffer if needed.
+    def _initial_state(self, question: str, rbac_ctx: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "question": question,
+            "allowed_tags": rbac_ctx.get("allowed_product_tags", []) or [],
+            "ctx": self.ctx,
+            "ran": [],
+        }
+
+    @staticmethod
+    def _resolve_profile(profile: Optional[str]) -> PipelineProfile:
+        return get_profile(profile or settings.orc_pipeline_profile)
 
-        # --- Step 5: Answer synthesis ---------------------------------
-        final_answer = self._run_operator("answer", question, top_chunks)
-        self.buffer.add("Thought: produced final answer using LLM based on top chunks.")
+    # ------------------------------------------------------------------
+    # Response builders shared by run() and arun()
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _early_response(
+        answer: str, retrieved_k: int, filtered_k: int, sequence: List[str]
+    ) -> QueryResponse:
+        return QueryResponse(
+            answer=answer,
+            source_ticket_ids=[],
+            used_chunks=[],
+            metadata={
+                "verified": True,
+                "retrieved_k": retrieved_k,
+                "filtered_k": filtered_k,
+                "operator_sequence": list(sequence),
+            },
+        )
 
-        # --- Step 6: Verification -------------------------------------
-        verified = self._run_operator("verify", final_answer, top_chunks)
-        self.buffer.add(f"Observation: verification result = {verified}.")
+    def _top_chunks(self, ranked, relevance):
+        # Limit to configured max context size: keep the most relevant
+        # chunks, in ranking order
+        keys = sorted((chunk_key(c) for c in ranked), key=relevance.__getitem__)
+        keep = set(keys[: self.max_context_chunks])
+        return [c for c in ranked if chunk_key(c) in keep]
 
-        # --- Build response -------------------------------------------
+    def _final_response(self, state: Dict[str, Any], profile: PipelineProfile) -> QueryResponse:
+        top_chunks = state["top_chunks"]
         used_chunks = chunks_to_used_chunks(top_chunks)
         source_ticket_ids = list({c.ticket_id for c in top_chunks})
 
         metadata = {
-            "verified": verified,
-            "retrieved_k": retrieved_count,
-            "filtered_k": filtered_count,
-            "operator_sequence": self.registry.names(),
+            # None when the profile did not run verification
+            "verified": state.get("verify"),
+            "retrieved_k": state["retrieved_k"],
+            "filtered_k": state["filtered_k"],
+            "profile": profile.name,
+            "operator_sequence": list(state["ran"]),
             # You *could* add a redacted reasoning trace here for internal logs only
             # "reasoning_trace": self.buffer.get_trace(),  # DON'T send this to end users in real prod
         }
 
+        if "summarization" in state:
+            metadata["summary"] = state["summarization"]
+
         return QueryResponse(
-            answer=final_answer,
+            answer=state.get("answer", ""),
             source_ticket_ids=source_ticket_ids,
             used_chunks=used_chunks,
             metadata=metadata,
         )
+
+    # ------------------------------------------------------------------
+    # Semantic answer cache
+    # ------------------------------------------------------------------
+    def _use_answer_cache(self, question: str) -> bool:
+        # "TCK-1042" and "TCK-1043" embed almost identically but must never
+        # share an answer; identifier lookups also skip the embedding entirely
+        return self.answer_cache is not None and not is_identifier_query(question)
+
+    def _cache_lookup(self, question_vec, state: Dict[str, Any], pipeline: PipelineProfile):
+        scope = self.answer_cache.scope(pipeline.name, state["allowed_tags"])
+        cached = self.answer_cache.lookup(question_vec, scope)
+        if cached is not None:
+            self.buffer.add("Observation: answered from semantic cache; pipeline skipped.")
+        return cached
+
+    def _cache_store(
+        self,
+        question_vec,
+        state: Dict[str, Any],
+        pipeline: PipelineProfile,
+        response: QueryResponse,
+        started: float,
+        generation: int,
+    ) -> None:
+        if question_vec is None:
+            return
+        scope = self.answer_cache.scope(pipeline.name, state["allowed_tags"])
+        self.answer_cache.store(
+            question_vec, scope, response, time.perf_counter() - started, generation
+        )
+
+    # ------------------------------------------------------------------
+    # Public entrypoints
+    # ------------------------------------------------------------------
+    def run(
+        self, question: str, rbac_ctx: Dict[str, Any], profile: Optional[str] = None
+    ) -> QueryResponse:
+        """
+        ReAct-style RAG flow for a single question. `profile` names a
+        pipeline profile (default: ORC_PIPELINE_PROFILE).
+        """
+        pipeline = self._resolve_profile(profile)
+        state = self._initial_state(question, rbac_ctx)
+
+        # --- RBAC sanity check ----------------------------------------
+        if not state["allowed_tags"]:
+            self.buffer.add("Thought: user has no allowed_product_tags; returning empty answer.")
+            return self._early_response(NO_ACCESS_ANSWER, 0, 0, [])
+
+        # --- Semantic answer cache ------------------------------------
+        started = time.perf_counter()
+        question_vec = None
+        if self._use_answer_cache(question):
+            question_vec = self.embedder.embed_array([question])[0]
+            cached = self._cache_lookup(question_vec, state, pipeline)
+            if cached is not None:
+                return cached
+        generation = self.answer_cache.generation if self.answer_cache is not None else 0
+
+        self.buffer.add("Thought: retrieve relevant chunks based on question and allowed product tags.")
+        try:
+            self.scheduler.run(
+                plan=self.compiled.plan(pipeline),
+                wait_for=pipeline.targets,
+                invoke=lambda name: self._operator(name)(*self._args(name, state)),
+                on_done=lambda name, result: self._on_done(name, result, state),
+                deadline=self.ctx.deadline,
+            )
+            response = self._final_response(state, pipeline)
+        except StopPipeline as stop:
+            response = stop.result
+
+        self._cache_store(question_vec, state, pipeline, response, started, generation)
+        return response
+
+    async def arun(
+        self, question: str, rbac_ctx: Dict[str, Any], profile: Optional[str] = None
+    ) -> QueryResponse:
+        """
+        Async counterpart of run(): same DAG, but retrieval uses the
+        AsyncSession and LLM calls are awaited instead of blocking a thread.
+        """
+        pipeline = self._resolve_profile(profile)
+        state = self._initial_state(question, rbac_ctx)
+
+        if not state["allowed_tags"]:
+            self.buffer.add("Thought: user has no allowed_product_tags; returning empty answer.")
+            return self._early_response(NO_ACCESS_ANSWER, 0, 0, [])
+
+        started = time.perf_counter()
+        question_vec = None
+        if self._use_answer_cache(question):
+            question_vec = (await asyncio.to_thread(self.embedder.embed_array, [question]))[0]
+            cached = self._cache_lookup(question_vec, state, pipeline)
+            if cached is not None:
+                return cached
+        generation = self.answer_cache.generation if self.answer_cache is not None else 0
+
+        self.buffer.add("Thought: retrieve relevant chunks based on question and allowed product tags.")
+        try:
+            await self.scheduler.arun(
+                plan=self.compiled.plan(pipeline),
+                wait_for=pipeline.targets,
+                invoke=lambda name: self._operator(name).acall(*self._args(name, state)),
+                on_done=lambda name, result: self._on_done(name, result, state),
+                deadline=self.ctx.deadline,
+            )
+            response = self._final_response(state, pipeline)
+        except StopPipeline as stop:
+            response = stop.result
+
+        self._cache_store(question_vec, state, pipeline, response, started, generation)
+        return response
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+    async def arun_batch(
+        self,
+        questions: Sequence[str],
+        rbac_ctx: Dict[str, Any],
+        profile: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[BatchQueryResult]:
+        """
+        Answer several questions asked under one RBAC context.
+
+        Retrieval runs once for the whole batch (one encode call, one
+        batched search) before this returns. The returned iterator then
+        runs the rest of the DAG per question, at most `concurrency`
+        (default QUERY_BATCH_CONCURRENCY) at a time, and yields each
+        result as soon as it is ready - completion order, not input order.
+        The iterator does no database work, so it can outlive the
+        request's sessions (e.g. in a StreamingResponse).
+        """
+        pipeline = self._resolve_profile(profile)
+        allowed_tags = self._initial_state("", rbac_ctx)["allowed_tags"]
+
+        if not allowed_tags:
+            self.buffer.add("Thought: user has no allowed_product_tags; returning empty answers.")
+            response = self._early_response(NO_ACCESS_ANSWER, 0, 0, [])
+            return self._aiter_results([BatchQueryResult(index=i, response=response) for i in range(len(questions))])
+
+        started = time.perf_counter()
+        generation = self.answer_cache.generation if self.answer_cache is not None else 0
+
+        self.buffer.add(f"Thought: retrieve chunks for {len(questions)} questions in one batch.")
+        vectors, hits = await self.scheduler.atimed(
+            "retrieval", lambda: self._operator("retrieval").abatch(questions, allowed_tags, self.ctx)
+        )
+
+        semaphore = asyncio.Semaphore(concurrency or settings.query_batch_concurrency)
+        runs = [
+            self._arun_retrieved(i, question, vectors[i], hits[i], rbac_ctx, pipeline, semaphore, started, generation)
+            for i, question in enumerate(questions)
+        ]
+        return self._as_completed(runs)
+
+    @staticmethod
+    async def _aiter_results(results: List[BatchQueryResult]) -> AsyncIterator[BatchQueryResult]:
+        for result in results:
+            yield result
+
+    @staticmethod
+    async def _as_completed(runs) -> AsyncIterator[BatchQueryResult]:
+        tasks = [asyncio.ensure_future(run) for run in runs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away mid-stream: stop the remaining pipelines
+            for task in tasks:
+                task.cancel()
+
+    async def _arun_retrieved(
+        self,
+        index: int,
+        question: str,
+        question_vec,
+        chunks,
+        rbac_ctx: Dict[str, Any],
+        pipeline: PipelineProfile,
+        semaphore: asyncio.Semaphore,
+        started: float,
+        generation: int,
+    ) -> BatchQueryResult:
+        """arun() for one batch member whose retrieval result is already known."""
+        state = self._initial_state(question, rbac_ctx)
+
+        use_cache = self._use_answer_cache(question)
+        if use_cache:
+            cached = self._cache_lookup(question_vec, state, pipeline)
+            if cached is not None:
+                return BatchQueryResult(index=index, response=cached)
+
+        try:
+            async with semaphore:
+                try:
+                    self._on_done("retrieval", chunks, state)
+                    await self.scheduler.arun(
+                        plan=self.compiled.plan(pipeline),
+                        wait_for=pipeline.targets,
+                        invoke=lambda name: self._operator(name).acall(*self._args(name, state)),
+                        on_done=lambda name, result: self._on_done(name, result, state),
+                        done=["retrieval"],
+                        deadline=self.ctx.deadline,
+                    )
+                    response = self._final_response(state, pipeline)
+                except StopPipeline as stop:
+                    response = stop.result
+        except Exception as e:
+            # One failed question must not abort the rest of the batch
+            logger.warning(f"Batch question {index} failed: {e}")
+            return BatchQueryResult(index=index, error=str(e))
+
+        self._cache_store(question_vec if use_cache else None, state, pipeline, response, started, generation)
+        return BatchQueryResult(index=index, response=response)
+
+    # ------------------------------------------------------------------
+    # Token streaming
+    # ------------------------------------------------------------------
+    async def astream(
+        self, question: str, rbac_ctx: Dict[str, Any], profile: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        arun() as a stream of (event, data) pairs:
+
+            retrieval  the chunks the answer is based on (once)
+            token      answer text deltas, as the LLM produces them
+            done       the final QueryResponse (verification, summary, ...)
+
+        Retrieval, RBAC filtering and ranking complete before this returns;
+        the iterator only talks to the LLM. Early exits (no access, no
+        data, answer cache hit) replay the response as the same events.
+        """
+        started = time.perf_counter()
+        pipeline = self._resolve_profile(profile)
+        state = self._initial_state(question, rbac_ctx)
+
+        if not state["allowed_tags"]:
+            self.buffer.add("Thought: user has no allowed_product_tags; returning empty answer.")
+            return self._replay(self._early_response(NO_ACCESS_ANSWER, 0, 0, []), started)
+
+        question_vec = None
+        if self._use_answer_cache(question):
+            question_vec = (await asyncio.to_thread(self.embedder.embed_array, [question]))[0]
+            cached = self._cache_lookup(question_vec, state, pipeline)
+            if cached is not None:
+                return self._replay(cached, started)
+        generation = self.answer_cache.generation if self.answer_cache is not None else 0
+
+        self.buffer.add("Thought: retrieve relevant chunks based on question and allowed product tags.")
+        try:
+            await self.scheduler.arun(
+                # retrieval → rbac_filter → ranking, whatever the profile
+                plan=self.compiled.plans["retrieval_only"],
+                wait_for=["ranking"],
+                invoke=lambda name: self._operator(name).acall(*self._args(name, state)),
+                on_done=lambda name, result: self._on_done(name, result, state),
+                deadline=self.ctx.deadline,
+            )
+        except StopPipeline as stop:
+            self._cache_store(question_vec, state, pipeline, stop.result, started, generation)
+            return self._replay(stop.result, started)
+
+        return self._astream_answer(state, pipeline, question_vec, started, generation)
+
+    @staticmethod
+    def _retrieval_event(response: QueryResponse, started: float) -> Tuple[str, Dict[str, Any]]:
+        STREAM_RETRIEVAL_EVENT.observe(time.perf_counter() - started)
+        return "retrieval", {
+            "source_ticket_ids": response.source_ticket_ids,
+            "used_chunks": [c.model_dump() for c in response.used_chunks],
+            "retrieved_k": response.metadata.get("retrieved_k", 0),
+            "filtered_k": response.metadata.get("filtered_k", 0),
+        }
+
+    async def _replay(self, response: QueryResponse, started: float) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        yield self._retrieval_event(response, started)
+        if response.answer:
+            STREAM_FIRST_TOKEN.observe(time.perf_counter() - started)
+            yield "token", {"text": response.answer}
+        yield "done", response.model_dump(mode="json")
+
+    async def _astream_answer(
+        self,
+        state: Dict[str, Any],
+        pipeline: PipelineProfile,
+        question_vec,
+        started: float,
+        generation: int,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        plan = self.compiled.plan(pipeline)
+        # Ranked chunks are final here; answer/summary/verify only add to the metadata
+        yield self._retrieval_event(self._final_response(state, pipeline), started)
+
+        summary = None
+        if "summarization" in plan:
+            summary = asyncio.ensure_future(self.scheduler.atimed(
+                "summarization",
+                lambda: self._operator("summarization").acall(*self._args("summarization", state)),
+            ))
+
+        try:
+            if "answer" in plan:
+                answer_started = time.perf_counter()
+                parts: List[str] = []
+                async for delta in self._operator("answer").astream(*self._args("answer", state)):
+                    if not parts:
+                        STREAM_FIRST_TOKEN.observe(time.perf_counter() - started)
+                    parts.append(delta)
+                    yield "token", {"text": delta}
+                OPERATOR_LATENCY.labels(operator="answer").observe(time.perf_counter() - answer_started)
+                self._on_done("answer", "".join(parts), state)
+
+            if summary is not None:
+                self._on_done("summarization", await summary, state)
+
+            # Whatever is left of the profile (verify) runs on the finished answer
+            await self.scheduler.arun(
+                plan=plan,
+                wait_for=pipeline.targets,
+                invoke=lambda name: self._operator(name).acall(*self._args(name, state)),
+                on_done=lambda name, result: self._on_done(name, result, state),
+                done=state["ran"],
+                deadline=self.ctx.deadline,
+            )
+        finally:
+            if summary is not None:
+                summary.cancel()
+
+        response = self._final_response(state, pipeline)
+        self._cache_store(question_vec, state, pipeline, response, started, generation)
+        yield "done", response.model_dump(mode="json")
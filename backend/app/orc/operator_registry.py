@@ -1,16 +1,62 @@
 # app/orc/operator_registry.py
 
+from typing import Iterable, List, Tuple
+
+
 class OperatorRegistry:
+    """
+    Named operators plus their dependency declarations.
+
+    Dependencies must already be registered, so registration order is
+    always a valid topological order and cycles cannot be expressed.
+    Once frozen (the compiled pipeline) no more operators can be added.
+    """
+
     def __init__(self):
         self._operators = {}
+        self._dependencies = {}
+        self._frozen = False
+
+    def freeze(self) -> None:
+        self._frozen = True
 
-    def register(self, name: str, operator):
+    def register(self, name: str, operator, depends_on: Iterable[str] = ()):
+        if self._frozen:
+            raise RuntimeError(f"Cannot register '{name}': operator registry is frozen")
         if name in self._operators:
             raise ValueError(f"Operator '{name}' already registered")
+
+        depends_on = tuple(depends_on)
+        unknown = [d for d in depends_on if d not in self._operators]
+        if unknown:
+            raise ValueError(f"Operator '{name}' depends on unregistered operators: {unknown}")
+
         self._operators[name] = operator
+        self._dependencies[name] = depends_on
 
     def get(self, name: str):
         return self._operators.get(name)
 
     def names(self):
         return list(self._operators.keys())
+
+    def dependencies(self, name: str) -> Tuple[str, ...]:
+        return self._dependencies.get(name, ())
+
+    def closure(self, targets: Iterable[str]) -> List[str]:
+        """
+        Targets plus everything they transitively depend on,
+        in topological (registration) order.
+        """
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            if name not in self._operators:
+                raise ValueError(f"Operator '{name}' is not registered")
+            needed.add(name)
+            stack.extend(self._dependencies[name])
+
+        return [n for n in self._operators if n in needed]
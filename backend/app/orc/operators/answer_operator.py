@@ -1,36 +1,44 @@
 # app/orc/operators/answer_operator.py
 
-from typing import List
+from typing import AsyncIterator, List
+from app.config.settings import get_settings
 from app.models.chunk import ChunkORM
+from app.rag.context_packer import pack_context
+
+settings = get_settings()
 
 
 class AnswerOperator:
     """
     Combines question + selected chunks and produces a final answer.
-    Designed to minimize LLM prompt size and maximize clarity.
+    Designed to minimize LLM prompt size and maximize clarity: chunks
+    (most relevant first) are packed into ANSWER_CONTEXT_TOKENS tokens.
     """
 
-    MAX_CONTEXT_CHARS = 8000  # prevents long-ticket overload
-
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, token_budget: int | None = None):
         self.llm = llm_client
+        self.token_budget = token_budget or settings.answer_context_tokens
 
-    def _build_context(self, chunks: List[ChunkORM]) -> str:
-        # Efficient join and truncation
-        context = "\n".join(c.text for c in chunks)
-        return context[: self.MAX_CONTEXT_CHARS]
-
-    def __call__(self, question: str, chunks: List[ChunkORM]) -> str:
-        context = self._build_context(chunks)
-        ticket_ids = {c.ticket_id for c in chunks}
+    def _build_prompt(self, question: str, chunks: List[ChunkORM]) -> str:
+        packed = pack_context(chunks, self.token_budget, getattr(self.llm, "model", ""), operator="answer")
+        ticket_ids = dict.fromkeys(c.ticket_id for c in packed.chunks)
 
         prompt = (
             "You are an expert support system assistant.\n\n"
             f"User question:\n{question}\n\n"
-            f"Relevant ticket excerpts:\n{context}\n\n"
+            f"Relevant ticket excerpts:\n{packed.text}\n\n"
             f"Tickets referenced: {', '.join(ticket_ids)}\n\n"
             "Provide a precise, accurate answer based ONLY on these tickets. "
             "Cite ticket IDs explicitly in your answer."
         )
+        return prompt
+
+    def __call__(self, question: str, chunks: List[ChunkORM]) -> str:
+        return self.llm.generate(self._build_prompt(question, chunks))
+
+    async def acall(self, question: str, chunks: List[ChunkORM]) -> str:
+        return await self.llm.agenerate(self._build_prompt(question, chunks))
 
-        return self.llm.generate(prompt)
+    def astream(self, question: str, chunks: List[ChunkORM]) -> AsyncIterator[str]:
+        """acall() as text deltas, for token streaming."""
+        return self.llm.astream(self._build_prompt(question, chunks))
@@ -24,3 +24,7 @@ class RankingOperator:
                 c.chunk_index,
             ),
         )
+
+    async def acall(self, chunks: List[ChunkORM]) -> List[ChunkORM]:
+        # CPU-only and fast: no need to leave the event loop
+        return self(chunks)
@@ -15,3 +15,6 @@ class RBACFilterOperator:
 
         allowed = set(allowed_tags)
         return [c for c in chunks if c.product_tag in allowed]
+
+    async def acall(self, chunks: List[ChunkORM], allowed_tags: list[str]) -> List[ChunkORM]:
+        return self(chunks, allowed_tags)
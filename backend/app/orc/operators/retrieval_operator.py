@@ -1,28 +1,56 @@
 # app/orc/operators/retrieval_operator.py
 
 import time
-from typing import List
-from sqlalchemy.orm import Session
+from typing import List, Sequence, Tuple
+
+import numpy as np
 
 from app.models.chunk import ChunkORM
-from app.rag.retriever import retrieve_relevant_chunks
+from app.orc.pipeline import RequestContext
+from app.rag.retriever import (
+    aretrieve_relevant_chunks,
+    aretrieve_relevant_chunks_batch,
+    retrieve_relevant_chunks,
+)
 
 
 class RetrievalOperator:
     """
-    Retrieves top-k pgvector chunks relevant to the question.
+    Retrieves top-k chunks relevant to the question from the configured
+    vector backend. Shared by all requests: the DB session comes from the
+    request's RequestContext (ctx.db sync, ctx.async_db async).
     """
 
-    def __init__(self, embedder, db: Session, k: int = 10):
+    def __init__(self, embedder, k: int = 10):
         self.embedder = embedder
-        self.db = db
         self.k = k
 
-    def __call__(self, question: str, allowed_tags: list[str]) -> List[ChunkORM]:
+    def __call__(self, question: str, allowed_tags: list[str], ctx: RequestContext) -> List[ChunkORM]:
         return retrieve_relevant_chunks(
             question=question,
             embedder=self.embedder,
-            db=self.db,
+            db=ctx.db,
+            allowed_product_tags=allowed_tags,
+            k=self.k,
+        )
+
+    async def acall(self, question: str, allowed_tags: list[str], ctx: RequestContext) -> List[ChunkORM]:
+        return await aretrieve_relevant_chunks(
+            question=question,
+            embedder=self.embedder,
+            db=ctx.async_db,
+            allowed_product_tags=allowed_tags,
+            k=self.k,
+        )
+
+    async def abatch(
+        self, questions: Sequence[str], allowed_tags: list[str], ctx: RequestContext
+    ) -> Tuple[np.ndarray, List[List[ChunkORM]]]:
+        """Retrieval for a batch of questions: (question vectors, chunks per question)."""
+        return await aretrieve_relevant_chunks_batch(
+            questions=questions,
+            embedder=self.embedder,
+            db=ctx.async_db,
             allowed_product_tags=allowed_tags,
             k=self.k,
         )
@@ -1,30 +1,39 @@
 # app/orc/operators/summarization_operator.py
 
 from typing import List
+from app.config.settings import get_settings
 from app.models.chunk import ChunkORM
+from app.rag.context_packer import pack_context
+
+settings = get_settings()
 
 
 class SummarizationOperator:
     """
-    Summarizes retrieved chunks into a compact digest.
+    Summarizes retrieved chunks into a compact digest, from at most
+    SUMMARY_CONTEXT_TOKENS tokens of packed context.
     """
 
-    MAX_CONTEXT_CHARS = 6000
-
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, token_budget: int | None = None):
         self.llm = llm_client
+        self.token_budget = token_budget or settings.summary_context_tokens
 
-    def __call__(self, question: str, chunks: List[ChunkORM]) -> str:
-        if not chunks:
-            return ""
-
-        context = "\n".join(c.text for c in chunks)
-        context = context[: self.MAX_CONTEXT_CHARS]
+    def _build_prompt(self, chunks: List[ChunkORM]) -> str:
+        packed = pack_context(chunks, self.token_budget, getattr(self.llm, "model", ""), operator="summarization")
 
         prompt = (
             "Summarize the following support ticket information into a concise "
             "technical digest that a support engineer can use:\n\n"
-            f"{context}"
+            f"{packed.text}"
         )
+        return prompt
 
-        return self.llm.generate(prompt)
+    def __call__(self, question: str, chunks: List[ChunkORM]) -> str:
+        if not chunks:
+            return ""
+        return self.llm.generate(self._build_prompt(chunks))
+
+    async def acall(self, question: str, chunks: List[ChunkORM]) -> str:
+        if not chunks:
+            return ""
+        return await self.llm.agenerate(self._build_prompt(chunks))
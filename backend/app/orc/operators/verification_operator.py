@@ -26,3 +26,6 @@ class VerificationOperator:
 
         # All cited IDs must be from allowed_ids
         return cited.issubset(allowed_ids)
+
+    async def acall(self, answer: str, chunks: List[ChunkORM]) -> bool:
+        return self(answer, chunks)
@@ -0,0 +1,132 @@
+# app/orc/pipeline.py
+
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+
+from app.config.settings import get_settings
+from app.orc.operator_registry import OperatorRegistry
+from app.orc.profiles import PROFILES, PipelineProfile
+from app.orc.reasoning_buffer import ReasoningBuffer
+from app.orc.scheduler import DAGScheduler
+
+settings = get_settings()
+
+
+# --------------------------------------------------------------------------------------
+# PER-REQUEST STATE
+# --------------------------------------------------------------------------------------
+
+@dataclass
+class RequestContext:
+    """
+    Everything that belongs to one request: its DB sessions (either may
+    be None; only the one the selected path uses connects), the reasoning
+    buffer, and an optional deadline on the time.monotonic() clock.
+    """
+
+    db: Any = None
+    async_db: Any = None
+    buffer: ReasoningBuffer = field(default_factory=ReasoningBuffer)
+    deadline: Optional[float] = None
+
+    @classmethod
+    def start(cls, db=None, async_db=None, timeout: Optional[float] = None) -> "RequestContext":
+        """Context whose deadline is `timeout` (default ORC_REQUEST_TIMEOUT_SECONDS, 0 = none) from now."""
+        if timeout is None:
+            timeout = settings.orc_request_timeout_seconds
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        return cls(db=db, async_db=async_db, deadline=deadline)
+
+
+# --------------------------------------------------------------------------------------
+# COMPILED PIPELINE
+# --------------------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class CompiledPipeline:
+    """
+    The operator DAG, built once per process and shared by all requests.
+
+    Operators hold only process-wide collaborators (embedder, LLM client);
+    the registry is frozen and the plan of every profile is resolved up
+    front, so serving a request allocates nothing here.
+    """
+
+    registry: OperatorRegistry
+    scheduler: DAGScheduler
+    # profile name -> operators to run (targets + dependencies, topological order)
+    plans: Mapping[str, Tuple[str, ...]]
+    embedder: Any
+    answer_cache: Any = None
+    max_context_chunks: int = 0
+
+    def operator(self, name: str):
+        op = self.registry.get(name)
+        if op is None:
+            raise ValueError(f"Operator '{name}' is not registered")
+        return op
+
+    def plan(self, profile: PipelineProfile) -> Tuple[str, ...]:
+        plan = self.plans.get(profile.name)
+        if plan is None:
+            plan = tuple(self.registry.closure(profile.targets))
+        return plan
+
+
+def compile_pipeline(embedder, llm_client, answer_cache=None, retrieval_k: int = 10) -> CompiledPipeline:
+    """
+    Register all operators with their dependencies and resolve every
+    profile's plan. `answer_cache` is the optional SemanticAnswerCache
+    consulted before a run.
+    """
+    from app.orc.operators.retrieval_operator import RetrievalOperator
+    from app.orc.operators.rbac_filter_operator import RBACFilterOperator
+    from app.orc.operators.ranking_operator import RankingOperator
+    from app.orc.operators.summarization_operator import SummarizationOperator
+    from app.orc.operators.verification_operator import VerificationOperator
+    from app.orc.operators.answer_operator import AnswerOperator
+
+    registry = OperatorRegistry()
+    registry.register("retrieval", RetrievalOperator(embedder, k=retrieval_k))
+    registry.register("rbac_filter", RBACFilterOperator(), depends_on=["retrieval"])
+    registry.register("ranking", RankingOperator(), depends_on=["rbac_filter"])
+    registry.register("summarization", SummarizationOperator(llm_client), depends_on=["ranking"])
+    registry.register("answer", AnswerOperator(llm_client), depends_on=["ranking"])
+    registry.register("verify", VerificationOperator(), depends_on=["answer"])
+    registry.freeze()
+
+    plans = {name: tuple(registry.closure(p.targets)) for name, p in PROFILES.items()}
+    return CompiledPipeline(
+        registry=registry,
+        scheduler=DAGScheduler(registry),
+        plans=MappingProxyType(plans),
+        embedder=embedder,
+        answer_cache=answer_cache,
+        max_context_chunks=settings.orc_max_iterations,
+    )
+
+
+_pipeline: Optional[CompiledPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_orc_pipeline() -> CompiledPipeline:
+    """
+    Process-wide pipeline over the global embedder, LLM client and answer
+    cache. Compiled at startup (see app.main); the first call loads the
+    embedding model. Concurrent first callers (warmup and an early
+    request) share one compile.
+    """
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                from app.rag.answer_cache import get_answer_cache
+                from app.rag.embedder import get_embedder
+                from app.rag.llm_client import get_llm_client
+
+                _pipeline = compile_pipeline(get_embedder(), get_llm_client(), get_answer_cache())
+    return _pipeline
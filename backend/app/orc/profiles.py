@@ -0,0 +1,45 @@
+# app/orc/profiles.py
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+
+@dataclass(frozen=True)
+class PipelineProfile:
+    """
+    A named set of target operators. The controller runs the targets plus
+    everything they depend on, and nothing else.
+    """
+
+    name: str
+    targets: Tuple[str, ...]
+    description: str = ""
+
+
+PROFILES: Dict[str, PipelineProfile] = {
+    p.name: p
+    for p in (
+        PipelineProfile(
+            name="retrieval_only",
+            targets=("ranking",),
+            description="Retrieve, RBAC-filter and rank chunks; no LLM call.",
+        ),
+        PipelineProfile(
+            name="fast",
+            targets=("answer", "verify"),
+            description="Answer + citation check; skips the summarization LLM call.",
+        ),
+        PipelineProfile(
+            name="full",
+            targets=("answer", "verify", "summarization"),
+            description="Everything, including a context summary in metadata.summary.",
+        ),
+    )
+}
+
+
+def get_profile(name: str) -> PipelineProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown pipeline profile '{name}'. Available: {sorted(PROFILES)}")
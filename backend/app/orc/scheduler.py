@@ -0,0 +1,218 @@
+# app/orc/scheduler.py
+
+import asyncio
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from app.config.settings import get_settings
+from app.observability.metrics import OPERATOR_ERRORS, OPERATOR_LATENCY
+from app.orc.operator_registry import OperatorRegistry
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class StopPipeline(Exception):
+    """
+    Raised from an on_done hook to end the run early with a final result
+    (e.g. retrieval found nothing). Operators still running are abandoned.
+    """
+
+    def __init__(self, result: Any):
+        super().__init__("pipeline stopped early")
+        self.result = result
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before the operators it waits for finished."""
+
+    def __init__(self, waiting_on: Iterable[str]):
+        super().__init__(f"Request deadline exceeded; still waiting on {sorted(waiting_on)}")
+
+
+def _remaining(deadline: Optional[float], waiting_on: Set[str]) -> Optional[float]:
+    """Seconds left until `deadline` (time.monotonic()), None without one."""
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded(waiting_on)
+    return remaining
+
+
+@lru_cache()
+def get_operator_executor() -> ThreadPoolExecutor:
+    """Process-wide pool shared by all sync DAG runs."""
+    return ThreadPoolExecutor(
+        max_workers=settings.orc_operator_threads,
+        thread_name_prefix="orc-op",
+    )
+
+
+class DAGScheduler:
+    """
+    Executes a plan of registered operators as a dependency DAG.
+
+    An operator starts as soon as all of its declared dependencies have
+    finished, so independent operators (e.g. summarization and answer,
+    which both only need the ranked chunks) run concurrently.
+
+    The run returns once every operator in `wait_for` has finished.
+    Other operators in the plan that are already running are left to
+    complete in the background; their results still reach on_done.
+
+    With a `deadline` (time.monotonic() value) the run raises
+    DeadlineExceeded once it passes; async operators still running are
+    cancelled, threads cannot be and finish unobserved.
+    """
+
+    def __init__(self, registry: OperatorRegistry):
+        self.registry = registry
+
+    def _ready(self, pending: List[str], done: Set[str]) -> List[str]:
+        return [
+            name for name in pending
+            if all(dep in done for dep in self.registry.dependencies(name))
+        ]
+
+    @staticmethod
+    def timed(name: str, fn: Callable[[], Any]) -> Any:
+        """Run one operator call with its latency / error metrics, outside a plan."""
+        start = time.perf_counter()
+        try:
+            return fn()
+        except Exception:
+            OPERATOR_ERRORS.labels(operator=name).inc()
+            raise
+        finally:
+            OPERATOR_LATENCY.labels(operator=name).observe(time.perf_counter() - start)
+
+    @staticmethod
+    async def atimed(name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async timed(): await one operator call with its latency / error metrics."""
+        start = time.perf_counter()
+        try:
+            return await fn()
+        except Exception:
+            OPERATOR_ERRORS.labels(operator=name).inc()
+            raise
+        finally:
+            OPERATOR_LATENCY.labels(operator=name).observe(time.perf_counter() - start)
+
+    # ------------------------------------------------------------------
+    # Sync (thread pool)
+    # ------------------------------------------------------------------
+    def run(
+        self,
+        plan: Iterable[str],
+        wait_for: Iterable[str],
+        invoke: Callable[[str], Any],
+        on_done: Callable[[str, Any], None],
+        deadline: Optional[float] = None,
+    ) -> None:
+        """
+        invoke(name) runs one operator against the caller's state;
+        on_done(name, result) records its result and may raise StopPipeline.
+        """
+        executor = get_operator_executor()
+        pending = list(plan)
+        wait_for = set(wait_for)
+        done: Set[str] = set()
+        running: Dict[Future, str] = {}
+
+        while not wait_for <= done:
+            for name in self._ready(pending, done):
+                pending.remove(name)
+                running[executor.submit(self.timed, name, lambda n=name: invoke(n))] = name
+
+            if not running:
+                raise RuntimeError(f"Unsatisfiable operator plan; waiting on {wait_for - done}")
+
+            timeout = _remaining(deadline, wait_for - done)
+            finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not finished:
+                raise DeadlineExceeded(wait_for - done)
+            for fut in finished:
+                name = running.pop(fut)
+                on_done(name, fut.result())
+                done.add(name)
+
+        for fut, name in running.items():
+            fut.add_done_callback(lambda f, n=name: self._background_done(n, f, on_done))
+
+    @staticmethod
+    def _background_done(name: str, fut: Future, on_done: Callable[[str, Any], None]) -> None:
+        try:
+            on_done(name, fut.result())
+        except StopPipeline:
+            pass
+        except Exception as e:
+            logger.warning(f"Background operator '{name}' failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Async (event loop tasks)
+    # ------------------------------------------------------------------
+    async def arun(
+        self,
+        plan: Iterable[str],
+        wait_for: Iterable[str],
+        invoke: Callable[[str], Awaitable[Any]],
+        on_done: Callable[[str, Any], None],
+        done: Iterable[str] = (),
+        deadline: Optional[float] = None,
+    ) -> None:
+        """
+        Async counterpart of run(); invoke(name) returns an awaitable.
+        `done` names operators whose results the caller has already
+        recorded (e.g. retrieval done for a whole batch); they are not run.
+        """
+        done: Set[str] = set(done)
+        pending = [name for name in plan if name not in done]
+        wait_for = set(wait_for)
+        running: Dict[asyncio.Task, str] = {}
+
+        try:
+            while not wait_for <= done:
+                for name in self._ready(pending, done):
+                    pending.remove(name)
+                    task = asyncio.ensure_future(self.atimed(name, lambda n=name: invoke(n)))
+                    running[task] = name
+
+                if not running:
+                    raise RuntimeError(f"Unsatisfiable operator plan; waiting on {wait_for - done}")
+
+                timeout = _remaining(deadline, wait_for - done)
+                finished, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not finished:
+                    raise DeadlineExceeded(wait_for - done)
+                for task in finished:
+                    name = running.pop(task)
+                    on_done(name, task.result())
+                    done.add(name)
+        except BaseException:
+            for task in running:
+                task.cancel()
+            raise
+
+        for task, name in running.items():
+            _BACKGROUND_TASKS.add(task)
+            task.add_done_callback(lambda t, n=name: self._background_task_done(n, t, on_done))
+
+    @staticmethod
+    def _background_task_done(name: str, task: asyncio.Task, on_done: Callable[[str, Any], None]) -> None:
+        _BACKGROUND_TASKS.discard(task)
+        if task.cancelled():
+            return
+        try:
+            on_done(name, task.result())
+        except StopPipeline:
+            pass
+        except Exception as e:
+            logger.warning(f"Background operator '{name}' failed: {e}")
+
+
+# Strong references so detached tasks are not garbage-collected mid-flight
+_BACKGROUND_TASKS: Set[asyncio.Task] = set()
@@ -0,0 +1,245 @@
+# app/rag/answer_cache.py
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import get_settings
+from app.models.query import QueryResponse
+from app.observability.metrics import (
+    ANSWER_CACHE_ENTRIES,
+    ANSWER_CACHE_INVALIDATIONS,
+    ANSWER_CACHE_REQUESTS,
+    ANSWER_CACHE_SAVED_SECONDS,
+)
+
+settings = get_settings()
+
+# (pipeline profile, allowed_product_tags) — answers never cross these boundaries
+Scope = Tuple[str, FrozenSet[str]]
+
+
+@dataclass
+class _Entry:
+    scope: Scope
+    vector: np.ndarray
+    response: QueryResponse
+    latency: float
+    expires_at: float
+
+
+class _ScopeIndex:
+    """Entry ids of one scope plus lazily rebuilt arrays of their vectors and expiries."""
+
+    def __init__(self):
+        self.ids: Dict[int, None] = {}
+        self.matrix: Optional[np.ndarray] = None
+        self.matrix_ids: Tuple[int, ...] = ()
+        self.expires: Optional[np.ndarray] = None
+
+    def add(self, entry_id: int) -> None:
+        self.ids[entry_id] = None
+        self.matrix = None
+
+    def remove(self, entry_id: int) -> None:
+        self.ids.pop(entry_id, None)
+        self.matrix = None
+
+
+class SemanticAnswerCache:
+    """
+    Cache of QueryResponses looked up by question-embedding similarity.
+
+    A lookup only considers entries with exactly the same scope, i.e. the
+    same pipeline profile and the same set of allowed_product_tags, so an
+    answer is never served to a user with different RBAC visibility. Among
+    those, the most similar question wins if its cosine similarity reaches
+    `threshold`.
+
+    Entries expire after `ttl_seconds` and the least recently used entry is
+    evicted once `max_entries` is reached. invalidate_tags() drops every
+    entry whose scope includes one of the given product tags and bumps
+    `generation`; store() refuses responses computed under an older
+    generation so a query racing an ingestion cannot re-cache stale data.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        ttl_seconds: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._scopes: Dict[Scope, _ScopeIndex] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._next_sweep = self._clock() + self._sweep_interval()
+
+    def _sweep_interval(self) -> float:
+        return min(self.ttl_seconds, 60.0)
+
+    @staticmethod
+    def scope(profile: str, allowed_tags: Iterable[str]) -> Scope:
+        return profile, frozenset(allowed_tags)
+
+    @staticmethod
+    def _normalize(vec: np.ndarray) -> np.ndarray:
+        vec = np.asarray(vec, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+    def lookup(self, question_vec: np.ndarray, scope: Scope) -> Optional[QueryResponse]:
+        """
+        Return a copy of the best cached response for this scope, or None.
+        The copy carries metadata.answer_cache = {"hit": True, "similarity": s}.
+        """
+        start = time.perf_counter()
+        query = self._normalize(question_vec)
+
+        with self._lock:
+            index = self._scopes.get(scope)
+            best_id, best_sim = None, -1.0
+
+            if index is not None and index.ids:
+                if index.matrix is None:
+                    index.matrix_ids = tuple(index.ids)
+                    entries = [self._entries[i] for i in index.matrix_ids]
+                    index.matrix = np.stack([e.vector for e in entries])
+                    index.expires = np.array([e.expires_at for e in entries])
+                sims = index.matrix @ query
+                # Expired entries are skipped here and removed by the next sweep
+                sims[index.expires <= self._clock()] = -np.inf
+                pos = int(np.argmax(sims))
+                best_id, best_sim = index.matrix_ids[pos], float(sims[pos])
+
+            if best_id is None or best_sim < self.threshold:
+                ANSWER_CACHE_REQUESTS.labels(result="miss").inc()
+                return None
+
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            response = entry.response.model_copy(deep=True)
+
+        ANSWER_CACHE_REQUESTS.labels(result="hit").inc()
+        ANSWER_CACHE_SAVED_SECONDS.inc(max(0.0, entry.latency - (time.perf_counter() - start)))
+
+        response.metadata["answer_cache"] = {"hit": True, "similarity": round(best_sim, 4)}
+        return response
+
+    def store(
+        self,
+        question_vec: np.ndarray,
+        scope: Scope,
+        response: QueryResponse,
+        latency: float,
+        generation: int,
+    ) -> None:
+        """
+        Cache a response that took `latency` seconds to compute.
+        `generation` is the value read before the pipeline started.
+        """
+        entry = _Entry(
+            scope=scope,
+            vector=self._normalize(question_vec),
+            response=response.model_copy(deep=True),
+            latency=latency,
+            expires_at=self._clock() + self.ttl_seconds,
+        )
+
+        with self._lock:
+            if generation != self.generation:
+                return
+            if self._clock() >= self._next_sweep:
+                self._expire_locked()
+
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            self._scopes.setdefault(scope, _ScopeIndex()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+
+            ANSWER_CACHE_ENTRIES.set(len(self._entries))
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+    def invalidate_tags(self, product_tags: Iterable[str]) -> int:
+        """Drop entries whose allowed tags include any of `product_tags`."""
+        tags = set(product_tags)
+        if not tags:
+            return 0
+
+        with self._lock:
+            self.generation += 1
+            doomed = [
+                entry_id
+                for scope, index in self._scopes.items()
+                if not tags.isdisjoint(scope[1])
+                for entry_id in index.ids
+            ]
+            for entry_id in doomed:
+                self._remove_locked(entry_id)
+            ANSWER_CACHE_ENTRIES.set(len(self._entries))
+
+        ANSWER_CACHE_INVALIDATIONS.inc(len(doomed))
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._scopes.clear()
+            ANSWER_CACHE_ENTRIES.set(0)
+
+    def _expire_locked(self) -> None:
+        now = self._clock()
+        self._next_sweep = now + self._sweep_interval()
+        expired = [i for i, e in self._entries.items() if e.expires_at <= now]
+        for entry_id in expired:
+            self._remove_locked(entry_id)
+
+    def _remove_locked(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        index = self._scopes.get(entry.scope)
+        if index is not None:
+            index.remove(entry_id)
+            if not index.ids:
+                del self._scopes[entry.scope]
+
+
+@lru_cache()
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Cached process-wide SemanticAnswerCache built from settings,
+    or None when ANSWER_CACHE_ENABLED is false.
+    """
+    if not settings.answer_cache_enabled:
+        return None
+
+    return SemanticAnswerCache(
+        threshold=settings.answer_cache_similarity,
+        ttl_seconds=settings.answer_cache_ttl_seconds,
+        max_entries=settings.answer_cache_max_entries,
+    )
@@ -0,0 +1,214 @@
+# app/rag/context_packer.py
+
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config.settings import get_settings
+from app.observability.metrics import CONTEXT_TOKENS, CONTEXT_TOKENS_SAVED
+
+settings = get_settings()
+
+# tiktoken is optional: without it token counts are estimated
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Shorter suffix/prefix matches between neighbouring chunks are treated as coincidence
+MIN_OVERLAP_CHARS = 8
+
+# Between non-adjacent chunks of the same ticket
+GAP = " … "
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+# --------------------------------------------------------------------------------------
+# TOKEN COUNTING
+# --------------------------------------------------------------------------------------
+
+class TokenCounter:
+    """
+    Prompt tokens as the LLM's tokenizer sees them (tiktoken), or an
+    estimate when tiktoken is not installed: one token per punctuation
+    mark and per 4 characters of each word.
+    """
+
+    def __init__(self, model: str = ""):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                # Unknown / local model: the GPT-4 family encoding is a fair proxy
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return sum(math.ceil(len(m.group()) / 4) for m in _PIECE_RE.finditer(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of `text` with at most `max_tokens` tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+        used = 0
+        for m in _PIECE_RE.finditer(text):
+            used += math.ceil(len(m.group()) / 4)
+            if used > max_tokens:
+                return text[: m.start()].rstrip()
+        return text
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(model: str = "") -> TokenCounter:
+    return TokenCounter(model)
+
+
+# --------------------------------------------------------------------------------------
+# PACKING
+# --------------------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class PackedContext:
+    """
+    text          the packed context
+    tokens        its token count
+    naive_tokens  tokens of the chunk texts simply joined (the old context)
+    chunks        chunks that made it in, in relevance order
+    """
+
+    text: str
+    tokens: int
+    naive_tokens: int
+    chunks: List[Any] = field(default_factory=list)
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.naive_tokens - self.tokens)
+
+
+def overlap_length(left: str, right: str, hint: int = 0) -> int:
+    """
+    Characters at the end of `left` repeated at the start of `right`
+    (the chunker's overlap). `hint` (CHUNK_OVERLAP) is tried first; the
+    longest match is searched only if the setting changed since ingestion.
+    """
+    if 0 < hint < len(right) and left.endswith(right[:hint]):
+        return hint
+    for n in range(min(len(left), len(right) - 1), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:n]):
+            return n
+    return 0
+
+
+class ContextPacker:
+    """
+    Builds an LLM context from chunks given in relevance order.
+
+    Chunks are taken greedily, most relevant first, while they fit in
+    `budget` tokens; one that does not fit is skipped in favour of smaller,
+    less relevant ones. Selected chunks of the same ticket with adjacent
+    chunk_index are stitched back together without the text they share,
+    so a chunk whose neighbour is already in costs only its new text. Each
+    ticket becomes one "[ticket_id] ..." paragraph; paragraphs follow the
+    relevance of their best chunk.
+
+    Only if even the most relevant chunk exceeds the budget is it cut,
+    at a token boundary.
+    """
+
+    def __init__(self, budget: int, counter: TokenCounter, overlap_hint: int = 0):
+        self.budget = budget
+        self.counter = counter
+        self.overlap_hint = overlap_hint
+
+    def _overlaps(self, chunks: Sequence[Any]) -> Dict[Tuple[str, int], int]:
+        """(ticket_id, chunk_index) -> chars shared with the next chunk of the ticket."""
+        by_key = {(c.ticket_id, c.chunk_index): c for c in chunks}
+        overlaps = {}
+        for (ticket_id, index), chunk in by_key.items():
+            nxt = by_key.get((ticket_id, index + 1))
+            if nxt is not None:
+                overlaps[(ticket_id, index)] = overlap_length(chunk.text, nxt.text, self.overlap_hint)
+        return overlaps
+
+    def pack(self, chunks: Sequence[Any]) -> PackedContext:
+        chunks = list(chunks)
+        naive_tokens = self.counter.count("\n".join(c.text for c in chunks))
+        if not chunks:
+            return PackedContext("", 0, naive_tokens, [])
+
+        overlaps = self._overlaps(chunks)
+        selected: Dict[Tuple[str, int], Any] = {}
+        order: List[Any] = []
+        tickets = set()
+        used = 0
+
+        for chunk in chunks:
+            ticket_id, index = chunk.ticket_id, chunk.chunk_index
+            if (ticket_id, index) in selected:
+                continue
+            # Text this chunk adds given the neighbours already selected
+            start = overlaps.get((ticket_id, index - 1), 0) if (ticket_id, index - 1) in selected else 0
+            end = len(chunk.text)
+            if (ticket_id, index + 1) in selected:
+                end -= overlaps.get((ticket_id, index), 0)
+            cost = self.counter.count(chunk.text[start:max(start, end)])
+            if ticket_id not in tickets:
+                cost += self.counter.count(f"[{ticket_id}] ")
+
+            if used + cost > self.budget:
+                continue
+            selected[(ticket_id, index)] = chunk
+            order.append(chunk)
+            tickets.add(ticket_id)
+            used += cost
+
+        if not order:
+            # Even the best chunk alone is over budget: cut it rather than send nothing
+            best = chunks[0]
+            header = f"[{best.ticket_id}] "
+            text = header + self.counter.truncate(best.text, self.budget - self.counter.count(header))
+            return self._packed(text, naive_tokens, [best])
+
+        return self._packed(self._render(order, selected, overlaps), naive_tokens, order)
+
+    def _render(self, order, selected, overlaps) -> str:
+        paragraphs = []
+        for ticket_id in dict.fromkeys(c.ticket_id for c in order):
+            pieces, prev = [], None
+            for index in sorted(i for (t, i) in selected if t == ticket_id):
+                text = selected[(ticket_id, index)].text
+                if prev is not None and index == prev + 1:
+                    pieces[-1] += text[overlaps.get((ticket_id, prev), 0):]
+                else:
+                    pieces.append(text)
+                prev = index
+            paragraphs.append(f"[{ticket_id}] " + GAP.join(p.strip() for p in pieces))
+        return "\n\n".join(paragraphs)
+
+    def _packed(self, text: str, naive_tokens: int, chunks: List[Any]) -> PackedContext:
+        return PackedContext(text, self.counter.count(text), naive_tokens, chunks)
+
+
+def pack_context(chunks: Sequence[Any], budget: int, model: str = "", operator: Optional[str] = None) -> PackedContext:
+    """ContextPacker with the CHUNK_OVERLAP hint; records token metrics under `operator`."""
+    packed = ContextPacker(budget, get_token_counter(model), settings.chunk_overlap).pack(chunks)
+    if operator is not None:
+        CONTEXT_TOKENS.labels(operator=operator).observe(packed.tokens)
+        CONTEXT_TOKENS_SAVED.labels(operator=operator).inc(packed.saved_tokens)
+    return packed
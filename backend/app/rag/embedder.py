@@ -1,11 +1,13 @@
 # app/rag/embedder.py
 
-from typing import List, Sequence
-from functools import lru_cache
+import threading
+from typing import Dict, List, Optional, Sequence
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
 
 from app.config.settings import get_settings
+from app.rag.embedding_cache import EmbeddingCache, get_embedding_cache
+from app.rag.onnx_embedding import EMBEDDING_BACKENDS, ONNX, TORCH, embedding_variant, load_onnx_model
 
 settings = get_settings()
 
@@ -13,35 +15,126 @@ settings = get_settings()
 class Embedder:
     """
     Wrapper around a sentence-transformers embedding model.
+    An optional EmbeddingCache short-circuits texts seen before.
+
+    backend (EMBEDDING_BACKEND):
+      torch  the PyTorch model
+      onnx   the same model exported to ONNX and run by ONNX Runtime,
+             optionally int8-quantized (EMBEDDING_ONNX_QUANTIZATION)
+
+    sentence_transformers (and torch with it) is imported here rather than
+    at module level, so processes that never embed don't pay for it.
     """
 
-    def __init__(self, model_name: str | None = None):
+    def __init__(
+        self,
+        model_name: str | None = None,
+        cache: Optional[EmbeddingCache] = None,
+        backend: str | None = None,
+        quantization: str | None = None,
+    ):
+        from sentence_transformers import SentenceTransformer
+
         if model_name is None:
             model_name = settings.embedding_model_name
+        backend = (backend or settings.embedding_backend).lower()
+        if quantization is None:
+            quantization = settings.embedding_onnx_quantization
 
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
+        self.backend = backend
+        if backend == TORCH:
+            self.model = SentenceTransformer(model_name)
+        elif backend == ONNX:
+            self.model = load_onnx_model(model_name, quantization, settings.embedding_onnx_threads)
+        else:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Use one of {list(EMBEDDING_BACKENDS)}.")
+        self.variant = embedding_variant(backend, quantization)
+        self.cache = cache
+
+    @property
+    def cache_id(self) -> str:
+        """Embedding cache namespace: backends agree closely, not bit for bit."""
+        return self.model_name if self.variant == TORCH else f"{self.model_name}@{self.variant}"
 
     def embed(self, texts: Sequence[str]) -> List[List[float]]:
         """
         Compute embeddings for a list of texts.
         Returns a list of float vectors.
+
+        Prefer embed_array(): this converts every component to a Python float.
+        """
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Compute embeddings for a list of texts.
+        Returns a C-contiguous float32 array of shape (len(texts), dim).
         """
         if not texts:
-            return []
+            return np.empty((0, settings.embedding_dim), dtype=np.float32)
+
+        texts = list(texts)
+        if self.cache is None:
+            return self._encode(texts)
+
+        cached = self.cache.get_many(self.cache_id, texts)
 
-        # sentence-transformers returns numpy arrays; convert to Python lists
+        # Encode each distinct missing text once
+        missing: Dict[str, List[int]] = {}
+        for i, vec in enumerate(cached):
+            if vec is None:
+                missing.setdefault(texts[i], []).append(i)
+
+        encoded = None
+        if missing:
+            new_texts = list(missing)
+            encoded = self._encode(new_texts)
+            self.cache.put_many(self.cache_id, new_texts, encoded)
+
+        dim = encoded.shape[1] if encoded is not None else cached[0].shape[0]
+        out = np.empty((len(texts), dim), dtype=np.float32)
+        for i, vec in enumerate(cached):
+            if vec is not None:
+                out[i] = vec
+        if encoded is not None:
+            for row, text in enumerate(missing):
+                out[missing[text]] = encoded[row]
+
+        return out
+
+    def warmup(self) -> None:
+        """
+        Run a few uncached forward passes (short and long input) so the
+        first real query doesn't pay for lazy kernel / allocator setup.
+        """
+        self._encode(["warmup", "warmup " * 64])
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
         embeddings = self.model.encode(
-            list(texts),
+            texts,
             batch_size=settings.embedding_batch_size,
             show_progress_bar=False,
+            convert_to_numpy=True,
         )
-        return [emb.tolist() for emb in embeddings]
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+_embedder: Optional[Embedder] = None
+_embedder_lock = threading.Lock()
 
 
-@lru_cache()
 def get_embedder() -> Embedder:
     """
     Cached global Embedder instance.
+
+    Built once under a lock: a request arriving while startup warmup is
+    still loading the model waits for that instance instead of loading
+    a second copy.
     """
-    return Embedder()
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = Embedder(cache=get_embedding_cache())
+    return _embedder
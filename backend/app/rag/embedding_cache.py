@@ -0,0 +1,251 @@
+# app/rag/embedding_cache.py
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config.settings import get_settings
+from app.observability.metrics import EMBEDDING_CACHE_BYTES, EMBEDDING_CACHE_REQUESTS
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: disk tier is still usable by a single process
+    fcntl = None
+
+settings = get_settings()
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """Content address of a (model, text) pair: 16-byte BLAKE2b digest."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.digest()
+
+
+# ---------------------------------------------------------------------
+# Tier 1 — in-process LRU bounded by bytes
+# ---------------------------------------------------------------------
+
+class LRUVectorCache:
+    """
+    Thread-safe LRU of float32 vectors. Eviction is driven by the total
+    size of the stored arrays rather than by entry count.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._items.get(key)
+            if vec is not None:
+                self._items.move_to_end(key)
+            return vec
+
+    def put(self, key: bytes, vec: np.ndarray) -> None:
+        # Own the data: a row view would keep its whole encoded batch alive
+        # while only the row's bytes are counted against max_bytes
+        vec = np.array(vec, dtype=np.float32, copy=True)
+        if vec.nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+
+            self._items[key] = vec
+            self.nbytes += vec.nbytes
+
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+        EMBEDDING_CACHE_BYTES.set(self.nbytes)
+
+
+# ---------------------------------------------------------------------
+# Tier 2 — memory-mapped store shared across processes
+# ---------------------------------------------------------------------
+
+class DiskVectorStore:
+    """
+    Fixed-capacity open-addressing hash table backed by two memory-mapped
+    files, so every worker process on a host maps the same pages:
+
+        <name>.keys  uint64[slots, 2]      (all-zero = empty slot)
+        <name>.vecs  float32[slots, dim]
+
+    Reads are lock-free: the key is re-checked after copying the vector so
+    a concurrent overwrite is detected as a miss. Writes take an exclusive
+    flock. When a probe window is full the home slot is overwritten, which
+    makes the store behave as a cache rather than growing unbounded.
+    """
+
+    PROBES = 8
+
+    def __init__(self, directory: str | Path, model_name: str, dim: int, slots: int):
+        self.dim = dim
+        self.slots = slots
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        base = directory / f"{safe_model}-d{dim}-s{slots}"
+        self._lock_path = base.with_suffix(".lock")
+        self._thread_lock = threading.Lock()
+
+        keys_path = base.with_suffix(".keys")
+        vecs_path = base.with_suffix(".vecs")
+
+        with self._write_lock():
+            if not keys_path.exists() or not vecs_path.exists():
+                # Sparse files: pages are only materialized when written
+                np.memmap(vecs_path, dtype=np.float32, mode="w+", shape=(slots, dim)).flush()
+                np.memmap(keys_path, dtype=np.uint64, mode="w+", shape=(slots, 2)).flush()
+
+        self._keys = np.memmap(keys_path, dtype=np.uint64, mode="r+", shape=(slots, 2))
+        self._vecs = np.memmap(vecs_path, dtype=np.float32, mode="r+", shape=(slots, dim))
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path, "a") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _probe(self, key: np.ndarray) -> Iterator[int]:
+        home = int(key[0] % self.slots)
+        for i in range(self.PROBES):
+            yield (home + i) % self.slots
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        k = np.frombuffer(key, dtype=np.uint64)
+        for slot in self._probe(k):
+            stored = self._keys[slot]
+            if not stored.any():
+                return None
+            if np.array_equal(stored, k):
+                vec = np.array(self._vecs[slot])
+                # Detect a concurrent overwrite of this slot
+                if np.array_equal(self._keys[slot], k):
+                    return vec
+                return None
+        return None
+
+    def put_many(self, items: Sequence[Tuple[bytes, np.ndarray]]) -> None:
+        """Insert several vectors under a single lock acquisition."""
+        with self._write_lock():
+            for key, vec in items:
+                self._put_locked(np.frombuffer(key, dtype=np.uint64), vec)
+
+    def _put_locked(self, k: np.ndarray, vec: np.ndarray) -> None:
+        target = None
+        for slot in self._probe(k):
+            stored = self._keys[slot]
+            if not stored.any() or np.array_equal(stored, k):
+                target = slot
+                break
+        if target is None:
+            target = next(self._probe(k))
+
+        # Invalidate, write vector, then publish key
+        self._keys[target] = 0
+        self._vecs[target] = vec
+        self._keys[target] = k
+
+
+# ---------------------------------------------------------------------
+# Two-tier facade
+# ---------------------------------------------------------------------
+
+class EmbeddingCache:
+    """
+    Memory LRU in front of an optional shared disk store.
+    Disk hits are promoted into memory.
+    """
+
+    def __init__(self, memory: LRUVectorCache, disk: Optional[DiskVectorStore] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get_many(self, model_name: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        results: List[Optional[np.ndarray]] = []
+        mem_hits = disk_hits = misses = 0
+
+        for text in texts:
+            key = cache_key(model_name, text)
+            vec = self.memory.get(key)
+            if vec is not None:
+                mem_hits += 1
+            elif self.disk is not None:
+                vec = self.disk.get(key)
+                if vec is not None:
+                    disk_hits += 1
+                    self.memory.put(key, vec)
+                else:
+                    misses += 1
+            else:
+                misses += 1
+            results.append(vec)
+
+        EMBEDDING_CACHE_REQUESTS.labels(tier="memory", result="hit").inc(mem_hits)
+        EMBEDDING_CACHE_REQUESTS.labels(tier="memory", result="miss").inc(disk_hits + misses)
+        if self.disk is not None:
+            EMBEDDING_CACHE_REQUESTS.labels(tier="disk", result="hit").inc(disk_hits)
+            EMBEDDING_CACHE_REQUESTS.labels(tier="disk", result="miss").inc(misses)
+
+        return results
+
+    def put_many(self, model_name: str, texts: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        disk_items = []
+        for text, vec in zip(texts, vectors):
+            key = cache_key(model_name, text)
+            vec = np.asarray(vec, dtype=np.float32)
+            self.memory.put(key, vec)
+            if self.disk is not None and vec.shape == (self.disk.dim,):
+                disk_items.append((key, vec))
+
+        if disk_items:
+            self.disk.put_many(disk_items)
+
+
+@lru_cache()
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Cached process-wide EmbeddingCache built from settings,
+    or None when EMBEDDING_CACHE_ENABLED is false.
+    """
+    if not settings.embedding_cache_enabled:
+        return None
+
+    disk = None
+    if settings.embedding_cache_dir:
+        disk = DiskVectorStore(
+            directory=os.path.expanduser(settings.embedding_cache_dir),
+            model_name=settings.embedding_model_name,
+            dim=settings.embedding_dim,
+            slots=settings.embedding_cache_disk_slots,
+        )
+
+    return EmbeddingCache(LRUVectorCache(settings.embedding_cache_max_bytes), disk)
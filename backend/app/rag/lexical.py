@@ -0,0 +1,78 @@
+# app/rag/lexical.py
+
+import re
+from typing import Any, Dict, Hashable, Iterable, List, Sequence
+
+# Words, plus identifier-shaped tokens kept whole: TCK-1042, ERR_503, Product_C
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.:][a-z0-9]+)*")
+_PART_RE = re.compile(r"[a-z0-9]+")
+
+# Letters/digits optionally joined with - _ . : ; an identifier (as opposed
+# to a plain word) must also contain a digit or a separator.
+_IDENTIFIER_RE = re.compile(r"[A-Za-z0-9]+(?:[-_.:][A-Za-z0-9]+)*")
+_IDENTIFIER_MARK_RE = re.compile(r"[\d_.:-]")
+
+MAX_IDENTIFIER_TOKENS = 4
+
+# Standard reciprocal-rank-fusion damping constant
+RRF_K = 60
+
+
+def tokenize(text: str, parts: bool = True) -> List[str]:
+    """
+    Lowercased tokens. Documents are indexed with compound identifiers
+    both whole and split ("tck-1042" -> tck-1042, tck, 1042), like
+    PostgreSQL's parser does for hyphenated words; queries pass
+    parts=False so "TCK-1042" does not match every "TCK-..." ticket.
+    """
+    tokens: List[str] = []
+    for token in _TOKEN_RE.findall((text or "").lower()):
+        tokens.append(token)
+        if parts:
+            split = _PART_RE.findall(token)
+            if len(split) > 1:
+                tokens.extend(split)
+    return tokens
+
+
+def is_identifier_query(question: str) -> bool:
+    """
+    True for literal lookups such as "TCK-1042", "ERR_503 TCK-7" or
+    "Product_C": a few tokens, every one identifier-shaped. These are
+    answered from the lexical index without computing an embedding.
+    """
+    words = [w.strip("\"'()[]?") for w in question.replace(",", " ").split()]
+    if not words or len(words) > MAX_IDENTIFIER_TOKENS:
+        return False
+    return all(_IDENTIFIER_RE.fullmatch(w) and _IDENTIFIER_MARK_RE.search(w) for w in words)
+
+
+def tsquery_text(question: str) -> str:
+    """
+    OR-query for to_tsquery(): every token quoted, so arbitrary user
+    input can never produce tsquery syntax errors. A quoted compound
+    ('tck-1042') is expanded by PostgreSQL into its parts AND-ed together.
+    """
+    return " | ".join(f"'{t}'" for t in dict.fromkeys(tokenize(question, parts=False)))
+
+
+def chunk_key(chunk: Any) -> Hashable:
+    return (chunk.ticket_id, chunk.chunk_index)
+
+
+def rrf_fuse(rankings: Sequence[Iterable[Any]], k: int, rrf_k: int = RRF_K) -> List[Any]:
+    """
+    Reciprocal-rank fusion: score(d) = sum over rankings of 1 / (rrf_k + rank).
+    Chunks are matched across rankings by (ticket_id, chunk_index).
+    """
+    scores: Dict[Hashable, float] = {}
+    first_seen: Dict[Hashable, Any] = {}
+
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            key = chunk_key(chunk)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            first_seen.setdefault(key, chunk)
+
+    best = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+    return [first_seen[key] for key in best]
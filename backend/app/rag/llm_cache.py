@@ -0,0 +1,114 @@
+# app/rag/llm_cache.py
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.observability.metrics import LLM_PROMPT_CACHE_ENTRIES
+
+# (sha256 of the prompt, model, temperature)
+PromptKey = Tuple[str, str, float]
+
+
+def prompt_key(prompt: str, model: str, temperature: float) -> PromptKey:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest(), model, temperature
+
+
+class PromptCache:
+    """
+    Bounded prompt -> completion cache. Entries expire `ttl_seconds` after
+    they were stored; the least recently used one is evicted once
+    `max_entries` is reached. Prompts embed the retrieved chunk text, so
+    re-ingested tickets produce new keys rather than stale hits.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            text, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                LLM_PROMPT_CACHE_ENTRIES.set(len(self._entries))
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def put(self, key: Hashable, text: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (text, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            LLM_PROMPT_CACHE_ENTRIES.set(len(self._entries))
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one execution: the first
+    caller runs fn, the others wait for its result (or its exception).
+    do()/ado() return (result, shared), shared being True for followers.
+
+    The async flight runs as its own task and followers await it through
+    asyncio.shield(), so a cancelled leader (client gone) does not cancel
+    the call for everyone else.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._acalls: Dict[Hashable, asyncio.Task] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        task = self._acalls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._acalls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._acalls.get(key) is task:
+            del self._acalls[key]
+        # Nobody may be left to await a failed flight; mark its error retrieved
+        if not task.cancelled():
+            task.exception()
@@ -1,82 +1,386 @@
 # app/rag/llm_client.py
 
+import asyncio
+import json
 import logging
+from typing import AsyncIterator, Iterator, Optional
+
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
+
 from app.config.settings import get_settings
+from app.observability.metrics import LLM_DEDUP, LLM_POOL_CONNECTIONS
+from app.rag.llm_cache import PromptCache, SingleFlight, prompt_key
+from app.rag.llm_transport import (
+    RETRYABLE_STATUSES,
+    CircuitBreaker,
+    EndpointGuard,
+    circuit_state_metric,
+)
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
 # Try new OpenAI API
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI, OpenAI
     NEW_OPENAI = True
 except ImportError:
     NEW_OPENAI = False
     import openai  # legacy API
 
 
+# --------------------------------------------------------------------------------------
+# Which failures are worth retrying: the request was not processed (connection
+# refused / reset, pool exhausted) or the server asked us to come back (429,
+# gateway errors). Read timeouts are not retried: the call already took
+# LLM_TIMEOUT_SECONDS and the model may still be busy with it.
+# --------------------------------------------------------------------------------------
+
+def _retryable_requests(exc: BaseException) -> bool:
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code in RETRYABLE_STATUSES
+    return isinstance(exc, requests.ConnectionError)
+
+
+def _retryable_httpx(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUSES
+    # RemoteProtocolError: a pooled keep-alive connection the server had closed
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError))
+
+
+def _retryable_openai(exc: BaseException) -> bool:
+    if not NEW_OPENAI:
+        return False
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in RETRYABLE_STATUSES
+    return isinstance(exc, APIConnectionError) and not isinstance(exc, APITimeoutError)
+
+
 class LLMClient:
+    """
+    generate / agenerate / stream / astream against OpenAI or LLM_ENDPOINT.
+
+    Every call goes through an EndpointGuard (concurrency bound, retries,
+    circuit breaker; see llm_transport.py) over keep-alive connection
+    pools. Failures raise LLMUnavailableError instead of becoming answer
+    text; CircuitOpenError is raised immediately while the endpoint is down.
+
+    generate()/agenerate() first consult a TTL prompt cache keyed by
+    (prompt hash, model, temperature), then coalesce concurrent identical
+    prompts into one in-flight call (single flight). stream()/astream()
+    replay cached completions and cache what they stream, but do not
+    coalesce.
+    """
+
+    temperature = 0.2
+
     def __init__(self):
-        self.use_openai = settings.openai_api_key is not None
+        # An empty OPENAI_API_KEY selects the local endpoint
+        self.use_openai = bool(settings.openai_api_key)
+        self._async_client = None
+        self._async_http = None
+        self._session = None
+
+        self.prompt_cache = None
+        if settings.llm_prompt_cache_enabled:
+            self.prompt_cache = PromptCache(
+                settings.llm_prompt_cache_max_entries, settings.llm_prompt_cache_ttl_seconds
+            )
+        self._flights = SingleFlight()
+
+        endpoint = "openai" if self.use_openai else "local"
+        self.guard = EndpointGuard(
+            name=endpoint,
+            max_concurrency=settings.llm_max_concurrency,
+            retries=settings.llm_retries,
+            backoff_seconds=settings.llm_retry_backoff_seconds,
+            backoff_max_seconds=settings.llm_retry_backoff_max_seconds,
+            breaker=CircuitBreaker(
+                settings.llm_breaker_failures,
+                settings.llm_breaker_reset_seconds,
+                on_change=circuit_state_metric(endpoint),
+            ),
+        )
+        LLM_POOL_CONNECTIONS.labels(endpoint=endpoint).set(settings.llm_max_connections)
 
         if self.use_openai:
             if NEW_OPENAI:
-                self.client = OpenAI(api_key=settings.openai_api_key)
+                # Retries are the guard's job; the SDK's own would multiply them
+                self.client = OpenAI(
+                    api_key=settings.openai_api_key,
+                    max_retries=0,
+                    timeout=settings.llm_timeout_seconds,
+                )
+                self.model = "gpt-4o-mini"
                 logger.info("Using NEW OpenAI client")
             else:
                 openai.api_key = settings.openai_api_key
+                self.model = "gpt-4"
                 logger.info("Using LEGACY OpenAI client")
 
         else:
             logger.warning("No OPENAI_API_KEY set — using local LLM endpoint")
             self.client = None
+            # The endpoint decides the model; its URL is what identifies it
+            self.model = settings.llm_endpoint
 
     def generate(self, prompt: str) -> str:
+        key = prompt_key(prompt, self.model, self.temperature)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        text, shared = self._flights.do(key, lambda: self._generate(prompt))
+        return self._after_flight(key, text, shared)
+
+    async def agenerate(self, prompt: str) -> str:
+        """
+        Non-blocking generate(): awaits the HTTP call instead of holding a
+        threadpool thread, so one worker can keep many calls in flight.
+        """
+        key = prompt_key(prompt, self.model, self.temperature)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        text, shared = await self._flights.ado(key, lambda: self._agenerate(prompt))
+        return self._after_flight(key, text, shared)
+
+    def _cache_get(self, key) -> Optional[str]:
+        if self.prompt_cache is None:
+            return None
+        text = self.prompt_cache.get(key)
+        if text is not None:
+            LLM_DEDUP.labels(result="cached").inc()
+        return text
+
+    def _after_flight(self, key, text: str, shared: bool) -> str:
+        if shared:
+            LLM_DEDUP.labels(result="coalesced").inc()
+            return text
+        LLM_DEDUP.labels(result="called").inc()
+        if self.prompt_cache is not None:
+            self.prompt_cache.put(key, text)
+        return text
+
+    def probe(self) -> None:
+        """
+        One tiny call past the prompt cache: opens a pooled connection and
+        raises LLMUnavailableError if the endpoint does not answer.
+        """
+        self._generate("ping")
+
+    async def aprobe(self) -> None:
+        """probe() over the async transport (the one ORC_ASYNC_MODE serves with)."""
+        await self._agenerate("ping")
+
+    def _generate(self, prompt: str) -> str:
         if self.use_openai:
             if NEW_OPENAI:
-                return self._generate_new(prompt)
+                return self.guard.call(lambda: self._generate_new(prompt), _retryable_openai)
             else:
-                return self._generate_legacy(prompt)
+                return self.guard.call(lambda: self._generate_legacy(prompt), _retryable_openai)
 
-        return self._generate_local(prompt)
+        return self.guard.call(lambda: self._generate_local(prompt), _retryable_requests)
+
+    async def _agenerate(self, prompt: str) -> str:
+        if self.use_openai:
+            if NEW_OPENAI:
+                return await self.guard.acall(lambda: self._agenerate_new(prompt), _retryable_openai)
+            # Legacy SDK has no async API
+            return await self.guard.acall(
+                lambda: asyncio.to_thread(self._generate_legacy, prompt), _retryable_openai
+            )
+
+        return await self.guard.acall(lambda: self._agenerate_local(prompt), _retryable_httpx)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """
+        generate() as a stream of text deltas, yielded as the model
+        produces them. Backends that cannot stream yield the full answer
+        once, as does a prompt cache hit.
+        """
+        key = prompt_key(prompt, self.model, self.temperature)
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        if self.use_openai:
+            if NEW_OPENAI:
+                open_stream = lambda: self._stream_new(prompt)
+            else:
+                open_stream = lambda: iter([self._generate_legacy(prompt)])
+        else:
+            open_stream = lambda: self._stream_local(prompt)
+
+        parts = []
+        for delta in self.guard.stream(open_stream):
+            parts.append(delta)
+            yield delta
+        self._after_flight(key, "".join(parts), shared=False)
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """Async counterpart of stream()."""
+        key = prompt_key(prompt, self.model, self.temperature)
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        if self.use_openai:
+            if NEW_OPENAI:
+                open_stream = lambda: self._astream_new(prompt)
+            else:
+                open_stream = lambda: self._astream_legacy(prompt)
+        else:
+            open_stream = lambda: self._astream_local(prompt)
+
+        parts = []
+        async for delta in self.guard.astream(open_stream):
+            parts.append(delta)
+            yield delta
+        self._after_flight(key, "".join(parts), shared=False)
 
     # ----------------------------
     # New client
     # ----------------------------
     def _generate_new(self, prompt: str) -> str:
         resp = self.client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=self.model,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
+            temperature=self.temperature,
         )
         return resp.choices[0].message.content
 
+    def _openai_async(self) -> "AsyncOpenAI":
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                max_retries=0,
+                timeout=settings.llm_timeout_seconds,
+            )
+        return self._async_client
+
+    async def _agenerate_new(self, prompt: str) -> str:
+        resp = await self._openai_async().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+        )
+        return resp.choices[0].message.content
+
+    def _stream_new(self, prompt: str) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            stream=True,
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def _astream_new(self, prompt: str) -> AsyncIterator[str]:
+        stream = await self._openai_async().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     # ----------------------------
     # Legacy client
     # ----------------------------
     def _generate_legacy(self, prompt: str) -> str:
         resp = openai.ChatCompletion.create(
-            model="gpt-4",
+            model=self.model,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
+            temperature=self.temperature,
         )
         return resp.choices[0].message["content"]
 
+    async def _astream_legacy(self, prompt: str) -> AsyncIterator[str]:
+        yield await asyncio.to_thread(self._generate_legacy, prompt)
+
     # ----------------------------
     # Local fallback LLM
     # ----------------------------
+    def _http_session(self) -> requests.Session:
+        if self._session is None:
+            # One keep-alive pool for the sync path instead of a handshake per call
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.llm_max_connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
     def _generate_local(self, prompt: str) -> str:
-        try:
-            r = requests.post(
-                settings.llm_endpoint,
-                json={"prompt": prompt},
+        r = self._http_session().post(
+            settings.llm_endpoint,
+            json={"prompt": prompt},
+            timeout=settings.llm_timeout_seconds,
+        )
+        r.raise_for_status()
+        return r.json().get("text", "")
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._async_http is None:
+            self._async_http = httpx.AsyncClient(
                 timeout=settings.llm_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_connections,
+                    max_keepalive_connections=settings.llm_max_connections,
+                ),
             )
+        return self._async_http
+
+    async def _agenerate_local(self, prompt: str) -> str:
+        r = await self._http().post(settings.llm_endpoint, json={"prompt": prompt})
+        r.raise_for_status()
+        return r.json().get("text", "")
+
+    # Streaming protocol of the local endpoint: POST {"prompt", "stream": true};
+    # an application/x-ndjson response carries one {"text": <delta>} per line.
+    # Endpoints that ignore "stream" answer {"text": ...} as usual.
+    @staticmethod
+    def _is_ndjson(content_type: str) -> bool:
+        return "ndjson" in (content_type or "")
+
+    def _stream_local(self, prompt: str) -> Iterator[str]:
+        with self._http_session().post(
+            settings.llm_endpoint,
+            json={"prompt": prompt, "stream": True},
+            timeout=settings.llm_timeout_seconds,
+            stream=True,
+        ) as r:
+            r.raise_for_status()
+            if not self._is_ndjson(r.headers.get("content-type")):
+                yield r.json().get("text", "")
+                return
+            for line in r.iter_lines():
+                if line:
+                    yield json.loads(line).get("text", "")
+
+    async def _astream_local(self, prompt: str) -> AsyncIterator[str]:
+        payload = {"prompt": prompt, "stream": True}
+        async with self._http().stream("POST", settings.llm_endpoint, json=payload) as r:
             r.raise_for_status()
-            return r.json().get("text", "")
-        except Exception as e:
-            return f"[LOCAL LLM ERROR] {e}"
+            if not self._is_ndjson(r.headers.get("content-type")):
+                yield json.loads(await r.aread()).get("text", "")
+                return
+            async for line in r.aiter_lines():
+                if line:
+                    yield json.loads(line).get("text", "")
 
 
 _llm_client = None
@@ -0,0 +1,290 @@
+# app/rag/llm_transport.py
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from app.observability.metrics import (
+    LLM_CALLS,
+    LLM_CIRCUIT_STATE,
+    LLM_CONCURRENCY_LIMIT,
+    LLM_IN_FLIGHT,
+    LLM_RETRIES,
+    LLM_WAITING,
+)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Exported as rag_llm_circuit_state
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# HTTP statuses that mean "not processed, try again": rate limited / gateway / overloaded
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class LLMUnavailableError(RuntimeError):
+    """The LLM call failed (after retries); raised instead of returning error text."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the endpoint while its circuit breaker is open."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"LLM endpoint '{endpoint}' is unavailable (circuit open)")
+        self.retry_after = retry_after
+
+
+# --------------------------------------------------------------------------------------
+# CIRCUIT BREAKER
+# --------------------------------------------------------------------------------------
+
+class CircuitBreaker:
+    """
+    closed     calls go through; `failure_threshold` consecutive failed
+               calls open the circuit
+    open       calls fail immediately for `reset_seconds`
+    half_open  one probe call is let through; success closes the
+               circuit, failure re-opens it for another `reset_seconds`
+
+    Thread-safe, so the sync (thread pool) and async paths share one.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        on_change: Optional[Callable[[str], None]] = None,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            self._state = state
+            if self._on_change is not None:
+                self._on_change(state)
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_seconds - self._clock())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+                self._probe_in_flight = False
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_abandoned(self) -> None:
+        """A call ended without a verdict (cancelled); let the next one probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+
+# --------------------------------------------------------------------------------------
+# ENDPOINT GUARD
+# --------------------------------------------------------------------------------------
+
+class EndpointGuard:
+    """
+    Per-endpoint call policy shared by every LLMClient code path:
+
+      * at most `max_concurrency` calls in flight (callers beyond that
+        wait for a slot; the sync and async paths each get that many)
+      * the circuit breaker is checked before a call is made
+      * failures for which `retryable(exc)` is true (connection refused,
+        429 / 5xx gateway errors) are retried up to `retries` times with
+        full-jitter exponential backoff; a call counts as one breaker
+        failure only once its retries are exhausted
+
+    Streams hold a slot and report to the breaker but are never retried:
+    tokens already delivered to the caller cannot be taken back.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        retries: int,
+        backoff_seconds: float,
+        backoff_max_seconds: float,
+        breaker: CircuitBreaker,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.retries = max(0, retries)
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = breaker
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._aslots: Optional[asyncio.Semaphore] = None
+
+        LLM_CONCURRENCY_LIMIT.labels(endpoint=name).set(self.max_concurrency)
+        LLM_CIRCUIT_STATE.labels(endpoint=name).set(_STATE_VALUES[breaker.state])
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max, base * 2^attempt)]."""
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_seconds * 2 ** attempt))
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            LLM_CALLS.labels(endpoint=self.name, outcome="circuit_open").inc()
+            raise CircuitOpenError(self.name, self.breaker.retry_after())
+
+    def _succeeded(self) -> None:
+        self.breaker.record_success()
+        LLM_CALLS.labels(endpoint=self.name, outcome="success").inc()
+
+    def _failed(self) -> None:
+        self.breaker.record_failure()
+        LLM_CALLS.labels(endpoint=self.name, outcome="error").inc()
+
+    # ------------------------------------------------------------------
+    # Concurrency slots
+    # ------------------------------------------------------------------
+    @contextmanager
+    def slot(self):
+        waiting = LLM_WAITING.labels(endpoint=self.name)
+        waiting.inc()
+        try:
+            self._slots.acquire()
+        finally:
+            waiting.dec()
+        in_flight = LLM_IN_FLIGHT.labels(endpoint=self.name)
+        in_flight.inc()
+        try:
+            yield
+        finally:
+            in_flight.dec()
+            self._slots.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        if self._aslots is None:
+            self._aslots = asyncio.Semaphore(self.max_concurrency)
+        waiting = LLM_WAITING.labels(endpoint=self.name)
+        waiting.inc()
+        try:
+            await self._aslots.acquire()
+        finally:
+            waiting.dec()
+        in_flight = LLM_IN_FLIGHT.labels(endpoint=self.name)
+        in_flight.inc()
+        try:
+            yield
+        finally:
+            in_flight.dec()
+            self._aslots.release()
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+    def call(self, fn: Callable[[], Any], retryable: Callable[[BaseException], bool]) -> Any:
+        self._admit()
+        attempt = 0
+        while True:
+            try:
+                with self.slot():
+                    result = fn()
+            except Exception as e:
+                if attempt < self.retries and retryable(e):
+                    LLM_RETRIES.labels(endpoint=self.name).inc()
+                    time.sleep(self.backoff(attempt))
+                    attempt += 1
+                    continue
+                self._failed()
+                raise LLMUnavailableError(f"LLM call to '{self.name}' failed: {e}") from e
+            self._succeeded()
+            return result
+
+    async def acall(
+        self, fn: Callable[[], Awaitable[Any]], retryable: Callable[[BaseException], bool]
+    ) -> Any:
+        self._admit()
+        attempt = 0
+        while True:
+            try:
+                async with self.aslot():
+                    result = await fn()
+            except asyncio.CancelledError:
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                if attempt < self.retries and retryable(e):
+                    LLM_RETRIES.labels(endpoint=self.name).inc()
+                    await asyncio.sleep(self.backoff(attempt))
+                    attempt += 1
+                    continue
+                self._failed()
+                raise LLMUnavailableError(f"LLM call to '{self.name}' failed: {e}") from e
+            self._succeeded()
+            return result
+
+    def stream(self, open_stream: Callable[[], Any]):
+        """Iterate open_stream() (a generator) inside a slot, reporting the outcome once."""
+        self._admit()
+        with self.slot():
+            try:
+                yield from open_stream()
+            except GeneratorExit:
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                self._failed()
+                raise LLMUnavailableError(f"LLM stream from '{self.name}' failed: {e}") from e
+        self._succeeded()
+
+    async def astream(self, open_stream: Callable[[], Any]):
+        self._admit()
+        async with self.aslot():
+            try:
+                async for item in open_stream():
+                    yield item
+            except (GeneratorExit, asyncio.CancelledError):
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                self._failed()
+                raise LLMUnavailableError(f"LLM stream from '{self.name}' failed: {e}") from e
+        self._succeeded()
+
+
+def circuit_state_metric(name: str) -> Callable[[str], None]:
+    """on_change hook exporting a breaker's state as rag_llm_circuit_state{endpoint=name}."""
+    gauge = LLM_CIRCUIT_STATE.labels(endpoint=name)
+    return lambda state: gauge.set(_STATE_VALUES[state])
@@ -0,0 +1,106 @@
+# app/rag/onnx_embedding.py
+
+from pathlib import Path
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+TORCH = "torch"
+ONNX = "onnx"
+EMBEDDING_BACKENDS = (TORCH, ONNX)
+
+# Dynamic int8 quantization targets known to sentence-transformers / optimum
+QUANTIZATION_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+# Where an ONNX export lives inside a saved model directory
+ONNX_FILE = "onnx/model.onnx"
+
+
+def embedding_variant(backend: str | None = None, quantization: str | None = None) -> str:
+    """
+    Name of the backend variant that produces the vectors ("torch", "onnx",
+    "onnx-qint8-avx2", ...); defaults to EMBEDDING_BACKEND / EMBEDDING_ONNX_QUANTIZATION.
+    """
+    backend = (backend or settings.embedding_backend).lower()
+    if quantization is None:
+        quantization = settings.embedding_onnx_quantization
+    if backend == ONNX and quantization:
+        return f"onnx-qint8-{quantization}"
+    return backend
+
+
+def export_dir(model_name: str) -> Path:
+    """Per-model directory under EMBEDDING_ONNX_DIR holding the exported (and quantized) graphs."""
+    return Path(settings.embedding_onnx_dir) / model_name.replace("/", "__")
+
+
+def quantized_suffix(quantization: str) -> str:
+    # Passed explicitly: the exporter's default suffix depends on the target
+    # (avx2 weights are unsigned, "quint8_avx2"; the others "qint8_...")
+    return f"qint8_{quantization}"
+
+
+def quantized_file(quantization: str) -> str:
+    return f"onnx/model_{quantized_suffix(quantization)}.onnx"
+
+
+def session_options(threads: int):
+    """
+    ONNX Runtime session tuned for CPU serving: `threads` intra-op threads
+    (0 = one per physical core, ORT's default) and no inter-op pool, since
+    a sentence-transformer graph is a single chain of ops.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.inter_op_num_threads = 1
+    if threads > 0:
+        options.intra_op_num_threads = threads
+    return options
+
+
+def load_onnx_model(model_name: str, quantization: str = "", threads: int = 0):
+    """
+    SentenceTransformer running `model_name` under ONNX Runtime.
+
+    The first call exports the model to ONNX (and, with `quantization`,
+    writes a dynamically int8-quantized copy tuned for that instruction
+    set) into export_dir(); later calls and other workers load the files.
+    """
+    if quantization and quantization not in QUANTIZATION_CONFIGS:
+        raise ValueError(
+            f"Unknown EMBEDDING_ONNX_QUANTIZATION '{quantization}'. Use one of {list(QUANTIZATION_CONFIGS)} or leave it empty."
+        )
+
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    directory = export_dir(model_name)
+    if not (directory / ONNX_FILE).exists():
+        print(f"[EMBED] exporting {model_name} to ONNX in {directory}")
+        exported = SentenceTransformer(model_name, backend=ONNX)
+        directory.mkdir(parents=True, exist_ok=True)
+        exported.save_pretrained(str(directory))
+
+    file_name = ONNX_FILE
+    if quantization:
+        file_name = quantized_file(quantization)
+        if not (directory / file_name).exists():
+            print(f"[EMBED] quantizing {model_name} to int8 ({quantization})")
+            base = SentenceTransformer(str(directory), backend=ONNX, model_kwargs={"file_name": ONNX_FILE})
+            export_dynamic_quantized_onnx_model(
+                base, quantization, str(directory), file_suffix=quantized_suffix(quantization)
+            )
+
+    return SentenceTransformer(
+        str(directory),
+        backend=ONNX,
+        model_kwargs={
+            "file_name": file_name,
+            "provider": "CPUExecutionProvider",
+            "session_options": session_options(threads),
+        },
+    )
+
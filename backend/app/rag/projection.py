@@ -0,0 +1,120 @@
+# app/rag/projection.py
+
+import io
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from app.models.projection import VectorProjectionORM
+
+PCA = "pca"
+TRUNCATE = "truncate"
+PROJECTION_METHODS = (PCA, TRUNCATE)
+
+# Below this many chunks a PCA basis is noise; search stays single-stage
+MIN_FIT_ROWS = 1024
+# Refit once the corpus has grown by this factor since the last fit
+REFIT_GROWTH = 2.0
+
+
+@dataclass(frozen=True)
+class Projection:
+    """
+    Linear map from full embeddings to the coarse search space:
+    coarse = (x - mean) @ components.T
+
+    pca       components are the top principal axes of a sample of the
+              stored chunk embeddings
+    truncate  components select the first `dim` coordinates (Matryoshka-
+              trained models front-load information); mean is zero
+
+    `version` identifies the fit; chunks record which version produced
+    their coarse vector so stale ones can be re-projected.
+    """
+
+    version: int
+    method: str
+    mean: np.ndarray
+    components: np.ndarray
+    fitted_rows: int
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def source_dim(self) -> int:
+        return self.components.shape[1]
+
+    def project(self, vectors) -> np.ndarray:
+        x = np.asarray(vectors, dtype=np.float32)
+        return np.ascontiguousarray((x - self.mean) @ self.components.T, dtype=np.float32)
+
+    # ------------------------------------------------------------------
+    # Serialization (DB bytea / file alongside a local index)
+    # ------------------------------------------------------------------
+    def params_bytes(self) -> bytes:
+        buf = io.BytesIO()
+        np.savez(buf, mean=self.mean, components=self.components)
+        return buf.getvalue()
+
+    @classmethod
+    def from_params(cls, version: int, method: str, params: bytes, fitted_rows: int) -> "Projection":
+        with np.load(io.BytesIO(params)) as data:
+            return cls(version, method, data["mean"], data["components"], fitted_rows)
+
+
+def fit_projection(method: str, sample: np.ndarray, dim: int, fitted_rows: int, version: int = 0) -> Projection:
+    """Fit a projection of `method` to `dim` dimensions from sample rows."""
+    sample = np.asarray(sample, dtype=np.float32)
+    source_dim = sample.shape[1]
+    dim = min(dim, source_dim)
+
+    if method == TRUNCATE:
+        mean = np.zeros(source_dim, dtype=np.float32)
+        components = np.eye(dim, source_dim, dtype=np.float32)
+    elif method == PCA:
+        mean = sample.mean(axis=0)
+        # Rows of vt are the principal axes, by decreasing variance
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        components = vt[:dim]
+    else:
+        raise ValueError(f"Unknown COARSE_PROJECTION '{method}'. Use one of {list(PROJECTION_METHODS)}.")
+
+    return Projection(version, method, mean.astype(np.float32), components.astype(np.float32), fitted_rows)
+
+
+def needs_refit(current: Optional[Projection], method: str, dim: int, total_rows: int) -> bool:
+    if total_rows < MIN_FIT_ROWS:
+        return False
+    if current is None or current.method != method or current.dim != dim:
+        return True
+    return method == PCA and total_rows >= REFIT_GROWTH * current.fitted_rows
+
+
+def rerank(candidates, query_vec, k: int):
+    """Best k candidates by full-precision L2 distance (candidates carry .embedding)."""
+    if not candidates:
+        return []
+    query = np.asarray(query_vec, dtype=np.float32)
+    full = np.stack([c.embedding for c in candidates]).astype(np.float32, copy=False)
+    diff = full - query
+    order = np.argsort(np.einsum("ij,ij->i", diff, diff), kind="stable")[:k]
+    return [candidates[i] for i in order]
+
+
+# --------------------------------------------------------------------------------------
+# STORAGE (vector_projections table)
+# --------------------------------------------------------------------------------------
+
+LATEST_PROJECTION_STMT = (
+    select(VectorProjectionORM).order_by(VectorProjectionORM.version.desc()).limit(1)
+)
+
+
+def projection_from_row(row: Optional[VectorProjectionORM]) -> Optional[Projection]:
+    if row is None:
+        return None
+    return Projection.from_params(row.version, row.method, row.params, row.fitted_rows)
@@ -1,11 +1,95 @@
 # app/rag/retriever.py
 
-from typing import List
-from sqlalchemy import select
+import asyncio
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.config.settings import get_settings
 from app.models.chunk import ChunkORM
 from app.models.query import UsedChunk
+from app.observability.metrics import COARSE_RETRIEVAL, LEXICAL_FAST_PATH
+from app.rag.lexical import is_identifier_query, rrf_fuse
+from app.rag.projection import rerank
+from app.rag.vector_backends import get_vector_backend
+
+settings = get_settings()
+
+
+def _embed_question(question: str, embedder):
+    # Embed question → embedder expects a list, returns a (1, dim) float32 array
+    vectors = embedder.embed_array([question])
+
+    if vectors.ndim != 2 or vectors.shape[0] != 1:
+        raise ValueError(f"Invalid embedding returned from embedder: shape={vectors.shape}")
+
+    return vectors[0]
+
+
+def _embed_questions(questions: Sequence[str], embedder) -> np.ndarray:
+    # All questions in a single encode call → (n, dim) float32 array
+    vectors = embedder.embed_array(list(questions))
+
+    if vectors.ndim != 2 or vectors.shape[0] != len(questions):
+        raise ValueError(f"Invalid embedding returned from embedder: shape={vectors.shape}")
+
+    return vectors
+
+
+def _hybrid_enabled() -> bool:
+    return settings.retrieval_mode.lower() == "hybrid"
+
+
+def _coarse_enabled() -> bool:
+    return settings.coarse_projection.lower() != "none"
+
+
+def _reranked(candidates, query_vec, k: int):
+    """Re-rank coarse candidates, or None if too few came back to trust them."""
+    if len(candidates) < k:
+        COARSE_RETRIEVAL.labels(result="fallback").inc()
+        return None
+    COARSE_RETRIEVAL.labels(result="reranked").inc()
+    return rerank(candidates, query_vec, k)
+
+
+def _vector_search(backend, query_vec, allowed_product_tags: List[str], k: int, db):
+    """
+    Top-k by L2 distance. With a coarse projection, over-fetch k *
+    COARSE_OVERFETCH candidates in the projected space and re-rank them
+    with the full vectors; fall back to a single-stage search when the
+    projection is missing or the tag filter leaves fewer than k candidates.
+    """
+    projection = backend.projection(db) if _coarse_enabled() else None
+    if projection is not None:
+        n = k * settings.coarse_overfetch
+        candidates = backend.coarse_search(
+            projection.project(query_vec), projection, allowed_product_tags, n, db=db
+        )
+        hits = _reranked(candidates, query_vec, k)
+        if hits is not None:
+            return hits
+    return backend.search(query_vec, allowed_product_tags, k, db=db)
+
+
+async def _avector_search(backend, query_vec, allowed_product_tags: List[str], k: int, db):
+    projection = await backend.aprojection(db) if _coarse_enabled() else None
+    if projection is not None:
+        n = k * settings.coarse_overfetch
+        candidates = await backend.acoarse_search(
+            projection.project(query_vec), projection, allowed_product_tags, n, db=db
+        )
+        hits = _reranked(candidates, query_vec, k)
+        if hits is not None:
+            return hits
+    return await backend.asearch(query_vec, allowed_product_tags, k, db=db)
+
+
+def _fast_path_result(hits):
+    LEXICAL_FAST_PATH.labels(result="hit" if hits else "miss").inc()
+    return hits
 
 
 def retrieve_relevant_chunks(
@@ -16,25 +100,99 @@ def retrieve_relevant_chunks(
     k: int = 10,
 ):
     """
-    Retrieve top-k relevant chunks using pgvector L2 distance.
+    Retrieve top-k relevant chunks using the vector backend selected by
+    VECTOR_INDEX_TYPE (pgvector or in-process).
+
+    Vector search may run coarse-to-fine (COARSE_PROJECTION, see
+    _vector_search). RETRIEVAL_MODE=vector ranks by L2 distance only. In hybrid mode the
+    vector and lexical rankings (HYBRID_CANDIDATES deep each) are merged
+    by reciprocal-rank fusion, and identifier-only questions ("TCK-1042")
+    are answered from the lexical index without embedding the question;
+    if that finds nothing, the hybrid search runs as usual.
     """
+    backend = get_vector_backend()
+    if not _hybrid_enabled():
+        return _vector_search(backend, _embed_question(question, embedder), allowed_product_tags, k, db)
+
+    if is_identifier_query(question):
+        hits = _fast_path_result(backend.lexical_search(question, allowed_product_tags, k, db=db))
+        if hits:
+            return hits
 
-    # Embed question → embedder expects a list
-    vectors = embedder.embed([question])
+    depth = max(k, settings.hybrid_candidates)
+    vector_hits = _vector_search(backend, _embed_question(question, embedder), allowed_product_tags, depth, db)
+    lexical_hits = backend.lexical_search(question, allowed_product_tags, depth, db=db)
+    return rrf_fuse([vector_hits, lexical_hits], k, settings.hybrid_rrf_k)
 
-    if not vectors or not isinstance(vectors[0], list):
-        raise ValueError(f"Invalid embedding returned from embedder: {vectors}")
 
-    embedding_vector = vectors[0]
+async def aretrieve_relevant_chunks(
+    question: str,
+    embedder,
+    db: AsyncSession,
+    allowed_product_tags: List[str],
+    k: int = 10,
+):
+    """
+    Async variant of retrieve_relevant_chunks().
+    The model forward pass runs in a worker thread; a pgvector query
+    runs on the AsyncSession without holding a thread.
+    """
+    backend = get_vector_backend()
+    if not _hybrid_enabled():
+        embedding_vector = await asyncio.to_thread(_embed_question, question, embedder)
+        return await _avector_search(backend, embedding_vector, allowed_product_tags, k, db)
+
+    if is_identifier_query(question):
+        hits = _fast_path_result(await backend.alexical_search(question, allowed_product_tags, k, db=db))
+        if hits:
+            return hits
+
+    # One AsyncSession cannot run two statements at once, so the lexical
+    # query goes after the vector one rather than alongside it
+    depth = max(k, settings.hybrid_candidates)
+    embedding_vector = await asyncio.to_thread(_embed_question, question, embedder)
+    vector_hits = await _avector_search(backend, embedding_vector, allowed_product_tags, depth, db)
+    lexical_hits = await backend.alexical_search(question, allowed_product_tags, depth, db=db)
+    return rrf_fuse([vector_hits, lexical_hits], k, settings.hybrid_rrf_k)
+
+
+async def aretrieve_relevant_chunks_batch(
+    questions: Sequence[str],
+    embedder,
+    db: AsyncSession,
+    allowed_product_tags: List[str],
+    k: int = 10,
+) -> Tuple[np.ndarray, List[List[ChunkORM]]]:
+    """
+    aretrieve_relevant_chunks() for many questions sharing one RBAC scope:
+    one encode call for all questions, one batched vector search (a single
+    LATERAL query on pgvector) and, in hybrid mode, one batched lexical
+    search, fused per question.
+
+    Identifier questions still prefer their lexical hits, but every
+    question is embedded (the batch pays for one forward pass either way).
+    The coarse-to-fine stage is not used here: each question searches
+    the full vectors directly.
+
+    Returns the question vectors alongside the chunks so callers can reuse
+    them (e.g. for the answer cache).
+    """
+    backend = get_vector_backend()
+    vectors = await asyncio.to_thread(_embed_questions, questions, embedder)
+    if not _hybrid_enabled():
+        return vectors, await backend.asearch_batch(vectors, allowed_product_tags, k, db=db)
 
-    stmt = (
-        select(ChunkORM)
-        .where(ChunkORM.product_tag.in_(allowed_product_tags))
-        .order_by(ChunkORM.embedding.l2_distance(embedding_vector))
-        .limit(k)
-    )
+    depth = max(k, settings.hybrid_candidates)
+    vector_hits = await backend.asearch_batch(vectors, allowed_product_tags, depth, db=db)
+    lexical_hits = await backend.alexical_search_batch(questions, allowed_product_tags, depth, db=db)
 
-    return db.execute(stmt).scalars().all()
+    results = []
+    for question, vector_list, lexical_list in zip(questions, vector_hits, lexical_hits):
+        if is_identifier_query(question) and _fast_path_result(lexical_list[:k]):
+            results.append(lexical_list[:k])
+        else:
+            results.append(rrf_fuse([vector_list, lexical_list], k, settings.hybrid_rrf_k))
+    return vectors, results
 
 
 def chunks_to_used_chunks(chunks: list[ChunkORM]) -> list[UsedChunk]:
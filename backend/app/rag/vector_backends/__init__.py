@@ -0,0 +1,68 @@
+# app/rag/vector_backends/__init__.py
+
+import os
+from functools import lru_cache
+
+from app.config.settings import get_settings
+from app.rag.vector_backends.base import VectorBackend
+
+settings = get_settings()
+
+# VECTOR_INDEX_TYPE values that search the chunks table in PostgreSQL
+PGVECTOR_INDEX_TYPES = ("hnsw", "ivfflat", "pgvector")
+
+# In-process index types -> whether to train an IVF quantizer
+LOCAL_INDEX_TYPES = {"local_ivf": True, "local_flat": False}
+
+
+@lru_cache()
+def get_vector_backend() -> VectorBackend:
+    """Process-wide vector backend selected by VECTOR_INDEX_TYPE."""
+    kind = settings.vector_index_type.lower()
+    quantization = settings.vector_quantization
+
+    if kind in PGVECTOR_INDEX_TYPES:
+        from app.rag.vector_backends.pgvector_backend import PgVectorBackend
+        from app.rag.vector_backends.planner import RetrievalPlanner
+        from app.rag.vector_backends.quantization import PGVECTOR_QUANTIZATIONS, check_quantization
+
+        quantization = check_quantization(quantization, PGVECTOR_QUANTIZATIONS)
+        planner = None
+        if settings.retrieval_planner_enabled:
+            planner = RetrievalPlanner(
+                exact_max_rows=settings.retrieval_exact_max_rows,
+                ef_search_max=settings.retrieval_ef_search_max,
+                stats_ttl_seconds=settings.retrieval_stats_ttl_seconds,
+                quantization=quantization,
+                rescore_factor=settings.vector_rescore_factor,
+            )
+        return PgVectorBackend(
+            planner,
+            settings.retrieval_partial_index_min_rows,
+            quantization=quantization,
+            rescore_factor=settings.vector_rescore_factor,
+            projection_ttl_seconds=settings.retrieval_stats_ttl_seconds,
+        )
+
+    if kind in LOCAL_INDEX_TYPES:
+        from app.rag.vector_backends.local_backend import LocalVectorBackend
+
+        return LocalVectorBackend(
+            directory=os.path.expanduser(settings.vector_index_dir),
+            dim=settings.embedding_dim,
+            use_ivf=LOCAL_INDEX_TYPES[kind],
+            nlist=settings.local_ivf_nlist,
+            nprobe=settings.local_ivf_nprobe,
+            quantization=quantization,
+            rescore_factor=settings.vector_rescore_factor,
+        )
+
+    raise ValueError(
+        f"Unknown VECTOR_INDEX_TYPE '{settings.vector_index_type}'. "
+        f"Use one of {list(PGVECTOR_INDEX_TYPES) + list(LOCAL_INDEX_TYPES)}."
+    )
+
+
+def uses_database() -> bool:
+    """True when query-time retrieval needs PostgreSQL."""
+    return settings.vector_index_type.lower() in PGVECTOR_INDEX_TYPES
@@ -0,0 +1,149 @@
+# app/rag/vector_backends/base.py
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.models.chunk import ChunkORM
+from app.rag.projection import Projection
+
+
+class VectorBackend:
+    """
+    Where chunk vectors live and how top-k search over them runs.
+
+    search()/asearch() return ChunkORM objects ordered by ascending L2
+    distance, restricted to `allowed_product_tags`; the *_batch variants
+    answer several queries at once. lexical_search() ranks
+    by keyword relevance instead; backends without a lexical index return
+    nothing, so hybrid retrieval degrades to vector-only.
+
+    Backends that support two-stage retrieval expose the current
+    Projection and coarse_search(): top-n in the projected space, with full
+    embeddings loaded so the retriever can re-rank.
+
+    The ingestion hooks are called after each committed batch; backends
+    that search the chunks table directly ignore them.
+    """
+
+    name = "base"
+
+    def search(
+        self,
+        query_vec: np.ndarray,
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        raise NotImplementedError
+
+    async def asearch(
+        self,
+        query_vec: np.ndarray,
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        raise NotImplementedError
+
+    def search_batch(
+        self,
+        query_vecs: Sequence[np.ndarray],
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[List[ChunkORM]]:
+        """One top-k list per query vector; database backends override this to use one round trip."""
+        return [self.search(q, allowed_product_tags, k, db=db) for q in query_vecs]
+
+    async def asearch_batch(
+        self,
+        query_vecs: Sequence[np.ndarray],
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[List[ChunkORM]]:
+        return [await self.asearch(q, allowed_product_tags, k, db=db) for q in query_vecs]
+
+    def lexical_search(
+        self,
+        question: str,
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        return []
+
+    async def alexical_search(
+        self,
+        question: str,
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        return self.lexical_search(question, allowed_product_tags, k, db=db)
+
+    def lexical_search_batch(
+        self,
+        questions: Sequence[str],
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[List[ChunkORM]]:
+        return [self.lexical_search(q, allowed_product_tags, k, db=db) for q in questions]
+
+    async def alexical_search_batch(
+        self,
+        questions: Sequence[str],
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[List[ChunkORM]]:
+        return [await self.alexical_search(q, allowed_product_tags, k, db=db) for q in questions]
+
+    # ------------------------------------------------------------------
+    # Coarse-to-fine retrieval
+    # ------------------------------------------------------------------
+    def projection(self, db=None) -> Optional[Projection]:
+        return None
+
+    async def aprojection(self, db=None) -> Optional[Projection]:
+        return self.projection(db)
+
+    def coarse_search(
+        self,
+        coarse_vec: np.ndarray,
+        projection: Projection,
+        allowed_product_tags: List[str],
+        n: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        raise NotImplementedError
+
+    async def acoarse_search(
+        self,
+        coarse_vec: np.ndarray,
+        projection: Projection,
+        allowed_product_tags: List[str],
+        n: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------
+    # Ingestion hooks
+    # ------------------------------------------------------------------
+    def upsert(self, chunks: Sequence[Dict[str, Any]], embeddings: Sequence[Any]) -> None:
+        """(Re-)embedded chunk payloads, as built by the chunker."""
+
+    def refresh(self, chunks: Sequence[Dict[str, Any]]) -> None:
+        """Chunks whose vector is unchanged but whose tag/metadata may differ."""
+
+    def truncate(self, chunk_counts: Dict[str, int]) -> None:
+        """Drop chunks with chunk_index >= the ticket's new chunk count."""
+
+    def set_projection(self, projection: Optional[Projection]) -> None:
+        """Projection (re)fitted by ingestion; re-project stored vectors if it changed."""
+
+    def flush(self, db=None) -> None:
+        """End of an ingestion run: persist / refresh derived state."""
@@ -0,0 +1,84 @@
+# app/rag/vector_backends/bm25.py
+
+import math
+from collections import Counter
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class BM25Index:
+    """
+    Incremental inverted index with Okapi BM25 scoring.
+
+    Documents are integer row ids (the local backend's vector rows), so
+    the same row can be re-indexed in place when a chunk changes.
+    `allowed(rows)` passed to search() returns a boolean mask and is how
+    the caller applies the product_tag filter before ranking.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, row: int, tokens: Sequence[str]) -> None:
+        self.remove(row)
+        counts = Counter(tokens)
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[row] = tf
+        self._doc_terms[row] = tuple(counts)
+        self._doc_len[row] = len(tokens)
+        self._total_len += len(tokens)
+
+    def remove(self, row: int) -> None:
+        terms = self._doc_terms.pop(row, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings[term]
+            del posting[row]
+            if not posting:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(row)
+
+    def search(
+        self,
+        tokens: Sequence[str],
+        k: int,
+        allowed: Callable[[np.ndarray], np.ndarray],
+    ) -> List[int]:
+        n_docs = len(self._doc_len)
+        if not n_docs or k <= 0:
+            return []
+
+        avg_len = self._total_len / n_docs
+        scores: Dict[int, float] = {}
+        for term in set(tokens):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for row, tf in posting.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_len[row] / avg_len)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        if not scores:
+            return []
+
+        rows = np.fromiter(scores, dtype=np.int64, count=len(scores))
+        values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        mask = allowed(rows)
+        rows, values = rows[mask], values[mask]
+
+        if len(rows) > k:
+            part = np.argpartition(-values, k - 1)[:k]
+            rows, values = rows[part], values[part]
+        return rows[np.argsort(-values, kind="stable")].tolist()
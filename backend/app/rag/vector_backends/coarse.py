@@ -0,0 +1,94 @@
+# app/rag/vector_backends/coarse.py
+
+from typing import Sequence
+
+import numpy as np
+from pgvector.sqlalchemy import VECTOR
+from sqlalchemy import cast, literal, select, text
+from sqlalchemy.orm import Session
+
+from app.models.chunk import ChunkORM
+from app.models.vector_type import NumpyVector
+from app.rag.projection import Projection
+from app.rag.vector_backends.planner import index_exists
+from app.rag.vector_backends.quantization import CodeStore
+
+# --------------------------------------------------------------------------------------
+# PGVECTOR
+# --------------------------------------------------------------------------------------
+# chunks.embedding_coarse has no fixed dimension in the schema; the HNSW
+# index is an expression index with the dimension of the current projection.
+
+
+def coarse_index_name(dim: int) -> str:
+    return f"idx_chunks_coarse_hnsw_{int(dim)}"
+
+
+def coarse_stmt(coarse_vec, projection: Projection, allowed_product_tags: Sequence[str], n: int):
+    """
+    Top-n chunks by distance in the projected space. Full embeddings are
+    loaded (not deferred) because the caller re-ranks with them.
+    """
+    dim = projection.dim
+    column = cast(ChunkORM.embedding_coarse, VECTOR(dim))
+    query = cast(literal(np.asarray(coarse_vec, dtype=np.float32), NumpyVector(dim)), VECTOR(dim))
+    return (
+        select(ChunkORM)
+        .where(ChunkORM.product_tag.in_(list(allowed_product_tags)))
+        .where(ChunkORM.projection_version == projection.version)
+        .order_by(column.l2_distance(query))
+        .limit(n)
+    )
+
+
+def ensure_coarse_index(db: Session, dim: int) -> bool:
+    """CREATE INDEX CONCURRENTLY the coarse HNSW index for `dim` if missing."""
+    name = coarse_index_name(dim)
+    if index_exists(db, name):
+        return False
+
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON chunks USING hnsw ((embedding_coarse::vector({int(dim)})) vector_l2_ops)"
+        ))
+    return True
+
+
+def drop_coarse_index(db: Session, dim: int) -> None:
+    """
+    Drop the coarse index of an old dimension inside the caller's
+    transaction: its cast would fail once rows hold vectors of a new size.
+    """
+    db.execute(text(f"DROP INDEX IF EXISTS {coarse_index_name(dim)}"))
+
+
+# --------------------------------------------------------------------------------------
+# IN-PROCESS
+# --------------------------------------------------------------------------------------
+
+class ProjectedStore(CodeStore):
+    """
+    Memory-mapped coarse vectors of the local backend (float32[capacity, d]).
+    write() takes full embeddings and projects them; distances() takes a
+    query that is already projected.
+    """
+
+    mode = "coarse"
+    suffix = "coarse"
+
+    def __init__(self, directory, projection: Projection, capacity: int):
+        self.projection = projection
+        super().__init__(directory, projection.dim, capacity)
+
+    @property
+    def row_bytes(self) -> int:
+        return self.dim * 4
+
+    def write(self, rows, vectors):
+        coarse = self.projection.project(vectors)
+        self.codes[rows] = coarse.view(np.uint8).reshape(len(rows), -1)
+
+    def distances(self, rows, query):
+        diff = self.codes[rows].view(np.float32) - query
+        return np.einsum("ij,ij->i", diff, diff)
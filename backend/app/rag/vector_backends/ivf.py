@@ -0,0 +1,113 @@
+# app/rag/vector_backends/ivf.py
+
+from typing import List, Optional
+
+import numpy as np
+
+
+# --------------------------------------------------------------------------------------
+# K-MEANS (coarse quantizer training)
+# --------------------------------------------------------------------------------------
+
+def nearest_centroids(x: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+    """Index of the closest centroid (L2) for every row of x, in row blocks."""
+    c_norms = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(x), dtype=np.int32)
+    for start in range(0, len(x), block):
+        xb = x[start:start + block]
+        # ||x - c||² = ||x||² - 2 x·c + ||c||²; ||x||² is constant per row
+        out[start:start + block] = np.argmin(c_norms[None, :] - 2.0 * (xb @ centroids.T), axis=1)
+    return out
+
+
+def train_kmeans(x: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Plain Lloyd iterations; empty clusters are re-seeded from random points."""
+    rng = np.random.default_rng(seed)
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    k = max(1, min(k, len(x)))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+
+    for _ in range(iters):
+        assign = nearest_centroids(x, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        present = np.flatnonzero(counts)
+
+        starts = np.concatenate(([0], np.cumsum(counts[present])[:-1]))
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        centroids[present] = sums / counts[present, None]
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), size=len(empty), replace=False)]
+
+    return centroids
+
+
+# --------------------------------------------------------------------------------------
+# INVERTED FILE INDEX
+# --------------------------------------------------------------------------------------
+
+class IVFIndex:
+    """
+    Inverted-file index over row ids of an external vector store.
+
+    Each row is assigned to its nearest centroid's list; a search only
+    visits the `nprobe` lists closest to the query. Lists are Python sets
+    for cheap add/remove, materialized into sorted arrays on first use
+    after a change.
+    """
+
+    def __init__(self, centroids: np.ndarray):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._lists: List[set] = [set() for _ in range(len(centroids))]
+        self._arrays: List[Optional[np.ndarray]] = [None] * len(centroids)
+        self._row_list: dict = {}
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self._row_list)
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        if len(rows) == 0:
+            return
+        for row, list_id in zip(rows.tolist(), nearest_centroids(vectors, self.centroids).tolist()):
+            self.remove_one(row)
+            self._lists[list_id].add(row)
+            self._arrays[list_id] = None
+            self._row_list[row] = list_id
+
+    def remove_one(self, row: int) -> None:
+        list_id = self._row_list.pop(row, None)
+        if list_id is not None:
+            self._lists[list_id].discard(row)
+            self._arrays[list_id] = None
+
+    def assignments(self, rows: np.ndarray) -> np.ndarray:
+        """List id per row (-1 if not indexed); used for persistence."""
+        return np.array([self._row_list.get(r, -1) for r in rows.tolist()], dtype=np.int32)
+
+    def restore(self, rows: np.ndarray, list_ids: np.ndarray) -> None:
+        for row, list_id in zip(rows.tolist(), list_ids.tolist()):
+            if list_id >= 0:
+                self._lists[list_id].add(row)
+                self._row_list[row] = list_id
+        self._arrays = [None] * self.nlist
+
+    def probe_order(self, query: np.ndarray) -> np.ndarray:
+        """List ids sorted by centroid distance to the query."""
+        d = np.einsum("ij,ij->i", self.centroids, self.centroids) - 2.0 * (self.centroids @ query)
+        return np.argsort(d)
+
+    def rows_in(self, list_ids: np.ndarray) -> np.ndarray:
+        parts = []
+        for list_id in list_ids.tolist():
+            arr = self._arrays[list_id]
+            if arr is None:
+                arr = np.fromiter(self._lists[list_id], dtype=np.int64, count=len(self._lists[list_id]))
+                self._arrays[list_id] = arr
+            parts.append(arr)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
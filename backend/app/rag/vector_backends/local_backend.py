@@ -0,0 +1,634 @@
+# app/rag/vector_backends/local_backend.py
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.chunk import ChunkORM
+from app.rag.lexical import tokenize
+from app.rag.projection import Projection
+from app.rag.vector_backends.base import VectorBackend
+from app.rag.vector_backends.bm25 import BM25Index
+from app.rag.vector_backends.coarse import ProjectedStore
+from app.rag.vector_backends.ivf import IVFIndex, train_kmeans
+from app.rag.vector_backends.quantization import CODE_STORES, NONE, CodeStore, check_quantization
+
+
+class LocalVectorBackend(VectorBackend):
+    """
+    In-process vector index: no database round trip at query time.
+
+    Storage (all under `directory`):
+        vectors.f32  float32[capacity, dim] memory-mapped, grown by doubling
+        rows.json    chunk payload per row (null = free row)
+        state.npz    IVF centroids + list assignment per row
+        codes.*      optional quantized copy of vectors.f32 (f16 / i8 / b1)
+        projection.npz + codes.coarse
+                     coarse-retrieval projection fitted by ingestion and the
+                     projected vectors (float32[capacity, d])
+
+    Rows are keyed by (ticket_id, chunk_index), so re-ingesting a chunk
+    overwrites its vector in place and freed rows are reused. Search is
+    filtered by product_tag before distances are computed.
+
+    With use_ivf=True an IVF coarse quantizer (k-means over NumPy) is
+    trained on flush() once the index holds MIN_TRAIN_ROWS vectors and
+    retrained when it has doubled since; until then, and with
+    use_ivf=False, search is an exact scan over the allowed tags' rows.
+
+    With a quantization mode, distances are first computed on the compact
+    codes and the best k * rescore_factor rows are rescored against the
+    float32 vectors, so only those rows of vectors.f32 are paged in.
+
+    A BM25 inverted index over chunk text, ticket id, product tag and
+    ticket tags serves lexical_search(); it is rebuilt from rows.json on
+    load rather than persisted.
+
+    Vectors are written in place while rows.json/state.npz are replaced
+    atomically on flush(); after a crash mid-ingestion, rebuild from the
+    chunks table (`python -m app.rag.vector_backends.local_backend --rebuild`).
+    """
+
+    name = "local"
+
+    VECTORS_FILE = "vectors.f32"
+    ROWS_FILE = "rows.json"
+    STATE_FILE = "state.npz"
+    PROJECTION_FILE = "projection.npz"
+
+    INITIAL_CAPACITY = 1024
+    MIN_TRAIN_ROWS = 1024
+    TRAIN_SAMPLE_PER_LIST = 256
+
+    def __init__(
+        self,
+        directory: str | Path,
+        dim: int,
+        use_ivf: bool = True,
+        nlist: int = 0,
+        nprobe: int = 8,
+        quantization: str = NONE,
+        rescore_factor: int = 4,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.use_ivf = use_ivf
+        self.nlist = nlist
+        self.nprobe = max(1, nprobe)
+        self.quantization = check_quantization(quantization)
+        self.rescore_factor = max(1, rescore_factor)
+
+        self._lock = threading.RLock()
+        self._dirty = False
+
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._row_of: Dict[Tuple[str, int], int] = {}
+        self._free: List[int] = []
+
+        self._tags: List[str] = []
+        self._tag_index: Dict[str, int] = {}
+        self._tag_rows: Dict[int, set] = {}
+        self._tag_arrays: Dict[int, np.ndarray] = {}
+
+        self._ivf: Optional[IVFIndex] = None
+        self._bm25 = BM25Index()
+        self._projection: Optional[Projection] = None
+        self._coarse: Optional[ProjectedStore] = None
+        self._trained_rows = 0
+
+        self._open_vectors()
+        self._tag_ids = np.full(self._capacity, -1, dtype=np.int32)
+        self._codes: Optional[CodeStore] = None
+        if self.quantization != NONE:
+            self._codes = CODE_STORES[self.quantization](self.directory, dim, self._capacity)
+        self._load()
+        if self._dirty:
+            self.flush()  # persist codes re-encoded on load
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    @property
+    def _vectors_path(self) -> Path:
+        return self.directory / self.VECTORS_FILE
+
+    def _open_vectors(self) -> None:
+        row_bytes = self.dim * 4
+        path = self._vectors_path
+        if not path.exists():
+            with open(path, "wb") as fh:
+                fh.truncate(self.INITIAL_CAPACITY * row_bytes)
+
+        size = path.stat().st_size
+        if size % row_bytes:
+            raise ValueError(f"{path} does not hold {self.dim}-dim float32 rows")
+
+        self._capacity = size // row_bytes
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(self._capacity, self.dim))
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+
+        new_capacity = max(rows, 2 * self._capacity, self.INITIAL_CAPACITY)
+        self._vectors.flush()
+        del self._vectors
+        with open(self._vectors_path, "r+b") as fh:
+            fh.truncate(new_capacity * self.dim * 4)
+        self._open_vectors()
+
+        grown = np.full(self._capacity, -1, dtype=np.int32)
+        grown[: len(self._tag_ids)] = self._tag_ids
+        self._tag_ids = grown
+        if self._codes is not None:
+            self._codes.resize(self._capacity)
+        if self._coarse is not None:
+            self._coarse.resize(self._capacity)
+
+    def _load(self) -> None:
+        rows_path = self.directory / self.ROWS_FILE
+        if not rows_path.exists():
+            return
+
+        with open(rows_path, encoding="utf-8") as fh:
+            payloads = json.load(fh)
+
+        self._ensure_capacity(len(payloads))
+        self._payloads = [None] * len(payloads)
+        for row, payload in enumerate(payloads):
+            if payload is None:
+                self._free.append(row)
+            else:
+                self._set_payload(row, payload)
+
+        state_path = self.directory / self.STATE_FILE
+        stored_quantization = NONE
+        if state_path.exists():
+            with np.load(state_path) as state:
+                if "quantization" in state:
+                    stored_quantization = str(state["quantization"])
+
+        if self._codes is not None and (self._codes.fresh or stored_quantization != self.quantization):
+            # Codes missing or written while another mode was active
+            self._reencode(self._codes)
+            self._dirty = True
+
+        projection_path = self.directory / self.PROJECTION_FILE
+        if projection_path.exists():
+            with np.load(projection_path) as data:
+                projection = Projection(
+                    int(data["version"]), str(data["method"]), data["mean"], data["components"],
+                    int(data["fitted_rows"]),
+                )
+            if projection.source_dim == self.dim:
+                self._open_coarse(projection, reproject=False)
+
+        if self.use_ivf and state_path.exists():
+            with np.load(state_path) as state:
+                if state["centroids"].shape == (len(state["centroids"]), self.dim) and len(state["centroids"]):
+                    self._ivf = IVFIndex(state["centroids"])
+                    assign = state["assign"]
+                    rows = np.arange(len(assign))
+                    alive = np.array([p is not None for p in self._payloads[: len(assign)]], dtype=bool)
+                    self._ivf.restore(rows[alive], assign[alive])
+                    self._trained_rows = int(state["trained_rows"])
+
+    def _atomic_write(self, name: str, write) -> None:
+        tmp = self.directory / f".{name}.tmp"
+        with open(tmp, "wb") as fh:
+            write(fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.directory / name)
+
+    # ------------------------------------------------------------------
+    # Row bookkeeping (caller holds the lock)
+    # ------------------------------------------------------------------
+    def _tag_id(self, tag: str) -> int:
+        tag_id = self._tag_index.get(tag)
+        if tag_id is None:
+            tag_id = len(self._tags)
+            self._tags.append(tag)
+            self._tag_index[tag] = tag_id
+            self._tag_rows[tag_id] = set()
+        return tag_id
+
+    def _allocate_row(self, key: Tuple[str, int]) -> int:
+        row = self._row_of.get(key)
+        if row is not None:
+            return row
+        if self._free:
+            return self._free.pop()
+        self._payloads.append(None)
+        return len(self._payloads) - 1
+
+    def _set_payload(self, row: int, chunk: Dict[str, Any]) -> None:
+        key = (chunk["ticket_id"], int(chunk["chunk_index"]))
+        payload = {
+            "id": chunk.get("id") or str(uuid.uuid5(uuid.NAMESPACE_URL, f"{key[0]}:{key[1]}")),
+            "ticket_id": key[0],
+            "product_tag": chunk["product_tag"],
+            "chunk_index": key[1],
+            "text": chunk["text"],
+            "metadata": chunk.get("metadata"),
+        }
+
+        old_tag = self._tag_ids[row]
+        new_tag = self._tag_id(payload["product_tag"])
+        if old_tag != new_tag:
+            if old_tag >= 0:
+                self._tag_rows[old_tag].discard(row)
+                self._tag_arrays.pop(old_tag, None)
+            self._tag_rows[new_tag].add(row)
+            self._tag_arrays.pop(new_tag, None)
+            self._tag_ids[row] = new_tag
+
+        if self._payloads[row] != payload:
+            self._bm25.add(row, _lexical_tokens(payload))
+
+        self._payloads[row] = payload
+        self._row_of[key] = row
+
+    def _remove_row(self, row: int) -> None:
+        payload = self._payloads[row]
+        if payload is None:
+            return
+
+        del self._row_of[(payload["ticket_id"], payload["chunk_index"])]
+        tag_id = self._tag_ids[row]
+        self._tag_rows[tag_id].discard(row)
+        self._tag_arrays.pop(tag_id, None)
+        self._tag_ids[row] = -1
+        self._payloads[row] = None
+        self._bm25.remove(row)
+        if self._ivf is not None:
+            self._ivf.remove_one(row)
+        self._free.append(row)
+
+    def _rows_for_tags(self, tag_ids: List[int]) -> np.ndarray:
+        parts = []
+        for tag_id in tag_ids:
+            arr = self._tag_arrays.get(tag_id)
+            if arr is None:
+                rows = self._tag_rows[tag_id]
+                arr = np.fromiter(rows, dtype=np.int64, count=len(rows))
+                self._tag_arrays[tag_id] = arr
+            parts.append(arr)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _alive_rows(self) -> np.ndarray:
+        return np.fromiter(self._row_of.values(), dtype=np.int64, count=len(self._row_of))
+
+    # ------------------------------------------------------------------
+    # Ingestion hooks
+    # ------------------------------------------------------------------
+    def upsert(self, chunks: Sequence[Dict[str, Any]], embeddings: Sequence[Any]) -> None:
+        if not len(chunks):
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(chunks), self.dim)
+        with self._lock:
+            rows = np.array(
+                [self._allocate_row((c["ticket_id"], int(c["chunk_index"]))) for c in chunks],
+                dtype=np.int64,
+            )
+            self._ensure_capacity(len(self._payloads))
+            self._vectors[rows] = vectors
+            if self._codes is not None:
+                self._codes.write(rows, vectors)
+            if self._coarse is not None:
+                self._coarse.write(rows, vectors)
+            for row, chunk in zip(rows.tolist(), chunks):
+                self._set_payload(row, chunk)
+            if self._ivf is not None:
+                self._ivf.add(rows, vectors)
+            self._dirty = True
+
+    def refresh(self, chunks: Sequence[Dict[str, Any]]) -> None:
+        with self._lock:
+            for chunk in chunks:
+                row = self._row_of.get((chunk["ticket_id"], int(chunk["chunk_index"])))
+                if row is not None:
+                    self._set_payload(row, chunk)
+                    self._dirty = True
+
+    def truncate(self, chunk_counts: Dict[str, int]) -> None:
+        with self._lock:
+            for ticket_id, n_chunks in chunk_counts.items():
+                # Chunk indexes are contiguous, so stale ones start at n_chunks
+                idx = n_chunks
+                while (ticket_id, idx) in self._row_of:
+                    self._remove_row(self._row_of[(ticket_id, idx)])
+                    self._dirty = True
+                    idx += 1
+
+    def flush(self, db=None) -> None:
+        with self._lock:
+            if self.use_ivf:
+                self._maybe_train()
+            if not self._dirty:
+                return
+
+            self._vectors.flush()
+            if self._codes is not None:
+                self._codes.flush()
+            if self._coarse is not None:
+                self._coarse.flush()
+            payloads = self._payloads
+            self._atomic_write(
+                self.ROWS_FILE,
+                lambda fh: fh.write(json.dumps(payloads).encode("utf-8")),
+            )
+
+            n = len(payloads)
+            if self._ivf is not None:
+                centroids = self._ivf.centroids
+                assign = self._ivf.assignments(np.arange(n))
+            else:
+                centroids = np.empty((0, self.dim), dtype=np.float32)
+                assign = np.full(n, -1, dtype=np.int32)
+            self._atomic_write(
+                self.STATE_FILE,
+                lambda fh: np.savez(
+                    fh,
+                    centroids=centroids,
+                    assign=assign,
+                    trained_rows=np.int64(self._trained_rows),
+                    quantization=np.str_(self.quantization),
+                ),
+            )
+            self._dirty = False
+
+    def _maybe_train(self) -> None:
+        alive = len(self._row_of)
+        if alive < self.MIN_TRAIN_ROWS:
+            return
+        if self._ivf is not None and alive <= 2 * self._trained_rows:
+            return
+
+        nlist = self.nlist or max(1, int(np.sqrt(alive)))
+        rows = np.sort(self._alive_rows())
+        rng = np.random.default_rng(0)
+        sample_size = min(len(rows), nlist * self.TRAIN_SAMPLE_PER_LIST)
+        sample = np.sort(rng.choice(rows, size=sample_size, replace=False))
+
+        ivf = IVFIndex(train_kmeans(self._vectors[sample], nlist))
+        for start in range(0, len(rows), 65536):
+            block = rows[start:start + 65536]
+            ivf.add(block, self._vectors[block])
+
+        self._ivf = ivf
+        self._trained_rows = alive
+        self._dirty = True
+        print(f"[INDEX] Trained IVF over {alive} vectors with {ivf.nlist} lists.")
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def _ivf_candidates(self, query: np.ndarray, tag_ids: List[int], k: int) -> np.ndarray:
+        """
+        Rows of the nprobe nearest lists that carry an allowed tag. When the
+        tag filter leaves fewer than k, widen the probe (doubling) up to all lists.
+        """
+        order = self._ivf.probe_order(query)
+        nprobe = self.nprobe
+        while True:
+            rows = self._ivf.rows_in(order[:nprobe])
+            rows = rows[np.isin(self._tag_ids[rows], tag_ids)]
+            if len(rows) >= k or nprobe >= self._ivf.nlist:
+                return rows
+            nprobe *= 2
+
+    def _expected_probe_rows(self) -> int:
+        return self.nprobe * len(self._ivf) // max(1, self._ivf.nlist)
+
+    def _top_k(self, rows: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+        if len(rows) == 0:
+            return rows
+
+        rows = np.sort(rows)  # sequential memmap reads
+        candidates = k * self.rescore_factor
+        if self._codes is not None and len(rows) > candidates:
+            coarse = self._codes.distances(rows, query)
+            rows = np.sort(rows[np.argpartition(coarse, candidates - 1)[:candidates]])
+
+        diff = self._vectors[rows] - query
+        dist = np.einsum("ij,ij->i", diff, diff)
+
+        if len(rows) > k:
+            part = np.argpartition(dist, k - 1)[:k]
+            rows, dist = rows[part], dist[part]
+        return rows[np.argsort(dist, kind="stable")]
+
+    def _to_orm(self, row: int) -> ChunkORM:
+        p = self._payloads[row]
+        return ChunkORM(
+            id=uuid.UUID(p["id"]),
+            ticket_id=p["ticket_id"],
+            product_tag=p["product_tag"],
+            chunk_index=p["chunk_index"],
+            text=p["text"],
+            meta=p["metadata"],
+        )
+
+    def search(
+        self,
+        query_vec: np.ndarray,
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        query = np.asarray(query_vec, dtype=np.float32).ravel()
+
+        with self._lock:
+            tag_ids = [self._tag_index[t] for t in set(allowed_product_tags) if t in self._tag_index]
+            if not tag_ids or k <= 0:
+                return []
+
+            allowed_rows = sum(len(self._tag_rows[t]) for t in tag_ids)
+            if self._ivf is None or allowed_rows <= self._expected_probe_rows():
+                # Small partitions: an exact scan is no more work than probing
+                rows = self._rows_for_tags(tag_ids)
+            else:
+                rows = self._ivf_candidates(query, tag_ids, k)
+
+            return [self._to_orm(int(r)) for r in self._top_k(rows, query, k)]
+
+    async def asearch(
+        self,
+        query_vec: np.ndarray,
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        # NumPy releases the GIL for the distance math; keep it off the loop
+        return await asyncio.to_thread(self.search, query_vec, allowed_product_tags, k)
+
+    def lexical_search(
+        self,
+        question: str,
+        allowed_product_tags: List[str],
+        k: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        tokens = tokenize(question, parts=False)
+        with self._lock:
+            tag_ids = [self._tag_index[t] for t in set(allowed_product_tags) if t in self._tag_index]
+            if not tag_ids or not tokens:
+                return []
+
+            rows = self._bm25.search(tokens, k, lambda r: np.isin(self._tag_ids[r], tag_ids))
+            return [self._to_orm(r) for r in rows]
+
+    # ------------------------------------------------------------------
+    # Coarse-to-fine retrieval
+    # ------------------------------------------------------------------
+    def _reencode(self, store) -> None:
+        rows = np.sort(self._alive_rows())
+        for start in range(0, len(rows), 65536):
+            block = rows[start:start + 65536]
+            store.write(block, self._vectors[block])
+
+    def _open_coarse(self, projection: Projection, reproject: bool) -> None:
+        store = ProjectedStore(self.directory, projection, self._capacity)
+        if reproject or store.fresh:
+            self._reencode(store)
+            store.flush()
+        self._projection, self._coarse = projection, store
+
+    def projection(self, db=None) -> Optional[Projection]:
+        return self._projection
+
+    def set_projection(self, projection: Optional[Projection]) -> None:
+        with self._lock:
+            current = self._projection
+            if projection is None or (current is not None and current.version == projection.version):
+                return
+
+            self._coarse = None  # releases the memmap before the file is replaced
+            (self.directory / f"codes.{ProjectedStore.suffix}").unlink(missing_ok=True)
+            self._open_coarse(projection, reproject=True)
+            self._atomic_write(
+                self.PROJECTION_FILE,
+                lambda fh: np.savez(
+                    fh,
+                    version=np.int64(projection.version),
+                    method=np.str_(projection.method),
+                    mean=projection.mean,
+                    components=projection.components,
+                    fitted_rows=np.int64(projection.fitted_rows),
+                ),
+            )
+            print(f"[INDEX] Re-projected {len(self)} vectors to {projection.dim} dims (v{projection.version}).")
+
+    def coarse_search(
+        self,
+        coarse_vec: np.ndarray,
+        projection: Projection,
+        allowed_product_tags: List[str],
+        n: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        query = np.asarray(coarse_vec, dtype=np.float32).ravel()
+        with self._lock:
+            store = self._coarse
+            tag_ids = [self._tag_index[t] for t in set(allowed_product_tags) if t in self._tag_index]
+            if store is None or store.projection.version != projection.version or not tag_ids or n <= 0:
+                return []
+
+            rows = np.sort(self._rows_for_tags(tag_ids))
+            if len(rows) > n:
+                dist = store.distances(rows, query)
+                rows = np.sort(rows[np.argpartition(dist, n - 1)[:n]])
+
+            chunks = [self._to_orm(int(r)) for r in rows]
+            for chunk, vector in zip(chunks, self._vectors[rows]):
+                chunk.embedding = vector
+            return chunks
+
+    async def acoarse_search(
+        self,
+        coarse_vec: np.ndarray,
+        projection: Projection,
+        allowed_product_tags: List[str],
+        n: int,
+        db=None,
+    ) -> List[ChunkORM]:
+        return await asyncio.to_thread(self.coarse_search, coarse_vec, projection, allowed_product_tags, n)
+
+    # ------------------------------------------------------------------
+    # Rebuild from the chunks table
+    # ------------------------------------------------------------------
+    def rebuild_from_db(self, db, batch_size: int = 5000) -> int:
+        """Replace the index contents with every chunk stored in Postgres."""
+        from sqlalchemy import select
+
+        with self._lock:
+            for row in list(self._row_of.values()):
+                self._remove_row(row)
+            self._ivf = None
+            self._trained_rows = 0
+
+            total = 0
+            result = db.execute(select(ChunkORM).execution_options(yield_per=batch_size))
+            for batch in result.scalars().partitions(batch_size):
+                chunks = [
+                    {
+                        "id": str(c.id),
+                        "ticket_id": c.ticket_id,
+                        "product_tag": c.product_tag,
+                        "chunk_index": c.chunk_index,
+                        "text": c.text,
+                        "metadata": c.meta,
+                    }
+                    for c in batch
+                ]
+                self.upsert(chunks, np.stack([c.embedding for c in batch]))
+                total += len(chunks)
+
+            self._dirty = True
+            self.flush()
+            return total
+
+
+def _lexical_tokens(payload: Dict[str, Any]) -> List[str]:
+    meta = payload.get("metadata") or {}
+    fields = [payload["ticket_id"], payload["product_tag"], payload["text"], *(meta.get("tags") or [])]
+    return tokenize(" ".join(str(f) for f in fields))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the in-process vector index.")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild from the chunks table")
+    args = parser.parse_args()
+
+    from app.config.connection import SessionLocal
+    from app.rag.vector_backends import get_vector_backend
+
+    backend = get_vector_backend()
+    if not isinstance(backend, LocalVectorBackend):
+        raise SystemExit("VECTOR_INDEX_TYPE does not select a local index")
+
+    if args.rebuild:
+        db = SessionLocal()
+        try:
+            print(f"[INDEX] Rebuilt local index with {backend.rebuild_from_db(db)} chunks.")
+        finally:
+            db.close()
+    else:
+        print(f"[INDEX] {len(backend)} chunks in {backend.directory}")
+
+
+if __name__ == "__main__":
+    main()
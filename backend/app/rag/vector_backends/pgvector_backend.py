@@ -0,0 +1,299 @@
+# app/rag/vector_backends/pgvector_backend.py
+
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Integer, String, cast, column, func, select, true, values
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
+
+from app.models.chunk import ChunkORM
+from app.rag.lexical import tsquery_text
+from app.rag.projection import LATEST_PROJECTION_STMT, Projection, projection_from_row
+from app.rag.vector_backends.base import VectorBackend
+from app.rag.vector_backends.coarse import coarse_stmt, ensure_coarse_index
+from app.rag.vector_backends.planner import (
+    RetrievalPlanner,
+    ann_stmt,
+    batch_ann_stmt,
+    ef_search_stmt,
+    ensure_partial_indexes,
+    ensure_quantized_index,
+    group_batch_rows,
+)
+from app.rag.vector_backends.quantization import NONE
+
+
+class PgVectorBackend(VectorBackend):
+    """
+    Top-k search inside PostgreSQL (HNSW index from db/init.sql).
+
+    With a RetrievalPlanner, each query is planned from per-tag row counts
+    (exact partition scan / per-tag partial index / HNSW with over-fetch);
+    without one it is a single ORDER BY embedding <-> q LIMIT k. With
+    `quantization` (halfvec / binary) the approximate search runs on an
+    HNSW index over the quantized expression and is rescored in float32.
+    Lexical search uses the generated search_tsv column and its GIN index;
+    the coarse stage uses chunks.embedding_coarse and the latest row of
+    vector_projections (cached for `projection_ttl_seconds`).
+    Ingestion already writes the chunks table, so only flush() does work:
+    it refreshes planner statistics / the projection and creates missing
+    indexes.
+    """
+
+    name = "pgvector"
+
+    def __init__(
+        self,
+        planner: Optional[RetrievalPlanner] = None,
+        partial_index_min_rows: int = 0,
+        quantization: str = NONE,
+        rescore_factor: int = 4,
+        projection_ttl_seconds: float = 300,
+    ):
+        self.planner = planner
+        self.partial_index_min_rows = partial_index_min_rows
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.projection_ttl_seconds = projection_ttl_seconds
+        self._projection: Optional[Projection] = None
+        self._projection_loaded_at: Optional[float] = None
+
+    def search(
+        self,
+        query_vec: np.ndarray,
+        allowed_product_tags: List[str],
+        k: int,
+        db: Session = None,
+    ) -> List[ChunkORM]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires a DB session")
+        if self.planner is not None:
+            return self.planner.search(db, query_vec, allowed_product_tags, k)
+        stmt = ann_stmt(query_vec, allowed_product_tags, k, self.quantization, self.rescore_factor)
+        return db.execute(stmt).scalars().all()
+
+    async def asearch(
+        self,
+        query_vec: np.ndarray,
+        allowed_product_tags: List[str],
+        k: int,
+        db: AsyncSession = None,
+    ) -> List[ChunkORM]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires an AsyncSession")
+        if self.planner is not None:
+            return await self.planner.asearch(db, query_vec, allowed_product_tags, k)
+        stmt = ann_stmt(query_vec, allowed_product_tags, k, self.quantization, self.rescore_factor)
+        return (await db.execute(stmt)).scalars().all()
+
+    def search_batch(
+        self,
+        query_vecs: Sequence[np.ndarray],
+        allowed_product_tags: List[str],
+        k: int,
+        db: Session = None,
+    ) -> List[List[ChunkORM]]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires a DB session")
+        if self.planner is not None:
+            return self.planner.search_batch(db, query_vecs, allowed_product_tags, k)
+        stmt = batch_ann_stmt(query_vecs, allowed_product_tags, k, self.quantization, self.rescore_factor)
+        return group_batch_rows(db.execute(stmt).all(), len(query_vecs))
+
+    async def asearch_batch(
+        self,
+        query_vecs: Sequence[np.ndarray],
+        allowed_product_tags: List[str],
+        k: int,
+        db: AsyncSession = None,
+    ) -> List[List[ChunkORM]]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires an AsyncSession")
+        if self.planner is not None:
+            return await self.planner.asearch_batch(db, query_vecs, allowed_product_tags, k)
+        stmt = batch_ann_stmt(query_vecs, allowed_product_tags, k, self.quantization, self.rescore_factor)
+        return group_batch_rows((await db.execute(stmt)).all(), len(query_vecs))
+
+    def lexical_search(
+        self,
+        question: str,
+        allowed_product_tags: List[str],
+        k: int,
+        db: Session = None,
+    ) -> List[ChunkORM]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires a DB session")
+        stmt = lexical_stmt(question, allowed_product_tags, k)
+        return [] if stmt is None else db.execute(stmt).scalars().all()
+
+    async def alexical_search(
+        self,
+        question: str,
+        allowed_product_tags: List[str],
+        k: int,
+        db: AsyncSession = None,
+    ) -> List[ChunkORM]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires an AsyncSession")
+        stmt = lexical_stmt(question, allowed_product_tags, k)
+        return [] if stmt is None else (await db.execute(stmt)).scalars().all()
+
+    def lexical_search_batch(
+        self,
+        questions: Sequence[str],
+        allowed_product_tags: List[str],
+        k: int,
+        db: Session = None,
+    ) -> List[List[ChunkORM]]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires a DB session")
+        stmt = lexical_batch_stmt(questions, allowed_product_tags, k)
+        return group_batch_rows([] if stmt is None else db.execute(stmt).all(), len(questions))
+
+    async def alexical_search_batch(
+        self,
+        questions: Sequence[str],
+        allowed_product_tags: List[str],
+        k: int,
+        db: AsyncSession = None,
+    ) -> List[List[ChunkORM]]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires an AsyncSession")
+        stmt = lexical_batch_stmt(questions, allowed_product_tags, k)
+        return group_batch_rows([] if stmt is None else (await db.execute(stmt)).all(), len(questions))
+
+    # ------------------------------------------------------------------
+    # Coarse-to-fine retrieval
+    # ------------------------------------------------------------------
+    def _projection_fresh(self) -> bool:
+        loaded_at = self._projection_loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at < self.projection_ttl_seconds
+
+    def _remember_projection(self, row) -> Optional[Projection]:
+        self._projection = projection_from_row(row)
+        self._projection_loaded_at = time.monotonic()
+        return self._projection
+
+    def projection(self, db: Session = None) -> Optional[Projection]:
+        if self._projection_fresh() or db is None:
+            return self._projection
+        return self._remember_projection(db.execute(LATEST_PROJECTION_STMT).scalar_one_or_none())
+
+    async def aprojection(self, db: AsyncSession = None) -> Optional[Projection]:
+        if self._projection_fresh() or db is None:
+            return self._projection
+        row = (await db.execute(LATEST_PROJECTION_STMT)).scalar_one_or_none()
+        return self._remember_projection(row)
+
+    def coarse_search(
+        self,
+        coarse_vec: np.ndarray,
+        projection: Projection,
+        allowed_product_tags: List[str],
+        n: int,
+        db: Session = None,
+    ) -> List[ChunkORM]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires a DB session")
+        db.execute(ef_search_stmt(max(40, 2 * n)))
+        return db.execute(coarse_stmt(coarse_vec, projection, allowed_product_tags, n)).scalars().all()
+
+    async def acoarse_search(
+        self,
+        coarse_vec: np.ndarray,
+        projection: Projection,
+        allowed_product_tags: List[str],
+        n: int,
+        db: AsyncSession = None,
+    ) -> List[ChunkORM]:
+        if db is None:
+            raise RuntimeError("pgvector backend requires an AsyncSession")
+        await db.execute(ef_search_stmt(max(40, 2 * n)))
+        result = await db.execute(coarse_stmt(coarse_vec, projection, allowed_product_tags, n))
+        return result.scalars().all()
+
+    # ------------------------------------------------------------------
+    # Ingestion hooks
+    # ------------------------------------------------------------------
+    def set_projection(self, projection: Optional[Projection]) -> None:
+        self._projection = projection
+        self._projection_loaded_at = time.monotonic()
+
+    def flush(self, db: Session = None) -> None:
+        if db is not None and ensure_quantized_index(db, self.quantization):
+            print(f"[INDEX] Created {self.quantization} HNSW index on chunks.embedding.")
+        if db is not None and self._projection is not None and ensure_coarse_index(db, self._projection.dim):
+            print(f"[INDEX] Created {self._projection.dim}-dim coarse HNSW index on chunks.embedding_coarse.")
+
+        if self.planner is None:
+            return
+        self.planner.invalidate()
+
+        if db is not None and self.partial_index_min_rows > 0:
+            created = ensure_partial_indexes(db, self.planner.stats(db), self.partial_index_min_rows)
+            if created:
+                print(f"[INDEX] Created partial HNSW indexes for tags: {created}")
+                self.planner.invalidate()
+
+
+def _tsquery(terms):
+    return func.to_tsquery(cast("english", REGCONFIG), terms).op("||")(
+        func.to_tsquery(cast("simple", REGCONFIG), terms)
+    )
+
+
+def lexical_stmt(question: str, allowed_product_tags: List[str], k: int):
+    """
+    Full-text top-k over search_tsv, or None when the question has no
+    searchable terms. Terms are OR-ed; the 'english' query matches stemmed
+    chunk text, the 'simple' one identifiers and tags verbatim.
+    """
+    terms = tsquery_text(question)
+    if not terms:
+        return None
+
+    query = _tsquery(terms)
+    return (
+        select(ChunkORM)
+        .options(defer(ChunkORM.embedding))
+        .where(ChunkORM.product_tag.in_(list(allowed_product_tags)))
+        .where(ChunkORM.search_tsv.op("@@")(query))
+        # normalization 1: divide by 1 + log(document length)
+        .order_by(func.ts_rank_cd(ChunkORM.search_tsv, query, 1).desc())
+        .limit(k)
+    )
+
+
+def lexical_batch_stmt(questions: Sequence[str], allowed_product_tags: List[str], k: int):
+    """
+    lexical_stmt() for many questions in one statement (VALUES list of
+    query terms, LATERAL top-k each). Rows are (question index, ChunkORM);
+    None when no question has searchable terms.
+    """
+    data = [(i, terms) for i, terms in enumerate(map(tsquery_text, questions)) if terms]
+    if not data:
+        return None
+
+    queries = values(column("idx", Integer), column("terms", String), name="queries").data(data)
+    query = _tsquery(queries.c.terms)
+    chunks = ChunkORM.__table__.alias("c")
+    rank = func.ts_rank_cd(chunks.c.search_tsv, query, 1)
+    top = (
+        select(chunks.c.id.label("id"), rank.label("rank"))
+        .where(chunks.c.product_tag.in_(list(allowed_product_tags)))
+        .where(chunks.c.search_tsv.op("@@")(query))
+        .order_by(rank.desc())
+        .limit(k)
+        .lateral("top")
+    )
+    return (
+        select(queries.c.idx, ChunkORM)
+        .options(defer(ChunkORM.embedding))
+        .select_from(queries)
+        .join(top, true())
+        .join(ChunkORM, ChunkORM.id == top.c.id)
+        .order_by(queries.c.idx, top.c.rank.desc())
+    )
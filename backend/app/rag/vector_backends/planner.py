@@ -0,0 +1,517 @@
+# app/rag/vector_backends/planner.py
+
+import hashlib
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pgvector.sqlalchemy import VECTOR
+from sqlalchemy import Integer, bindparam, cast, column, func, select, text, true, union_all, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
+
+from app.models.chunk import ChunkORM
+from app.models.vector_type import NumpyVector
+from app.observability.metrics import RETRIEVAL_PLANS
+from app.rag.vector_backends.quantization import (
+    NONE,
+    QUANTIZED_INDEX_NAMES,
+    quantized_distance,
+    quantized_index_ddl,
+)
+
+EXACT = "exact"
+PARTIAL_INDEX = "partial_index"
+HNSW = "hnsw"
+
+PARTIAL_INDEX_PREFIX = "idx_chunks_hnsw_tag_"
+
+
+def partial_index_name(product_tag: str) -> str:
+    """Deterministic name of the per-tag partial HNSW index."""
+    return PARTIAL_INDEX_PREFIX + hashlib.blake2b(product_tag.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# --------------------------------------------------------------------------------------
+# STATISTICS
+# --------------------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class TagStats:
+    counts: Dict[str, int]
+    partial_indexes: FrozenSet[str]  # tags that have a partial HNSW index
+    loaded_at: float
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+_COUNTS_STMT = select(ChunkORM.product_tag, func.count()).group_by(ChunkORM.product_tag)
+_INDEXES_STMT = text(
+    "SELECT indexname FROM pg_indexes "
+    "WHERE schemaname = current_schema() AND tablename = 'chunks' AND indexname LIKE :prefix"
+).bindparams(prefix=PARTIAL_INDEX_PREFIX + "%")
+
+
+def _build_stats(counts: Sequence[Tuple[str, int]], index_names: Sequence[str], now: float) -> TagStats:
+    names = set(index_names)
+    counts = {tag: int(n) for tag, n in counts}
+    return TagStats(
+        counts=counts,
+        partial_indexes=frozenset(t for t in counts if partial_index_name(t) in names),
+        loaded_at=now,
+    )
+
+
+# --------------------------------------------------------------------------------------
+# PLANS
+# --------------------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class RetrievalPlan:
+    strategy: str
+    tags: Tuple[str, ...]
+    allowed_rows: int
+    selectivity: float
+    ef_search: int = 0
+
+
+class RetrievalPlanner:
+    """
+    Chooses how to run an RBAC-filtered top-k search in pgvector.
+
+    The global HNSW index applies the product_tag filter *after* the graph
+    walk, so when the allowed tags are a small slice of the table it
+    returns fewer than k rows. Using per-tag row counts the planner picks:
+
+      exact          allowed rows <= exact_max_rows: scan just that tag
+                     partition (materialized CTE, the HNSW index is bypassed)
+      partial_index  every allowed tag has its own partial HNSW index
+                     (WHERE product_tag = ...): top-k per tag, merged
+      hnsw           global index with hnsw.ef_search scaled by
+                     1/selectivity; retried with 4x ef_search while fewer
+                     than k rows come back, then falls back to exact
+
+    With a quantization mode the hnsw strategy walks the quantized index
+    for k * rescore_factor candidates and rescores them in float32.
+    """
+
+    OVERFETCH = 2.0
+    MIN_EF_SEARCH = 40
+    MAX_PARTIAL_TAGS = 8
+
+    def __init__(
+        self,
+        exact_max_rows: int,
+        ef_search_max: int,
+        stats_ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        quantization: str = NONE,
+        rescore_factor: int = 4,
+    ):
+        self.exact_max_rows = exact_max_rows
+        self.ef_search_max = ef_search_max
+        self.stats_ttl_seconds = stats_ttl_seconds
+        self._clock = clock
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self._stats: Optional[TagStats] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Stats cache
+    # ------------------------------------------------------------------
+    def invalidate(self) -> None:
+        self._stats = None
+
+    def _fresh(self) -> Optional[TagStats]:
+        stats = self._stats
+        if stats is not None and self._clock() - stats.loaded_at < self.stats_ttl_seconds:
+            return stats
+        return None
+
+    def stats(self, db: Session) -> TagStats:
+        stats = self._fresh()
+        if stats is None:
+            with self._lock:
+                stats = self._fresh()
+                if stats is None:
+                    stats = _build_stats(
+                        db.execute(_COUNTS_STMT).all(),
+                        db.execute(_INDEXES_STMT).scalars().all(),
+                        self._clock(),
+                    )
+                    self._stats = stats
+        return stats
+
+    async def astats(self, db: AsyncSession) -> TagStats:
+        stats = self._fresh()
+        if stats is None:
+            # Concurrent misses may each reload; the result is identical
+            counts = (await db.execute(_COUNTS_STMT)).all()
+            names = (await db.execute(_INDEXES_STMT)).scalars().all()
+            stats = _build_stats(counts, names, self._clock())
+            self._stats = stats
+        return stats
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+    def plan(self, stats: TagStats, allowed_product_tags: List[str], k: int) -> RetrievalPlan:
+        tags = tuple(sorted(t for t in set(allowed_product_tags) if stats.counts.get(t)))
+        allowed_rows = sum(stats.counts[t] for t in tags)
+        selectivity = allowed_rows / stats.total if stats.total else 0.0
+
+        if allowed_rows <= self.exact_max_rows:
+            strategy, ef = EXACT, 0
+        elif len(tags) <= self.MAX_PARTIAL_TAGS and all(t in stats.partial_indexes for t in tags):
+            strategy, ef = PARTIAL_INDEX, self._ef_search(k, 1.0)
+        else:
+            candidates = k if self.quantization == NONE else k * self.rescore_factor
+            strategy, ef = HNSW, self._ef_search(candidates, selectivity)
+
+        RETRIEVAL_PLANS.labels(strategy=strategy).inc()
+        return RetrievalPlan(strategy, tags, allowed_rows, selectivity, ef)
+
+    def _ann_stmt(self, query_vec, tags: Sequence[str], k: int):
+        return ann_stmt(query_vec, tags, k, self.quantization, self.rescore_factor)
+
+    def _ef_search(self, k: int, selectivity: float) -> int:
+        wanted = math.ceil(k * self.OVERFETCH / max(selectivity, 1e-9))
+        return int(min(self.ef_search_max, max(self.MIN_EF_SEARCH, wanted)))
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+    def search(self, db: Session, query_vec, allowed_product_tags: List[str], k: int) -> List[ChunkORM]:
+        plan = self.plan(self.stats(db), allowed_product_tags, k)
+        if not plan.tags:
+            return []
+
+        if plan.strategy == EXACT:
+            return db.execute(exact_stmt(query_vec, plan.tags, k)).scalars().all()
+
+        if plan.strategy == PARTIAL_INDEX:
+            db.execute(ef_search_stmt(plan.ef_search))
+            return db.execute(partial_index_stmt(query_vec, plan.tags, k)).scalars().all()
+
+        ef = plan.ef_search
+        while True:
+            db.execute(ef_search_stmt(ef))
+            rows = db.execute(self._ann_stmt(query_vec, plan.tags, k)).scalars().all()
+            if len(rows) >= k or ef >= self.ef_search_max:
+                break
+            ef = min(self.ef_search_max, ef * 4)
+
+        if len(rows) < min(k, plan.allowed_rows):
+            rows = db.execute(exact_stmt(query_vec, plan.tags, k)).scalars().all()
+        return rows
+
+    async def asearch(
+        self, db: AsyncSession, query_vec, allowed_product_tags: List[str], k: int
+    ) -> List[ChunkORM]:
+        plan = self.plan(await self.astats(db), allowed_product_tags, k)
+        if not plan.tags:
+            return []
+
+        if plan.strategy == EXACT:
+            return (await db.execute(exact_stmt(query_vec, plan.tags, k))).scalars().all()
+
+        if plan.strategy == PARTIAL_INDEX:
+            await db.execute(ef_search_stmt(plan.ef_search))
+            return (await db.execute(partial_index_stmt(query_vec, plan.tags, k))).scalars().all()
+
+        ef = plan.ef_search
+        while True:
+            await db.execute(ef_search_stmt(ef))
+            rows = (await db.execute(self._ann_stmt(query_vec, plan.tags, k))).scalars().all()
+            if len(rows) >= k or ef >= self.ef_search_max:
+                break
+            ef = min(self.ef_search_max, ef * 4)
+
+        if len(rows) < min(k, plan.allowed_rows):
+            rows = (await db.execute(exact_stmt(query_vec, plan.tags, k))).scalars().all()
+        return rows
+
+    # ------------------------------------------------------------------
+    # Batch execution (one statement for many query vectors)
+    # ------------------------------------------------------------------
+    def _batch_ef_search(self, plan: RetrievalPlan, k: int) -> int:
+        # Partial indexes cannot be used from the LATERAL subquery (its tag
+        # filter is an IN list), so size ef_search for the global index
+        if plan.strategy == HNSW:
+            return plan.ef_search
+        candidates = k if self.quantization == NONE else k * self.rescore_factor
+        return self._ef_search(candidates, plan.selectivity)
+
+    def _batch_stmt(self, query_vecs, plan: RetrievalPlan, k: int):
+        return batch_ann_stmt(
+            query_vecs, plan.tags, k, self.quantization, self.rescore_factor,
+            exact=plan.strategy == EXACT,
+        )
+
+    def search_batch(
+        self, db: Session, query_vecs, allowed_product_tags: List[str], k: int
+    ) -> List[List[ChunkORM]]:
+        """
+        Top-k for every query vector in one round trip. Queries whose
+        graph walk came back short are re-run through search(), which
+        escalates ef_search and falls back to an exact scan.
+        """
+        plan = self.plan(self.stats(db), allowed_product_tags, k)
+        if not plan.tags:
+            return [[] for _ in query_vecs]
+
+        if plan.strategy != EXACT:
+            db.execute(ef_search_stmt(self._batch_ef_search(plan, k)))
+        results = group_batch_rows(db.execute(self._batch_stmt(query_vecs, plan, k)).all(), len(query_vecs))
+
+        for i, rows in enumerate(results):
+            if len(rows) < min(k, plan.allowed_rows):
+                results[i] = self.search(db, query_vecs[i], allowed_product_tags, k)
+        return results
+
+    async def asearch_batch(
+        self, db: AsyncSession, query_vecs, allowed_product_tags: List[str], k: int
+    ) -> List[List[ChunkORM]]:
+        plan = self.plan(await self.astats(db), allowed_product_tags, k)
+        if not plan.tags:
+            return [[] for _ in query_vecs]
+
+        if plan.strategy != EXACT:
+            await db.execute(ef_search_stmt(self._batch_ef_search(plan, k)))
+        rows = (await db.execute(self._batch_stmt(query_vecs, plan, k))).all()
+        results = group_batch_rows(rows, len(query_vecs))
+
+        for i, rows in enumerate(results):
+            if len(rows) < min(k, plan.allowed_rows):
+                results[i] = await self.asearch(db, query_vecs[i], allowed_product_tags, k)
+        return results
+
+
+# --------------------------------------------------------------------------------------
+# STATEMENTS
+# --------------------------------------------------------------------------------------
+
+def ef_search_stmt(ef: int):
+    # SET does not take bind parameters; ef is always an int we computed
+    return text(f"SET LOCAL hnsw.ef_search = {int(ef)}")
+
+
+def knn_stmt(embedding_vector, allowed_product_tags: Sequence[str], k: int):
+    return (
+        select(ChunkORM)
+        # Stored vectors are not needed downstream; don't ship them back
+        .options(defer(ChunkORM.embedding))
+        .where(ChunkORM.product_tag.in_(list(allowed_product_tags)))
+        .order_by(ChunkORM.embedding.l2_distance(embedding_vector))
+        .limit(k)
+    )
+
+
+def rescored_stmt(
+    embedding_vector,
+    allowed_product_tags: Sequence[str],
+    k: int,
+    quantization: str,
+    candidates: int,
+):
+    """
+    Top `candidates` by quantized distance (served by the quantized HNSW
+    index), then the best k of those by full-precision L2 distance.
+    """
+    dim = ChunkORM.embedding.type.dim
+    coarse = (
+        select(ChunkORM.id.label("id"), ChunkORM.embedding.l2_distance(embedding_vector).label("distance"))
+        .where(ChunkORM.product_tag.in_(list(allowed_product_tags)))
+        .order_by(quantized_distance(ChunkORM.embedding, embedding_vector, quantization, dim))
+        .limit(candidates)
+        .subquery("coarse")
+    )
+    return (
+        select(ChunkORM)
+        .options(defer(ChunkORM.embedding))
+        .join(coarse, ChunkORM.id == coarse.c.id)
+        .order_by(coarse.c.distance)
+        .limit(k)
+    )
+
+
+def ann_stmt(
+    embedding_vector,
+    allowed_product_tags: Sequence[str],
+    k: int,
+    quantization: str = NONE,
+    rescore_factor: int = 4,
+):
+    """Approximate top-k: plain HNSW, or quantized HNSW + rescoring."""
+    if quantization == NONE:
+        return knn_stmt(embedding_vector, allowed_product_tags, k)
+    return rescored_stmt(embedding_vector, allowed_product_tags, k, quantization, k * rescore_factor)
+
+
+def exact_stmt(embedding_vector, allowed_product_tags: Sequence[str], k: int):
+    """Exact top-k over the tag partition; MATERIALIZED keeps HNSW out of the plan."""
+    distance = ChunkORM.embedding.l2_distance(embedding_vector)
+    partition = (
+        select(ChunkORM.id.label("id"), distance.label("distance"))
+        .where(ChunkORM.product_tag.in_(list(allowed_product_tags)))
+        .cte("tag_partition")
+        .prefix_with("MATERIALIZED")
+    )
+    return (
+        select(ChunkORM)
+        .options(defer(ChunkORM.embedding))
+        .join(partition, ChunkORM.id == partition.c.id)
+        .order_by(partition.c.distance)
+        .limit(k)
+    )
+
+
+def partial_index_stmt(embedding_vector, allowed_product_tags: Sequence[str], k: int):
+    """
+    Top-k per tag, each matching one partial index, merged by distance.
+    Tags are rendered inline so the planner can prove the index predicate.
+    """
+    distance = ChunkORM.embedding.l2_distance(embedding_vector)
+    per_tag = union_all(
+        *(
+            select(ChunkORM.id.label("id"), distance.label("distance"))
+            .where(ChunkORM.product_tag == bindparam(f"tag_{i}", tag, literal_execute=True))
+            .order_by(distance)
+            .limit(k)
+            for i, tag in enumerate(allowed_product_tags)
+        )
+    ).subquery("per_tag")
+    return (
+        select(ChunkORM)
+        .options(defer(ChunkORM.embedding))
+        .join(per_tag, ChunkORM.id == per_tag.c.id)
+        .order_by(per_tag.c.distance)
+        .limit(k)
+    )
+
+
+def batch_ann_stmt(
+    embedding_vectors,
+    allowed_product_tags: Sequence[str],
+    k: int,
+    quantization: str = NONE,
+    rescore_factor: int = 4,
+    exact: bool = False,
+):
+    """
+    Top-k for many query vectors in one statement: the vectors form a
+    VALUES list and each row drives a LATERAL top-k subquery of the same
+    shape as ann_stmt() (or, with exact=True, a scan of the MATERIALIZED
+    tag partition like exact_stmt()). Rows are (query index, ChunkORM),
+    ordered by index, then distance.
+    """
+    dim = ChunkORM.embedding.type.dim
+    tags = list(allowed_product_tags)
+    queries = values(column("idx", Integer), column("vec", NumpyVector(dim)), name="queries").data(
+        [(i, np.asarray(v, dtype=np.float32)) for i, v in enumerate(embedding_vectors)]
+    )
+    query = cast(queries.c.vec, VECTOR(dim))
+
+    chunks = ChunkORM.__table__.alias("c")
+    if exact:
+        partition = (
+            select(chunks.c.id, chunks.c.embedding)
+            .where(chunks.c.product_tag.in_(tags))
+            .cte("tag_partition")
+            .prefix_with("MATERIALIZED")
+        )
+        distance = partition.c.embedding.l2_distance(query)
+        top = select(partition.c.id.label("id"), distance.label("distance")).order_by(distance).limit(k)
+    else:
+        distance = chunks.c.embedding.l2_distance(query)
+        top = select(chunks.c.id.label("id"), distance.label("distance")).where(chunks.c.product_tag.in_(tags))
+        if quantization == NONE:
+            top = top.order_by(distance).limit(k)
+        else:
+            coarse = (
+                # Nested one level below the LATERAL: correlate to the VALUES row explicitly
+                top.correlate(queries)
+                .order_by(quantized_distance(chunks.c.embedding, query, quantization, dim))
+                .limit(k * rescore_factor)
+                .subquery("coarse")
+            )
+            top = select(coarse.c.id, coarse.c.distance).order_by(coarse.c.distance).limit(k)
+    top = top.lateral("top")
+
+    return (
+        select(queries.c.idx, ChunkORM)
+        .options(defer(ChunkORM.embedding))
+        .select_from(queries)
+        .join(top, true())
+        .join(ChunkORM, ChunkORM.id == top.c.id)
+        .order_by(queries.c.idx, top.c.distance)
+    )
+
+
+def group_batch_rows(rows, n: int) -> List[list]:
+    """(query index, item) rows -> one list per query, order preserved."""
+    grouped: List[list] = [[] for _ in range(n)]
+    for idx, item in rows:
+        grouped[idx].append(item)
+    return grouped
+
+
+# --------------------------------------------------------------------------------------
+# INDEX MAINTENANCE
+# --------------------------------------------------------------------------------------
+
+def index_exists(db: Session, name: str) -> bool:
+    return db.execute(
+        text("SELECT 1 FROM pg_indexes WHERE schemaname = current_schema() AND indexname = :name"),
+        {"name": name},
+    ).first() is not None
+
+
+def ensure_quantized_index(db: Session, quantization: str) -> bool:
+    """
+    CREATE INDEX CONCURRENTLY the HNSW index over the quantized embedding
+    expression if it is missing. Returns True if it had to be created.
+    """
+    if quantization == NONE:
+        return False
+
+    name = QUANTIZED_INDEX_NAMES[quantization]
+    if index_exists(db, name):
+        return False
+
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(quantized_index_ddl(quantization, ChunkORM.embedding.type.dim)))
+    return True
+
+
+def ensure_partial_indexes(db: Session, stats: TagStats, min_rows: int) -> List[str]:
+    """
+    CREATE INDEX CONCURRENTLY a partial HNSW index for every tag with at
+    least `min_rows` chunks that does not have one yet. Runs on its own
+    autocommit connection so it neither blocks writers nor needs the
+    caller's transaction. Returns the tags that got a new index.
+    """
+    created = []
+    todo = [
+        tag for tag, n in stats.counts.items()
+        if n >= min_rows and tag not in stats.partial_indexes
+    ]
+    if not todo:
+        return created
+
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for tag in todo:
+            quoted = tag.replace("'", "''")
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partial_index_name(tag)} "
+                f"ON chunks USING hnsw (embedding vector_l2_ops) "
+                f"WHERE product_tag = '{quoted}'"
+            ))
+            created.append(tag)
+    return created
@@ -0,0 +1,195 @@
+# app/rag/vector_backends/quantization.py
+
+from pathlib import Path
+from typing import Dict, Type
+
+import numpy as np
+from pgvector.sqlalchemy import BIT, HALFVEC, VECTOR
+from sqlalchemy import ColumnElement, cast, func, literal
+
+from app.models.vector_type import NumpyVector
+
+NONE = "none"
+HALFVEC_MODE = "halfvec"
+INT8 = "int8"
+BINARY = "binary"
+
+QUANTIZATIONS = (NONE, HALFVEC_MODE, INT8, BINARY)
+
+# pgvector has no int8 vector type; int8 is served by the local backends only
+PGVECTOR_QUANTIZATIONS = (NONE, HALFVEC_MODE, BINARY)
+
+
+def check_quantization(mode: str, supported=QUANTIZATIONS) -> str:
+    mode = (mode or NONE).lower()
+    if mode not in supported:
+        raise ValueError(f"Unknown VECTOR_QUANTIZATION '{mode}'. Use one of {list(supported)}.")
+    return mode
+
+
+# --------------------------------------------------------------------------------------
+# PGVECTOR EXPRESSIONS
+# --------------------------------------------------------------------------------------
+# The quantized forms are index expressions over the float32 column, so the
+# table keeps full precision for rescoring and only the HNSW index shrinks.
+
+QUANTIZED_INDEX_NAMES = {
+    HALFVEC_MODE: "idx_chunks_embedding_hnsw_halfvec",
+    BINARY: "idx_chunks_embedding_hnsw_binary",
+}
+
+
+def quantized_index_ddl(mode: str, dim: int) -> str:
+    name = QUANTIZED_INDEX_NAMES[mode]
+    if mode == HALFVEC_MODE:
+        expr, opclass = f"(embedding::halfvec({dim}))", "halfvec_l2_ops"
+    else:
+        expr, opclass = f"(binary_quantize(embedding)::bit({dim}))", "bit_hamming_ops"
+    return f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON chunks USING hnsw ({expr} {opclass})"
+
+
+def quantized_distance(column, query_vec, mode: str, dim: int):
+    """
+    Distance expression matching the quantized index expression exactly.
+    `query_vec` is an array, or a SQL expression of type vector (batch queries).
+    """
+    if isinstance(query_vec, ColumnElement):
+        query = query_vec
+    else:
+        query = literal(np.asarray(query_vec, dtype=np.float32), NumpyVector(dim))
+    if mode == HALFVEC_MODE:
+        return cast(column, HALFVEC(dim)).l2_distance(cast(query, HALFVEC(dim)))
+    if mode == BINARY:
+        return cast(func.binary_quantize(column), BIT(dim)).hamming_distance(
+            func.binary_quantize(cast(query, VECTOR(dim)))
+        )
+    raise ValueError(f"No pgvector index expression for quantization '{mode}'")
+
+
+# --------------------------------------------------------------------------------------
+# IN-PROCESS CODE STORES
+# --------------------------------------------------------------------------------------
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class CodeStore:
+    """
+    Compact copy of the local backend's vectors, one memory-mapped row per
+    vector row, used for the coarse distance pass. distances() only has to
+    rank like L2 distance; the caller rescores survivors in float32.
+    """
+
+    mode = NONE
+    suffix = ""
+
+    def __init__(self, directory: Path, dim: int, capacity: int):
+        self.dim = dim
+        self.path = Path(directory) / f"codes.{self.suffix}"
+        self.fresh = not self.path.exists()
+        self.capacity = 0
+        self.resize(capacity)
+
+    @property
+    def row_bytes(self) -> int:
+        raise NotImplementedError
+
+    def resize(self, capacity: int) -> None:
+        if capacity <= self.capacity:
+            return
+        if self.capacity:
+            self.codes.flush()
+            del self.codes
+        size = capacity * self.row_bytes
+        if not self.path.exists() or self.path.stat().st_size < size:
+            with open(self.path, "ab") as fh:
+                fh.truncate(size)
+        self.capacity = capacity
+        self.codes = np.memmap(self.path, dtype=np.uint8, mode="r+", shape=(capacity, self.row_bytes))
+
+    def flush(self) -> None:
+        self.codes.flush()
+
+    @property
+    def nbytes(self) -> int:
+        return self.capacity * self.row_bytes
+
+    def write(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def distances(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HalfStore(CodeStore):
+    mode = HALFVEC_MODE
+    suffix = "f16"
+
+    @property
+    def row_bytes(self) -> int:
+        return self.dim * 2
+
+    def write(self, rows, vectors):
+        self.codes[rows] = np.asarray(vectors, dtype=np.float16).view(np.uint8).reshape(len(rows), -1)
+
+    def distances(self, rows, query):
+        diff = self.codes[rows].view(np.float16).astype(np.float32) - query
+        return np.einsum("ij,ij->i", diff, diff)
+
+
+class Int8Store(CodeStore):
+    """
+    Symmetric scalar quantization with one float32 scale per row (stored
+    in the row's first 4 bytes): x ~= scale * code, code in [-127, 127].
+    Per-row scales need no calibration pass, so rows can be added
+    incrementally. ||q - x||^2 ranks like ||x||^2 - 2 q.x.
+    """
+
+    mode = INT8
+    suffix = "i8"
+
+    @property
+    def row_bytes(self) -> int:
+        return 4 + self.dim
+
+    def write(self, rows, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        scale = np.abs(vectors).max(axis=1) / 127.0
+        scale[scale == 0] = 1.0
+        codes = np.rint(vectors / scale[:, None]).astype(np.int8)
+        block = np.empty((len(rows), self.row_bytes), dtype=np.uint8)
+        block[:, :4] = scale.astype(np.float32)[:, None].view(np.uint8)
+        block[:, 4:] = codes.view(np.uint8)
+        self.codes[rows] = block
+
+    def distances(self, rows, query):
+        block = self.codes[rows]
+        scale = block[:, :4].copy().view(np.float32).ravel()
+        codes = block[:, 4:].view(np.int8).astype(np.float32)
+        norms = np.einsum("ij,ij->i", codes, codes) * scale * scale
+        return norms - 2.0 * scale * (codes @ query)
+
+
+class BinaryStore(CodeStore):
+    """Sign bits, packed 8 per byte; Hamming distance tracks angle on normalized vectors."""
+
+    mode = BINARY
+    suffix = "b1"
+
+    @property
+    def row_bytes(self) -> int:
+        return (self.dim + 7) // 8
+
+    def write(self, rows, vectors):
+        self.codes[rows] = np.packbits(np.asarray(vectors) > 0, axis=1)
+
+    def distances(self, rows, query):
+        q = np.packbits(query > 0)
+        return _POPCOUNT[np.bitwise_xor(self.codes[rows], q)].sum(axis=1, dtype=np.int32)
+
+
+CODE_STORES: Dict[str, Type[CodeStore]] = {
+    HALFVEC_MODE: HalfStore,
+    INT8: Int8Store,
+    BINARY: BinaryStore,
+}
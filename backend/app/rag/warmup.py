@@ -0,0 +1,122 @@
+# app/rag/warmup.py
+
+import asyncio
+import importlib
+import logging
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.config.settings import get_settings
+from app.observability.metrics import STARTUP_PHASE_SECONDS, STARTUP_READY, STARTUP_SECONDS
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """
+    Progress of the startup warmup, reported by /v1/ready. `ready` turns
+    true once every phase has finished; `error` names the phase that
+    failed (the process then stays not ready).
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.error: Optional[str] = None
+        self.current: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        STARTUP_READY.set(0)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "phase": self.current,
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "error": self.error,
+        }
+
+    @contextmanager
+    def phase(self, name: str):
+        self.current = name
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        self.phases[name] = elapsed
+        STARTUP_PHASE_SECONDS.labels(phase=name).set(elapsed)
+        print(f"[STARTUP] {name} took {elapsed:.2f}s")
+
+    def mark_ready(self) -> None:
+        self.current = None
+        self.ready = True
+        STARTUP_READY.set(1)
+        STARTUP_SECONDS.set(time.monotonic() - self.started_at)
+
+
+@lru_cache()
+def get_warmup_state() -> WarmupState:
+    return WarmupState()
+
+
+# --------------------------------------------------------------------------------------
+# PHASES
+# --------------------------------------------------------------------------------------
+
+def _load_models(state: WarmupState) -> None:
+    """Blocking phases; run in a worker thread so the server keeps answering probes."""
+    from app.orc.pipeline import get_orc_pipeline
+    from app.rag.embedder import get_embedder
+
+    with state.phase("import"):
+        # torch + transformers: usually the largest part of a cold start
+        importlib.import_module("sentence_transformers")
+    with state.phase("embedder_load"):
+        embedder = get_embedder()
+    with state.phase("embedder_warmup"):
+        embedder.warmup()
+    with state.phase("pipeline_compile"):
+        get_orc_pipeline()
+
+
+async def _probe_llm(state: WarmupState) -> None:
+    from app.rag.llm_client import get_llm_client
+
+    llm = get_llm_client()
+    try:
+        with state.phase("llm_probe"):
+            if settings.orc_async_mode:
+                await llm.aprobe()
+            else:
+                await asyncio.to_thread(llm.probe)
+    except Exception as e:
+        # Not fatal: an LLM outage is the circuit breaker's business, and
+        # gating readiness on it would pull every replica out at once
+        logger.warning(f"LLM probe failed: {e}")
+
+
+async def run_warmup(state: WarmupState) -> None:
+    try:
+        await asyncio.to_thread(_load_models, state)
+        if settings.startup_probe_llm:
+            await _probe_llm(state)
+    except Exception as e:
+        state.error = f"{state.current}: {e}"
+        logger.error(f"Startup warmup failed in phase {state.error}")
+        return
+    state.mark_ready()
+    print(f"[STARTUP] ready after {time.monotonic() - state.started_at:.2f}s")
+
+
+def start_warmup() -> Optional[asyncio.Task]:
+    """
+    Kick off the warmup on the running loop (STARTUP_WARMUP) and return
+    its task; with warmup disabled the app is ready at once and models
+    load on first use.
+    """
+    state = get_warmup_state()
+    if not settings.startup_warmup:
+        state.mark_ready()
+        return None
+    return asyncio.create_task(run_warmup(state))
@@ -0,0 +1,62 @@
+# benchmarks/bench_async_llm.py
+"""
+How many LLM calls can one worker keep in flight?
+
+Runs N calls against the stub LLM server two ways:
+  sync   — LLMClient.generate on a 40-thread pool (FastAPI's default limit)
+  async  — LLMClient.agenerate, all awaited concurrently on one event loop
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_llm --calls 400 --delay 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--port", type=int, default=9107)
+    args = parser.parse_args()
+
+    from benchmarks.stub_llm_server import StubLLMServer
+
+    stub = StubLLMServer(port=args.port, delay=args.delay).start_in_thread()
+
+    # Must be set before app settings are first loaded; empty key => local endpoint
+    os.environ["LLM_ENDPOINT"] = stub.url
+    os.environ["OPENAI_API_KEY"] = ""
+
+    from app.rag.llm_client import LLMClient
+
+    client = LLMClient()
+    prompts = [f"question {i}" for i in range(args.calls)]
+
+    stub.peak_in_flight = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(client.generate, prompts))
+    sync_elapsed = time.perf_counter() - start
+    sync_peak = stub.peak_in_flight
+
+    async def run_async() -> None:
+        await asyncio.gather(*(client.agenerate(p) for p in prompts))
+
+    stub.peak_in_flight = 0
+    start = time.perf_counter()
+    asyncio.run(run_async())
+    async_elapsed = time.perf_counter() - start
+
+    print(f"{args.calls} calls, {args.delay}s simulated LLM latency")
+    print(f"sync  ({args.threads} threads): {sync_elapsed:6.2f}s  peak in flight {sync_peak}")
+    print(f"async (1 event loop): {async_elapsed:6.2f}s  peak in flight {stub.peak_in_flight}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_embed_pool.py
+"""
+Chunks/sec of ingestion embedding vs. number of worker processes.
+
+Embeds the chunk texts of DATA_PATH (repeated up to --chunks) in
+INGEST_BATCH_SIZE-sized calls, the way the ingestion pipeline does:
+  0   in-process Embedder (INGEST_EMBED_WORKERS=0)
+  N   EmbeddingPool with N workers
+
+Pool start-up (one model load per worker, in parallel) is reported
+separately from the steady-state rate. The embedding cache is disabled
+so every chunk is really encoded.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embed_pool --chunks 20000 --workers 0 1 2 4 8 16
+"""
+
+import argparse
+import os
+import time
+
+
+def _uncached_embedder():
+    from app.rag.embedder import Embedder
+
+    return Embedder(cache=None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4, 8])
+    parser.add_argument("--batch", type=int, default=0, help="texts per embed() call (default: INGEST_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+
+    from app.config.settings import get_settings
+    from app.ingestion.embed_pool import EmbeddingPool
+    from benchmarks.bench_embedder_backends import corpus
+
+    settings = get_settings()
+    texts = corpus(args.chunks)
+    batch = args.batch or settings.ingest_batch_size
+    calls = [texts[i : i + batch] for i in range(0, len(texts), batch)]
+    print(f"{len(texts)} chunks in calls of {batch}, {os.cpu_count()} CPUs, backend {settings.embedding_backend}")
+    print(f"{'workers':>7s} {'startup s':>10s} {'chunks/s':>10s} {'scaling':>8s}")
+
+    base = None
+    for workers in args.workers:
+        started = time.perf_counter()
+        if workers == 0:
+            embedder = _uncached_embedder()
+            embed, close = embedder.embed_array, lambda: None
+        else:
+            pool = EmbeddingPool(workers, factory=_uncached_embedder)
+            embed, close = pool.embed, pool.close
+        startup = time.perf_counter() - started
+
+        try:
+            embed(calls[0])
+            started = time.perf_counter()
+            for call in calls:
+                embed(call)
+            rate = len(texts) / (time.perf_counter() - started)
+        finally:
+            close()
+
+        base = base or rate
+        print(f"{workers:7d} {startup:10.1f} {rate:10.1f} {rate / base:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
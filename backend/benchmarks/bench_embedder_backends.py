@@ -0,0 +1,114 @@
+# benchmarks/bench_embedder_backends.py
+"""
+Parity and CPU throughput of the Embedder backends.
+
+Embeds the chunk texts of DATA_PATH (repeated up to --texts) with:
+  torch        the PyTorch SentenceTransformer (reference)
+  onnx         the ONNX Runtime export, fp32
+  onnx-qint8   the same with dynamic int8 weights (--quantization)
+
+For each ONNX variant it reports texts/sec and, against torch:
+  cosine     per-text cosine similarity of the two vectors (mean / min)
+  top-k      overlap of the k nearest neighbours of --queries texts
+and exits non-zero if the minimum cosine is below --min-cosine, so it
+doubles as the parity check to run before switching EMBEDDING_BACKEND.
+
+Needs sentence-transformers[onnx]. Usage (from backend/):
+    python -m benchmarks.bench_embedder_backends --texts 4000 --quantization avx2
+    python -m benchmarks.bench_embedder_backends --threads 4 --min-cosine 0.99
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+
+def corpus(n: int):
+    from app.ingestion.chunker import make_chunks_for_ticket
+    from app.ingestion.loader import load_tickets_from_file
+
+    texts = []
+    for ticket in load_tickets_from_file():
+        texts.extend(c["text"] for c in make_chunks_for_ticket(ticket))
+    texts = [t for t in dict.fromkeys(texts) if t.strip()]
+    return (texts * (n // len(texts) + 1))[:n]
+
+
+def throughput(embedder, texts, rounds: int) -> float:
+    embedder._encode(texts[:64])
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        embedder._encode(texts)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def top_k_overlap(reference: np.ndarray, candidate: np.ndarray, queries: int, k: int) -> float:
+    def neighbours(vectors):
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        scores = unit[:queries] @ unit.T
+        return np.argsort(-scores, axis=1)[:, 1 : k + 1]
+
+    ref, cand = neighbours(reference), neighbours(candidate)
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref, cand)]))
+
+
+def cosines(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", a, b) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--quantization", default="avx2", help="int8 target; empty to skip the int8 variant")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = ORT default)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+
+    # Before app settings are first loaded
+    os.environ["EMBEDDING_ONNX_THREADS"] = str(args.threads)
+
+    from app.config.settings import get_settings
+    from app.rag.embedder import Embedder
+    from app.rag.onnx_embedding import embedding_variant
+
+    settings = get_settings()
+    texts = corpus(args.texts)
+    unique = list(dict.fromkeys(texts))
+    print(f"{settings.embedding_model_name}: {len(texts)} texts ({len(unique)} distinct), batch {settings.embedding_batch_size}")
+
+    variants = [("torch", Embedder(backend="torch")), ("onnx", Embedder(backend="onnx", quantization=""))]
+    if args.quantization:
+        variants.append(
+            (embedding_variant("onnx", args.quantization), Embedder(backend="onnx", quantization=args.quantization))
+        )
+
+    reference = variants[0][1]._encode(unique)
+    queries = min(args.queries, len(unique))
+    failed = False
+
+    print(f"{'backend':24s} {'texts/s':>9s} {'speedup':>8s} {'cos mean':>9s} {'cos min':>8s} {'top-' + str(args.k):>7s}")
+    base_rate = None
+    for name, embedder in variants:
+        rate = throughput(embedder, texts, args.rounds)
+        base_rate = base_rate or rate
+        vectors = embedder._encode(unique)
+        cos = cosines(reference, vectors)
+        overlap = top_k_overlap(reference, vectors, queries, args.k)
+        print(f"{name:24s} {rate:9.1f} {rate / base_rate:7.2f}x {cos.mean():9.4f} {cos.min():8.4f} {overlap:7.3f}")
+        failed |= bool(cos.min() < args.min_cosine)
+
+    if failed:
+        print(f"parity check FAILED: a backend has cosine < {args.min_cosine} against torch")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
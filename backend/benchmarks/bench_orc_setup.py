@@ -0,0 +1,80 @@
+# benchmarks/bench_orc_setup.py
+"""
+Per-request CPU and allocations of getting an ORCController, two ways:
+
+  per_request  compile_pipeline() + controller on every request (what
+               get_orc_controller did before the pipeline was shared:
+               new registry, operator imports, six operator instances)
+  compiled     shared CompiledPipeline + RequestContext + controller
+
+Each request also builds its run state and resolves its profile's plan,
+as run()/arun() do before the first operator starts. The embedder and
+DB sessions are never touched by this path, so none are loaded.
+
+Usage (from backend/):
+    python -m benchmarks.bench_orc_setup --requests 20000
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--profile", default="fast")
+    args = parser.parse_args()
+
+    # Empty key => local endpoint; no call is made
+    os.environ.setdefault("LLM_ENDPOINT", "http://localhost:9000/generate")
+    os.environ["OPENAI_API_KEY"] = ""
+
+    from app.orc.controller import ORCController
+    from app.orc.pipeline import RequestContext, compile_pipeline
+    from app.orc.profiles import get_profile
+    from app.rag.llm_client import LLMClient
+
+    llm = LLMClient()
+    embedder = None
+    rbac_ctx = {"allowed_product_tags": ["billing", "auth"]}
+    profile = get_profile(args.profile)
+    shared = compile_pipeline(embedder, llm)
+
+    def per_request():
+        orc = ORCController(compile_pipeline(embedder, llm), RequestContext.start())
+        orc._initial_state("question", rbac_ctx)
+        return orc.compiled.plan(profile)
+
+    def compiled():
+        orc = ORCController(shared, RequestContext.start())
+        orc._initial_state("question", rbac_ctx)
+        return orc.compiled.plan(profile)
+
+    print(f"{args.requests} requests, profile '{args.profile}'")
+    for name, setup in (("per_request", per_request), ("compiled", compiled)):
+        for _ in range(100):
+            setup()
+
+        start = time.process_time()
+        for _ in range(args.requests):
+            setup()
+        cpu_us = (time.process_time() - start) / args.requests * 1e6
+
+        # Peak memory one request allocates on top of what was live before it
+        sample = min(args.requests, 2000)
+        allocated = 0
+        tracemalloc.start()
+        for _ in range(sample):
+            tracemalloc.reset_peak()
+            live = tracemalloc.get_traced_memory()[0]
+            setup()
+            allocated += tracemalloc.get_traced_memory()[1] - live
+        tracemalloc.stop()
+
+        print(f"{name:12s} {cpu_us:8.1f} µs CPU/request   {allocated / sample:8.0f} B allocated/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# benchmarks/bench_quantization.py
+"""
+Memory, latency and recall@k of quantized vector search with rescoring.
+
+For every VECTOR_QUANTIZATION mode (none / halfvec / int8 / binary) it
+builds an index over the same synthetic corpus (clustered, normalized
+384-dim vectors) and reports:
+
+  bytes/vec  size of the structure the coarse search scans per vector
+             (float32 vectors for none, otherwise the quantized codes);
+             with --pg, the on-disk size of the HNSW index per row
+  recall     recall@k against an exact float32 scan
+  p50 / p99  query latency in ms
+
+Local (in-process) backend, no database needed. Usage (from backend/):
+    python -m benchmarks.bench_quantization --rows 200000 --rescore 4
+    python -m benchmarks.bench_quantization --ivf --rescore 1 --rescore 8
+
+With --pg it also loads the corpus into a scratch schema (bench_quant) of
+DATABASE_URL and compares the float32, halfvec and binary HNSW indexes
+(int8 has no pgvector index type).
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from benchmarks.bench_retrieval_planner import DIM, load
+
+SCHEMA = "bench_quant"
+TAG = "tag-0000"
+
+
+def make_corpus(rows: int, rng: np.random.Generator):
+    centers = rng.standard_normal((256, DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), rows)]
+    vectors += 0.6 * rng.standard_normal((rows, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, n: int, rng: np.random.Generator):
+    queries = vectors[rng.integers(0, len(vectors), n)] + 0.05 * rng.standard_normal((n, DIM)).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int):
+    truth = []
+    sq = np.einsum("ij,ij->i", vectors, vectors)
+    for q in queries:
+        dist = sq - 2.0 * vectors @ q
+        truth.append(set(np.argpartition(dist, k)[:k].tolist()))
+    return truth
+
+
+def report(label: str, mode: str, rescore: int, bytes_per_vec: float, recalls, latencies) -> None:
+    print(
+        f"{label:<6} {mode:<8} {rescore:>7} {bytes_per_vec:>10.1f} {np.mean(recalls):>7.3f} "
+        f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}"
+    )
+
+
+def bench_local(args, vectors, queries, truth) -> None:
+    from app.rag.vector_backends.local_backend import LocalVectorBackend
+
+    chunks = [
+        {"ticket_id": f"T{i}", "product_tag": TAG, "chunk_index": 0, "text": ""}
+        for i in range(len(vectors))
+    ]
+    for mode in args.modes:
+        for rescore in args.rescore if mode != "none" else [1]:
+            directory = tempfile.mkdtemp(prefix="bench_quant_")
+            try:
+                backend = LocalVectorBackend(
+                    directory, DIM, use_ivf=args.ivf, nprobe=args.nprobe,
+                    quantization=mode, rescore_factor=rescore,
+                )
+                for start in range(0, len(vectors), 10_000):
+                    backend.upsert(chunks[start:start + 10_000], vectors[start:start + 10_000])
+                backend.flush()
+
+                codes = backend._codes
+                bytes_per_vec = codes.row_bytes if codes is not None else DIM * 4
+
+                recalls, latencies = [], []
+                for q, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    rows = backend.search(q, [TAG], args.k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    got = {int(c.ticket_id[1:]) for c in rows}
+                    recalls.append(len(got & expected) / args.k)
+                report("local", mode, rescore, bytes_per_vec, recalls, latencies)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_pg(args, vectors, queries, truth) -> None:
+    from app.config.connection import _register_pgvector
+    from app.config.settings import get_settings
+    from app.rag.vector_backends.planner import ann_stmt, ef_search_stmt, ensure_quantized_index
+    from app.rag.vector_backends.quantization import PGVECTOR_QUANTIZATIONS, QUANTIZED_INDEX_NAMES
+
+    engine = create_engine(
+        get_settings().database_url,
+        connect_args={"options": f"-c search_path={SCHEMA},public"},
+    )
+    event.listen(engine, "connect", _register_pgvector)
+
+    start = time.perf_counter()
+    load(engine, vectors, np.full(len(vectors), TAG), schema=SCHEMA)
+    print(f"loaded {len(vectors)} rows + HNSW index in {time.perf_counter() - start:.1f}s")
+
+    for mode in [m for m in args.modes if m in PGVECTOR_QUANTIZATIONS]:
+        with Session(engine) as db:
+            ensure_quantized_index(db, mode)
+            index = QUANTIZED_INDEX_NAMES.get(mode, "idx_chunks_embedding_hnsw")
+            size = db.execute(text(f"SELECT pg_relation_size('{SCHEMA}.{index}')")).scalar()
+
+        for rescore in args.rescore if mode != "none" else [1]:
+            recalls, latencies = [], []
+            with Session(engine) as db:
+                for q, expected in zip(queries, truth):
+                    t0 = time.perf_counter()
+                    db.execute(ef_search_stmt(max(40, args.k * rescore)))
+                    rows = db.execute(ann_stmt(q, [TAG], args.k, mode, rescore)).scalars().all()
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                    db.rollback()
+                    got = {int(c.ticket_id[1:]) for c in rows}
+                    recalls.append(len(got & expected) / args.k)
+            report("pg", mode, rescore, size / len(vectors), recalls, latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", default=["none", "halfvec", "int8", "binary"])
+    parser.add_argument("--rescore", type=int, action="append", help="rescore factor(s), default 4")
+    parser.add_argument("--ivf", action="store_true", help="local: IVF probing instead of exact scan")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--pg", action="store_true", help="also benchmark pgvector indexes")
+    args = parser.parse_args()
+    args.rescore = args.rescore or [4]
+
+    rng = np.random.default_rng(0)
+    vectors = make_corpus(args.rows, rng)
+    queries = make_queries(vectors, args.queries, rng)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    print(f"\n{args.rows} vectors, k={args.k}, {args.queries} queries")
+    print(f"{'where':<6} {'mode':<8} {'rescore':>7} {'bytes/vec':>10} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    bench_local(args, vectors, queries, truth)
+    if args.pg:
+        bench_pg(args, vectors, queries, truth)
+
+
+if __name__ == "__main__":
+    main()
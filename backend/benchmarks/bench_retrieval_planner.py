@@ -0,0 +1,192 @@
+# benchmarks/bench_retrieval_planner.py
+"""
+Recall@k and latency of RBAC-filtered vector search, naive vs planned.
+
+Loads synthetic chunks into a scratch schema (bench_planner) of the
+DATABASE_URL database: clustered 384-dim vectors, product tags drawn from
+a Zipf distribution so a few tags hold most rows and a long tail holds
+very few. Queries are grouped by how much of the corpus the allowed tags
+cover:
+
+  tail   one tag from the long tail        (selectivity << 1%)
+  mid    one mid-ranked tag                (~1-5%)
+  head   the most frequent tag             (~20-40%)
+  broad  the 20 most frequent tags         (~90%+)
+
+For each group it reports recall@k against an exact scan and p50/p99
+latency for:
+  naive    ORDER BY embedding <-> q LIMIT k on the global HNSW index
+  planner  RetrievalPlanner (exact / partial index / HNSW over-fetch)
+
+Requires PostgreSQL with pgvector. Usage (from backend/):
+    python -m benchmarks.bench_retrieval_planner --rows 200000 --tags 200
+    python -m benchmarks.bench_retrieval_planner --partial-min-rows 20000
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+SCHEMA = "bench_planner"
+DIM = 384
+
+
+def make_corpus(rows: int, n_tags: int, zipf_s: float, rng: np.random.Generator):
+    centers = rng.standard_normal((256, DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), rows)]
+    vectors += 0.6 * rng.standard_normal((rows, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    weights = 1.0 / np.arange(1, n_tags + 1) ** zipf_s
+    tags = rng.choice(n_tags, size=rows, p=weights / weights.sum())
+    return vectors, np.array([f"tag-{t:04d}" for t in tags])
+
+
+def load(engine, vectors: np.ndarray, tags: np.ndarray, schema: str = SCHEMA) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+        conn.execute(text(f"""
+            CREATE TABLE {schema}.chunks (
+                id UUID PRIMARY KEY,
+                ticket_id TEXT,
+                product_tag TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                embedding VECTOR({DIM}),
+                metadata JSONB,
+                content_hash TEXT,
+                created_at TIMESTAMP DEFAULT NOW()
+            )
+        """))
+
+    raw = engine.raw_connection()
+    try:
+        with raw.driver_connection.cursor() as cur:
+            with cur.copy(
+                f"COPY {schema}.chunks (id, ticket_id, product_tag, chunk_index, text, embedding) "
+                "FROM STDIN WITH (FORMAT BINARY)"
+            ) as copy:
+                copy.set_types(["uuid", "text", "text", "int4", "text", "vector"])
+                for i, (vec, tag) in enumerate(zip(vectors, tags)):
+                    copy.write_row([uuid.uuid4(), f"T{i}", tag, 0, f"chunk {i}", vec])
+        raw.commit()
+    finally:
+        raw.close()
+
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX ON {schema}.chunks (product_tag)"))
+        conn.execute(text(
+            f"CREATE INDEX idx_chunks_embedding_hnsw ON {schema}.chunks "
+            "USING hnsw (embedding vector_l2_ops)"
+        ))
+        conn.execute(text(f"ANALYZE {schema}.chunks"))
+
+
+def query_groups(tags: np.ndarray):
+    names, counts = np.unique(tags, return_counts=True)
+    by_size = names[np.argsort(-counts)]
+    return {
+        "tail": [[t] for t in by_size[-20:]],
+        "mid": [[t] for t in by_size[5:15]],
+        "head": [[by_size[0]]],
+        "broad": [list(by_size[:20])],
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--queries", type=int, default=100, help="queries per group")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--exact-max-rows", type=int, default=20_000)
+    parser.add_argument("--partial-min-rows", type=int, default=0)
+    parser.add_argument("--skip-load", action="store_true", help="reuse the existing scratch table")
+    args = parser.parse_args()
+
+    from app.config.connection import _register_pgvector
+    from app.config.settings import get_settings
+    from app.rag.vector_backends.planner import (
+        RetrievalPlanner,
+        ef_search_stmt,
+        ensure_partial_indexes,
+        exact_stmt,
+        knn_stmt,
+    )
+
+    engine = create_engine(
+        get_settings().database_url,
+        connect_args={"options": f"-c search_path={SCHEMA},public"},
+    )
+    event.listen(engine, "connect", _register_pgvector)
+
+    rng = np.random.default_rng(0)
+    vectors, tags = make_corpus(args.rows, args.tags, args.zipf, rng)
+    if not args.skip_load:
+        start = time.perf_counter()
+        load(engine, vectors, tags)
+        print(f"loaded {args.rows} rows + HNSW index in {time.perf_counter() - start:.1f}s")
+
+    planner = RetrievalPlanner(
+        exact_max_rows=args.exact_max_rows,
+        ef_search_max=1000,
+        stats_ttl_seconds=3600,
+    )
+    with Session(engine) as db:
+        if args.partial_min_rows:
+            created = ensure_partial_indexes(db, planner.stats(db), args.partial_min_rows)
+            print(f"partial indexes created for {len(created)} tags")
+            planner.invalidate()
+        stats = planner.stats(db)
+
+    print(f"\nk={args.k}, {args.queries} queries per group")
+    print(f"{'group':<7} {'sel':>7} {'plan':<14} {'method':<8} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8}")
+
+    for group, tag_sets in query_groups(tags).items():
+        results = {"naive": ([], []), "planner": ([], [])}
+        plan_name = ""
+
+        for i in range(args.queries):
+            allowed = tag_sets[i % len(tag_sets)]
+            q = vectors[rng.integers(0, len(vectors))] + 0.05 * rng.standard_normal(DIM).astype(np.float32)
+
+            with Session(engine) as db:
+                truth = {c.id for c in db.execute(exact_stmt(q, allowed, args.k)).scalars()}
+                db.rollback()
+
+                def naive():
+                    db.execute(ef_search_stmt(40))
+                    return db.execute(knn_stmt(q, allowed, args.k)).scalars().all()
+
+                for name, fn in (("naive", naive), ("planner", lambda: planner.search(db, q, allowed, args.k))):
+                    rows, elapsed = timed(fn)
+                    db.rollback()
+                    recalls, latencies = results[name]
+                    recalls.append(len({c.id for c in rows} & truth) / max(1, len(truth)))
+                    latencies.append(elapsed * 1000)
+
+            plan_name = planner.plan(stats, allowed, args.k).strategy
+
+        sel = sum(stats.counts.get(t, 0) for t in tag_sets[0]) / stats.total
+        for name, (recalls, latencies) in results.items():
+            print(
+                f"{group:<7} {sel:>7.2%} {plan_name if name == 'planner' else '-':<14} {name:<8} "
+                f"{np.mean(recalls):>7.3f} {np.percentile(latencies, 50):>8.2f} "
+                f"{np.percentile(latencies, 99):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_ticket_loader.py
+"""
+Peak memory and tickets/sec of loading a ticket export.
+
+Writes --tickets synthetic tickets (built from DATA_PATH) to a temporary
+JSON array and JSONL file, then reads each back with:
+  json.load    the whole document, then a list of Ticket models
+               (what load_tickets_from_file used to do)
+  streaming    iter_tickets_from_file(), one Ticket at a time
+
+Peak memory is the tracemalloc high-water mark of the Python heap while
+reading; the streaming loader should stay flat as --tickets grows.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ticket_loader --tickets 200000
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+def write_exports(directory: Path, n: int):
+    from app.ingestion.loader import load_tickets_from_file
+
+    base = [t.model_dump(mode="json") for t in load_tickets_from_file()]
+    records = ({**base[i % len(base)], "ticket_id": f"BENCH-{i}"} for i in range(n))
+
+    array, jsonl = directory / "tickets.json", directory / "tickets.jsonl"
+    with array.open("w", encoding="utf-8") as fa, jsonl.open("w", encoding="utf-8") as fl:
+        fa.write("[\n")
+        for i, record in enumerate(records):
+            line = json.dumps(record)
+            fa.write(("," if i else "") + line + "\n")
+            fl.write(line + "\n")
+        fa.write("]\n")
+    return array, jsonl
+
+
+def json_load(path: Path) -> int:
+    from app.models.ticket import Ticket
+
+    with path.open("r", encoding="utf-8") as f:
+        tickets = [Ticket(**item) for item in json.load(f)]
+    return len(tickets)
+
+
+def streaming(path: Path) -> int:
+    from app.ingestion.loader import iter_tickets_from_file
+
+    return sum(1 for _ in iter_tickets_from_file(path))
+
+
+def measure(load, path: Path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = load(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count / elapsed, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_exports(Path(tmp), args.tickets)
+        print(f"{args.tickets} tickets")
+        print(f"{'file':14s} {'loader':10s} {'MiB on disk':>11s} {'tickets/s':>10s} {'peak MiB':>9s}")
+        for path in files:
+            size = path.stat().st_size / 2**20
+            # json.load cannot read JSONL at all
+            loaders = (("json.load", json_load),) if path.suffix == ".json" else ()
+            for name, load in loaders + (("streaming", streaming),):
+                rate, peak = measure(load, path)
+                print(f"{path.name:14s} {name:10s} {size:11.1f} {rate:10.0f} {peak:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
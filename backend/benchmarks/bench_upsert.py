@@ -0,0 +1,88 @@
+# benchmarks/bench_upsert.py
+"""
+Compare ticket upsert throughput: row-by-row SELECT-then-UPDATE
+(`upsert_tickets`) vs set-based INSERT ... ON CONFLICT (`bulk_upsert_tickets`).
+
+Requires a reachable DATABASE_URL with the schema from db/init.sql.
+Synthetic tickets use the "BENCH-" prefix and are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_upsert --tickets 20000 --batch-size 1000
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import delete
+
+from app.config.connection import SessionLocal
+from app.ingestion.loader import bulk_upsert_tickets, upsert_tickets
+from app.models.ticket import Ticket, TicketORM
+
+
+def make_tickets(n: int, revision: int) -> list[Ticket]:
+    return [
+        Ticket(
+            ticket_id=f"BENCH-{i}",
+            product_tag=f"Product_{'ABC'[i % 3]}",
+            customer_id=f"CUST-{i % 97}",
+            customer_segment="enterprise",
+            created_at=datetime(2024, 1, 1),
+            resolved_at=datetime(2024, 1, 2),
+            resolution_summary=f"Revision {revision}: resolved issue #{i}.",
+            tags=["bench", "upsert"],
+            language="en",
+        )
+        for i in range(n)
+    ]
+
+
+def cleanup(db) -> None:
+    db.execute(delete(TicketORM).where(TicketORM.ticket_id.like("BENCH-%")))
+    db.commit()
+
+
+def timed(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f}s  {n / elapsed:10.0f} tickets/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    n = args.tickets
+    db = SessionLocal()
+    try:
+        cleanup(db)
+
+        # Each path is measured twice: cold (all inserts) and warm (all updates)
+        def row_by_row(revision: int) -> None:
+            upsert_tickets(db, make_tickets(n, revision))
+
+        old_insert = timed("row-by-row (insert)", lambda: row_by_row(1), n)
+        old_update = timed("row-by-row (update)", lambda: row_by_row(2), n)
+        cleanup(db)
+
+        def bulk(revision: int) -> None:
+            bulk_upsert_tickets(db, make_tickets(n, revision), batch_size=args.batch_size)
+            db.commit()
+
+        new_insert = timed(f"bulk batch={args.batch_size} (insert)", lambda: bulk(1), n)
+        new_update = timed(f"bulk batch={args.batch_size} (update)", lambda: bulk(2), n)
+
+        print(f"speedup insert: {old_insert / new_insert:.1f}x")
+        print(f"speedup update: {old_update / new_update:.1f}x")
+    finally:
+        cleanup(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_vector_transfer.py
+"""
+Microbenchmark: cost of preparing embedding vectors for pgvector.
+
+  list/text    — old path: ndarray -> row.tolist() -> "[f,f,...]" text literal
+  array/binary — new path: float32 ndarray row -> pgvector binary wire format
+
+Measures wall time and Python allocations (tracemalloc) for encoding a
+batch of vectors the way ingestion (inserts) and retrieval (query
+parameter) hand them to the driver. No database needed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_transfer --rows 20000 --dim 384
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from pgvector import Vector
+
+
+def old_path(arr: np.ndarray) -> list:
+    lists = [row.tolist() for row in arr]
+    return [Vector._to_db(vec) for vec in lists]
+
+
+def new_path(arr: np.ndarray) -> list:
+    return [Vector(row).to_binary() for row in arr]
+
+
+def measure(label: str, fn, arr: np.ndarray) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = fn(arr)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    payload = sum(len(x) for x in out)
+    per_row_us = elapsed / len(arr) * 1e6
+    print(
+        f"{label:<14} {elapsed * 1000:9.1f} ms  {per_row_us:7.2f} us/row  "
+        f"peak alloc {peak / 1e6:8.1f} MB  wire {payload / 1e6:7.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    arr = rng.standard_normal((args.rows, args.dim)).astype(np.float32)
+
+    print(f"{args.rows} vectors x {args.dim} dims")
+    measure("list/text", old_path, arr)
+    measure("array/binary", new_path, arr)
+
+    print("single query vector:")
+    measure("list/text", old_path, arr[:1])
+    measure("array/binary", new_path, arr[:1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/stub_llm_server.py
+"""
+Minimal local LLM stand-in for load tests (stdlib only).
+
+Speaks the same protocol as LLM_ENDPOINT: POST {"prompt": ...} and
+responds {"text": ...} after a fixed delay, with HTTP/1.1 keep-alive.
+With {"stream": true} the answer is sent word by word as chunked
+application/x-ndjson ({"text": <delta>} per line), the delay spread
+evenly over the words.
+Tracks the peak number of concurrently open requests.
+
+Usage (from backend/):
+    python -m benchmarks.stub_llm_server --port 9000 --delay 0.5
+    # then: LLM_ENDPOINT=http://localhost:9000/generate OPENAI_API_KEY= ...
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+
+
+class StubLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 9000, delay: float = 0.5):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                body = json.loads(await reader.readexactly(int(headers.get("content-length", 0))) or b"{}")
+                prompt = body.get("prompt", "")
+                answer = f"stub answer for {len(prompt)} prompt chars"
+
+                self.requests += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    if body.get("stream"):
+                        await self._stream(writer, answer)
+                        continue
+                    await asyncio.sleep(self.delay)
+                finally:
+                    self.in_flight -= 1
+
+                payload = json.dumps({"text": answer}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter, answer: str) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.delay / len(words))
+            line = json.dumps({"text": word if i == 0 else " " + word}).encode() + b"\n"
+            writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def serve_forever(self) -> None:
+        server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+    def start_in_thread(self) -> "StubLLMServer":
+        """Run the server on a daemon thread with its own event loop."""
+        ready = threading.Event()
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            server = loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+            )
+            ready.set()
+            try:
+                loop.run_forever()
+            finally:
+                server.close()
+
+        threading.Thread(target=run, name="stub-llm", daemon=True).start()
+        ready.wait()
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/generate"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"stub LLM on http://{args.host}:{args.port}/generate (delay={args.delay}s)")
+    asyncio.run(StubLLMServer(args.host, args.port, args.delay).serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ CREATE TABLE IF NOT EXISTS tickets (
     resolved_at TIMESTAMP,
     resolution_summary TEXT,
     tags TEXT[],
-    language TEXT
+    language TEXT,
+    content_hash TEXT
 );
 
 CREATE TABLE IF NOT EXISTS chunks (
@@ -20,11 +21,82 @@ CREATE TABLE IF NOT EXISTS chunks (
     text TEXT NOT NULL,
     embedding VECTOR(384),
     metadata JSONB,
+    content_hash TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    -- Coarse retrieval stage: projection of embedding + the projection version used
+    embedding_coarse VECTOR,
+    projection_version INTEGER,
+    -- Lexical index: identifiers/tags verbatim ('simple'), chunk text stemmed ('english')
+    search_tsv TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple',
+            coalesce(ticket_id, '') || ' ' || product_tag || ' ' || coalesce(metadata->>'tags', '')), 'A')
+        || setweight(to_tsvector('english', text), 'B')
+    ) STORED,
+    CONSTRAINT uq_chunks_ticket_chunk UNIQUE (ticket_id, chunk_index)
+);
+
+-- Coarse-retrieval projections fitted by ingestion; the highest version is current.
+-- The HNSW index over chunks.embedding_coarse is created once the dimension is known.
+CREATE TABLE IF NOT EXISTS vector_projections (
+    version SERIAL PRIMARY KEY,
+    method TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    params BYTEA NOT NULL,
+    fitted_rows INTEGER NOT NULL,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- ------------------------------------------------------------------
+-- Upgrade of databases created before these columns / constraints existed.
+-- This file only runs automatically on a new data volume; on an existing
+-- one run it by hand (psql "$DATABASE_URL" -f db/init.sql). Idempotent.
+-- ------------------------------------------------------------------
+
+-- Incremental ingestion
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Hybrid retrieval (RETRIEVAL_MODE=hybrid, the default) queries search_tsv;
+-- its GIN index is created below. Expression must match models/chunk.py.
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS search_tsv TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple',
+        coalesce(ticket_id, '') || ' ' || product_tag || ' ' || coalesce(metadata->>'tags', '')), 'A')
+    || setweight(to_tsvector('english', text), 'B')
+) STORED;
+
+-- Coarse-to-fine retrieval (vector_projections itself is created above)
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS embedding_coarse VECTOR;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS projection_version INTEGER;
+
+-- Earlier ingestion appended a new copy of every chunk on each run: keep the
+-- newest row per (ticket_id, chunk_index), then enforce one.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'uq_chunks_ticket_chunk' AND conrelid = 'chunks'::regclass
+    ) THEN
+        DELETE FROM chunks
+        WHERE ctid IN (
+            SELECT ctid FROM (
+                SELECT ctid, row_number() OVER (
+                    PARTITION BY ticket_id, chunk_index
+                    ORDER BY created_at DESC NULLS LAST, id DESC
+                ) AS rn
+                FROM chunks
+                WHERE ticket_id IS NOT NULL
+            ) ranked
+            WHERE rn > 1
+        );
+        ALTER TABLE chunks ADD CONSTRAINT uq_chunks_ticket_chunk UNIQUE (ticket_id, chunk_index);
+    END IF;
+END $$;
+
 CREATE INDEX IF NOT EXISTS idx_chunks_embedding_hnsw
 ON chunks USING hnsw (embedding vector_l2_ops);
 
 CREATE INDEX IF NOT EXISTS idx_chunks_product_tag
 ON chunks (product_tag);
+
+CREATE INDEX IF NOT EXISTS idx_chunks_search_tsv
+ON chunks USING gin (search_tsv);